@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
@@ -10,77 +12,157 @@ from fitFlow.backend.app.models.user import User
 from fitFlow.backend.app.models.client import Client
 from fitFlow.backend.app.models.nutritionist import Nutritionist
 from fitFlow.backend.app.models.admin import Admin
-from fitFlow.backend.app.services.user_service import register_user
-from fitFlow.backend.app.core.security import verify_password, create_access_token
-from fitFlow.backend.app.database.session import get_db
+from fitFlow.backend.app.services.user_service import register_user, ROLE, ROLE_FILTERS, with_role
+from fitFlow.backend.app.core.security import create_access_token
+from fitFlow.backend.app.core import password_hashing
+from fitFlow.backend.app.core.rate_limit import client_ip, login_cedula_limiter, login_ip_limiter
+from fitFlow.backend.app.database.session import get_db, get_async_db
 from fitFlow.backend.app.core.security import SECRET_KEY
+from fitFlow.backend.app.core.principal_cache import Principal, principal_cache
 
 
 ALGORITHM = "HS256"
 
+# Columnas que puede pedir el directorio con fields=
+DIRECTORY_FIELDS = {
+    "user_id": User.user_id,
+    "first_name": User.first_name,
+    "last_name": User.last_name,
+    "cedula": User.cedula,
+    "email": User.email,
+    "birth_date": User.birth_date,
+    "sex": User.sex,
+    "role": ROLE,
+}
+DIRECTORY_MAX_LIMIT = 200
+
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_role(user: User, db: Session):
-    if db.query(Client).filter(Client.client_id == user.user_id).first():
-        return "Cliente"
-    elif db.query(Nutritionist).filter(Nutritionist.nutritionist_id == user.user_id).first():
-        return "Nutricionista"
-    elif db.query(Admin).filter(Admin.admin_id == user.user_id).first():
-        return "Administrador"
-    return "Sin rol"
-
-def get_current_user(token: str = Depends(oauth2_scheme),
-                     db: Session = Depends(get_db)) -> User:
-    cred_exc = HTTPException(401, "Could not validate credentials",
-                             headers={"WWW-Authenticate":"Bearer"})
+def _credentials_exception():
+    return HTTPException(401, "Could not validate credentials",
+                         headers={"WWW-Authenticate":"Bearer"})
+
+def _decode_token(token: str) -> dict:
+    cred_exc = _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        cedula = payload.get("sub")
-        if cedula is None:
+        if payload.get("sub") is None:
             raise cred_exc
     except JWTError:
         raise cred_exc
-    user = db.query(User).filter(User.cedula == cedula).first()
-    if not user:
-        raise cred_exc
-    return user
+    return payload
+
+def _cache_principal(token: str, payload: dict, user_id: int, role: str) -> Principal:
+    principal = Principal(user_id, payload["sub"], role)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+def _principal_statement(payload: dict):
+    """user_id del titular del token; el rol sale del claim firmado o, en tokens sin él, del outer join"""
+    if "role" in payload:
+        return select(User.user_id, literal(payload["role"]).label("role")).where(User.cedula == payload["sub"])
+    return with_role(select(User.user_id, ROLE)).where(User.cedula == payload["sub"])
+
+def get_current_user_with_role(token: str = Depends(oauth2_scheme),
+                               db: Session = Depends(get_db)) -> Tuple[User, str]:
+    """Usuario ORM completo y su rol en una sola consulta (claim firmado o, en tokens sin él, outer join)"""
+    payload = _decode_token(token)
+    if "role" in payload:
+        statement = select(User, literal(payload["role"]).label("role"))
+    else:
+        statement = with_role(select(User, ROLE))
+    row = db.execute(statement.where(User.cedula == payload["sub"])).first()
+    if row is None:
+        raise _credentials_exception()
+    user, role = row
+    _cache_principal(token, payload, user.user_id, role)
+    return user, role
+
+def get_current_user(current: Tuple[User, str] = Depends(get_current_user_with_role)) -> User:
+    """Usuario ORM completo; los endpoints que solo necesitan user_id usan get_current_principal"""
+    return current[0]
+
+def get_current_principal(token: str = Depends(oauth2_scheme),
+                          db: Session = Depends(get_db)) -> Principal:
+    """Principal desde la caché; solo en un fallo se decodifica el token y se consulta el user_id"""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    payload = _decode_token(token)
+    row = db.execute(_principal_statement(payload)).first()
+    if row is None:
+        raise _credentials_exception()
+    return _cache_principal(token, payload, row.user_id, row.role)
+
+async def get_current_principal_async(token: str = Depends(oauth2_scheme),
+                                      db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """Variante asíncrona de get_current_principal para los endpoints async"""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    payload = _decode_token(token)
+    row = (await db.execute(_principal_statement(payload))).first()
+    if row is None:
+        raise _credentials_exception()
+    return _cache_principal(token, payload, row.user_id, row.role)
 
 
 @router.post("/login")
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.cedula == form.username).first()
-    if not user or not verify_password(form.password, user.password):
+async def login(request: Request, form: OAuth2PasswordRequestForm = Depends(),
+                db: AsyncSession = Depends(get_async_db)):
+    # Rechazos baratos antes de tocar la base de datos o bcrypt: límite por IP y por cédula,
+    # y descarte directo si el pool de bcrypt ya está saturado
+    retry_after = login_ip_limiter.check(client_ip(request)) or login_cedula_limiter.check(form.username)
+    if retry_after:
+        raise HTTPException(429, "Demasiados intentos de inicio de sesión, intente más tarde",
+                            headers={"Retry-After": str(retry_after)})
+    if password_hashing.is_saturated():
+        raise password_hashing.PasswordHashingBusy("login descartado antes de la consulta")
+
+    # Usuario y rol en una sola consulta; el rol viaja firmado en el token
+    row = (await db.execute(with_role(select(User, ROLE)).where(User.cedula == form.username))).first()
+    if not row:
         raise HTTPException(400, "Invalid credentials")
-    access_token = create_access_token({"sub": user.cedula})
+    user, role = row
+    user_id, cedula, stored_hash = user.user_id, user.cedula, user.password
+    # La conexión vuelve al pool antes de bcrypt: los logins en espera no retienen conexiones
+    await db.rollback()
+
+    # bcrypt en el pool dedicado: el event loop y el threadpool siguen atendiendo otras peticiones
+    valid, new_hash = await password_hashing.verify_and_update(form.password, stored_hash)
+    if not valid:
+        raise HTTPException(400, "Invalid credentials")
+
+    # El hash tenía otro coste (BCRYPT_ROUNDS cambió): se guarda el recalculado en una transacción nueva,
+    # solo si nadie cambió la contraseña mientras tanto
+    if new_hash:
+        await db.execute(update(User).where(User.user_id == user_id, User.password == stored_hash)
+                         .values(password=new_hash))
+        await db.commit()
+        password_hashing.HASH_REHASHED.inc()
+
+    access_token = create_access_token({"sub": cedula, "role": role})
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserOut)
-def me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    role = get_role(current_user, db)
-    return {**current_user.__dict__, "role": role}
+def me(current: Tuple[User, str] = Depends(get_current_user_with_role)):
+    user, role = current
+    return {**user.__dict__, "role": role}
 
 
 # NUTRITIONISTS
 @router.get("/nutritionists", response_model=List[UserOut])
 def list_nutritionists(db: Session = Depends(get_db)):
-    nutritionists = db.query(Nutritionist).all()
-    result = []
-    for n in nutritionists:
-        user = db.query(User).filter(User.user_id == n.nutritionist_id).first()
-        result.append({**user.__dict__, "role": "Nutricionista"})
-    return result
+    users = db.query(User).join(Nutritionist, Nutritionist.nutritionist_id == User.user_id).all()
+    return [{**user.__dict__, "role": "Nutricionista"} for user in users]
 
 # ADMINS
 @router.get("/admins", response_model=List[UserOut])
 def list_admins(db: Session = Depends(get_db)):
-    admins = db.query(Admin).all()
-    result = []
-    for a in admins:
-        user = db.query(User).filter(User.user_id == a.admin_id).first()
-        result.append({**user.__dict__, "role": "Administrador"})
-    return result
+    users = db.query(User).join(Admin, Admin.admin_id == User.user_id).all()
+    return [{**user.__dict__, "role": "Administrador"} for user in users]
 
 # USUARIO
 @router.delete("/users/{user_id}")
@@ -89,25 +171,53 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(404, "Usuario no encontrado")
     db.delete(user)
-    db.commit()
+    db.commit()  # el evento after_delete de User invalida sus principales en caché
     return {"message": "Usuario eliminado correctamente"}
 
 @router.get("/users", response_model=List[UserOut])
 def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    result = []
-    for user in users:
-        role = get_role(user, db)
-        result.append({**user.__dict__, "role": role})
-    return result
+    rows = with_role(db.query(User, ROLE)).order_by(User.user_id).all()
+    return [{**user.__dict__, "role": role} for user, role in rows]
 
 #CLIENTS
 @router.get("/clients", response_model=List[UserOut])
 def list_clients(db: Session = Depends(get_db)):
-    clients = db.query(Client).all()
-    result = []
-    for c in clients:
-        user = db.query(User).filter(User.user_id == c.client_id).first()
-        result.append({**user.__dict__, "role": "Cliente"})
-    return result
-
+    users = db.query(User).join(Client, Client.client_id == User.user_id).all()
+    return [{**user.__dict__, "role": "Cliente"} for user in users]
+
+
+# DIRECTORIO PAGINADO
+@router.get("/directory")
+def user_directory(q: Optional[str] = Query(None, description="Texto en el nombre o prefijo de la cédula"),
+                   role: Optional[str] = Query(None, description="Cliente, Nutricionista, Administrador o Sin rol"),
+                   fields: Optional[str] = Query(None, description="Columnas separadas por comas, p.ej. user_id,first_name,role"),
+                   after: Optional[int] = Query(None, description="Cursor: user_id del último elemento de la página anterior"),
+                   limit: int = Query(50, ge=1, le=DIRECTORY_MAX_LIMIT),
+                   db: Session = Depends(get_db)):
+    """Usuarios con su rol en una sola consulta, paginados por user_id (keyset)"""
+    names = list(DIRECTORY_FIELDS) if not fields else [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DIRECTORY_FIELDS]
+    if unknown:
+        raise HTTPException(400, f"Campos no válidos: {', '.join(unknown)}")
+    if "user_id" not in names:
+        names.insert(0, "user_id")  # necesario para el cursor
+    if role is not None and role not in ROLE_FILTERS:
+        raise HTTPException(400, f"Rol no válido: {role}")
+
+    statement = with_role(select(*[DIRECTORY_FIELDS[name].label(name) for name in names]).select_from(User))
+    if role is not None:
+        statement = statement.where(ROLE_FILTERS[role])
+    if q:
+        full_name = func.lower(User.first_name + " " + User.last_name)
+        statement = statement.where(or_(full_name.contains(q.strip().lower(), autoescape=True),
+                                        User.cedula.startswith(q.strip(), autoescape=True)))
+    if after is not None:
+        statement = statement.where(User.user_id > after)
+
+    # Se pide una fila de más para saber si hay página siguiente sin un COUNT
+    rows = db.execute(statement.order_by(User.user_id).limit(limit + 1)).mappings().all()
+    items = [dict(row) for row in rows[:limit]]
+    return {
+        "items": items,
+        "next_cursor": items[-1]["user_id"] if len(rows) > limit else None
+    }
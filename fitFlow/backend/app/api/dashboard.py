@@ -1,23 +1,23 @@
 from datetime import date, timedelta
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from fitFlow.backend.app.database.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select
+from fitFlow.backend.app.database.session import get_async_db
 from fitFlow.backend.app.models.client import Client
-from fitFlow.backend.app.models.food_log import FoodLog
-from fitFlow.backend.app.models.food import Food
-from fitFlow.backend.app.api.auth import get_current_user, User
+from fitFlow.backend.app.models.daily_nutrition_total import DailyNutritionTotal
+from fitFlow.backend.app.api.auth import get_current_principal_async, Principal
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
 @router.get("/nutrition-metrics")
-def get_nutrition_metrics(current_user: User = Depends(get_current_user),
-                          db: Session = Depends(get_db)):
+async def get_nutrition_metrics(current_user: Principal = Depends(get_current_principal_async),
+                                db: AsyncSession = Depends(get_async_db)):
     # Verificar que el usuario es un cliente
-    client = db.query(Client).options(joinedload(Client.user)).filter(
-        Client.client_id == current_user.user_id
-    ).first()
+    client = (await db.execute(
+        select(Client).options(joinedload(Client.user)).where(Client.client_id == current_user.user_id)
+    )).scalars().first()
 
     if not client:
         raise HTTPException(404, "Cliente no encontrado")
@@ -30,11 +30,14 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
     for i in range(-3, 4):  # -3, -2, -1, 0, 1, 2, 3
         dates_to_check.append(backend_today + timedelta(days=i))
 
-    # Encontrar qué fechas tienen registros
-    recent_logs = db.query(FoodLog.date, func.count(FoodLog.log_id)).filter(
-        FoodLog.user_id == current_user.user_id,
-        FoodLog.date.in_(dates_to_check)
-    ).group_by(FoodLog.date).order_by(FoodLog.date.desc()).all()
+    # Encontrar qué fechas tienen registros (desde los totales diarios pre-agregados)
+    recent_logs = (await db.execute(
+        select(DailyNutritionTotal.date, func.sum(DailyNutritionTotal.log_count)).where(
+            DailyNutritionTotal.user_id == current_user.user_id,
+            DailyNutritionTotal.date.in_(dates_to_check),
+            DailyNutritionTotal.log_count > 0
+        ).group_by(DailyNutritionTotal.date).order_by(DailyNutritionTotal.date.desc())
+    )).all()
 
     # Usar la fecha más reciente con datos, o hoy si no hay datos
     if recent_logs:
@@ -73,13 +76,20 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
         "macronutrient_targets": client.get_macronutrient_targets()
     }
 
-    # 2. Consumo calórico del día seleccionado
-    today_logs = db.query(FoodLog).options(joinedload(FoodLog.food)).filter(
-        FoodLog.user_id == current_user.user_id,
-        FoodLog.date == today
-    ).all()
+    # Totales pre-agregados de los últimos 7 días (desde la fecha usada): una sola consulta
+    # sirve el consumo del día, la adherencia semanal y el consumo diario
+    window_start = today - timedelta(days=6)
+    totals = (await db.execute(
+        select(DailyNutritionTotal).where(
+            DailyNutritionTotal.user_id == current_user.user_id,
+            DailyNutritionTotal.date >= window_start,
+            DailyNutritionTotal.date <= today
+        )
+    )).scalars().all()
 
-    print(f"🔍 REGISTROS ENCONTRADOS: {len(today_logs)} para {today}")
+    # 2. Consumo calórico del día seleccionado
+    today_totals = [t for t in totals if t.date == today]
+    logs_found = sum(t.log_count for t in today_totals)
 
     today_consumption = {
         "total_calories": 0,
@@ -89,17 +99,12 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
         "by_meal": {"Desayuno": 0, "Almuerzo": 0, "Cena": 0, "Snack": 0}
     }
 
-    for log in today_logs:
-        calories = log.food.calories_per_portion * log.portion_size
-        protein = log.food.protein_per_portion * log.portion_size
-        carbs = log.food.carbs_per_portion * log.portion_size
-        fat = log.food.fat_per_portion * log.portion_size
-
-        today_consumption["total_calories"] += calories
-        today_consumption["total_protein"] += protein
-        today_consumption["total_carbs"] += carbs
-        today_consumption["total_fat"] += fat
-        today_consumption["by_meal"][log.meal_type.value] += calories
+    for total in today_totals:
+        today_consumption["total_calories"] += total.calories
+        today_consumption["total_protein"] += total.protein
+        today_consumption["total_carbs"] += total.carbs
+        today_consumption["total_fat"] += total.fat
+        today_consumption["by_meal"][total.meal_type.value] += total.calories
 
     print(f"🔍 TOTAL CALORÍAS CALCULADAS: {today_consumption['total_calories']}")
 
@@ -115,13 +120,12 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
     }
 
     # 4. Adherencia semanal (basada en la fecha que estamos usando)
-    week_logs = db.query(FoodLog.date, func.count(FoodLog.log_id)).filter(
-        FoodLog.user_id == current_user.user_id,
-        FoodLog.date >= week_start,
-        FoodLog.date <= today
-    ).group_by(FoodLog.date).all()
+    calories_by_day = {}
+    for total in totals:
+        if total.log_count > 0:
+            calories_by_day[total.date] = calories_by_day.get(total.date, 0) + total.calories
 
-    days_with_logs = len(week_logs)
+    days_with_logs = len([day for day in calories_by_day if day >= week_start])
     days_elapsed = (today - week_start).days + 1
 
     weekly_adherence = {
@@ -134,12 +138,7 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
     week_daily_consumption = []
     for i in range(7):
         day = today - timedelta(days=i)
-        day_logs = db.query(FoodLog).options(joinedload(FoodLog.food)).filter(
-            FoodLog.user_id == current_user.user_id,
-            FoodLog.date == day
-        ).all()
-
-        day_total = sum(log.food.calories_per_portion * log.portion_size for log in day_logs)
+        day_total = calories_by_day.get(day, 0)
 
         week_daily_consumption.append({
             "date": day.isoformat(),
@@ -159,7 +158,7 @@ def get_nutrition_metrics(current_user: User = Depends(get_current_user),
         "debug_info": {
             "backend_real_date": backend_today.isoformat(),
             "date_used_for_metrics": today.isoformat(),
-            "logs_found": len(today_logs),
+            "logs_found": logs_found,
             "user_id": current_user.user_id,
             "available_dates": [{"date": str(log_date), "count": count} for log_date, count in recent_logs]
         }
@@ -1,48 +1,52 @@
+from collections import defaultdict
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import List
-from fitFlow.backend.app.database.session import get_db
+from sqlalchemy import func, insert
+from typing import Dict, Iterable, List
+from fitFlow.backend.app.database.session import get_db, commit_with_retry
 from fitFlow.backend.app.models.food_log import FoodLog
-from fitFlow.backend.app.models.user import User
 from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
 from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal
 from fitFlow.backend.app.schemas.food_log import FoodLogCreate
-from fitFlow.backend.app.api.auth import get_current_user
+from fitFlow.backend.app.api.auth import get_current_principal, Principal
+from fitFlow.backend.app.services import nutrition_rollup
 
 router = APIRouter(prefix="/food-logs", tags=["FoodLogs"])
 
 
-def get_planned_amount(db: Session, user_id: int, date: str, food_id: int, meal_type: str):
-    """Obtiene la cantidad planificada para una comida específica"""
-    result = db.query(NutritionPlanMeal.portion_size).join(
+def get_planned_amounts(db: Session, user_id: int, dates: Iterable) -> Dict[tuple, float]:
+    """Cantidades planificadas por (fecha, food_id, meal_type) para todas las fechas, en una consulta"""
+    rows = db.query(
+        NutritionPlan.plan_date, NutritionPlanMeal.food_id, NutritionPlanMeal.meal_type,
+        func.sum(NutritionPlanMeal.portion_size)
+    ).join(
         NutritionPlan, NutritionPlan.plan_id == NutritionPlanMeal.plan_id
     ).filter(
         NutritionPlan.user_id == user_id,
-        NutritionPlan.plan_date == date,
-        NutritionPlanMeal.food_id == food_id,
-        NutritionPlanMeal.meal_type == meal_type
-    ).scalar()
+        NutritionPlan.plan_date.in_(dates)
+    ).group_by(
+        NutritionPlan.plan_date, NutritionPlanMeal.food_id, NutritionPlanMeal.meal_type
+    ).all()
 
-    return result or 0.0
+    return {(plan_date, food_id, meal_type): amount or 0.0 for plan_date, food_id, meal_type, amount in rows}
 
 
-def get_consumed_amount(db: Session, user_id: int, date: str, food_id: int, meal_type: str):
-    """Calcula la cantidad ya consumida para una comida específica"""
-    result = db.query(func.sum(FoodLog.portion_size)).filter(
+def get_consumed_amounts(db: Session, user_id: int, dates: Iterable) -> Dict[tuple, float]:
+    """Cantidades ya consumidas por (fecha, food_id, meal_type) para todas las fechas, en una consulta"""
+    rows = db.query(
+        FoodLog.date, FoodLog.food_id, FoodLog.meal_type, func.sum(FoodLog.portion_size)
+    ).filter(
         FoodLog.user_id == user_id,
-        FoodLog.date == date,
-        FoodLog.food_id == food_id,
-        FoodLog.meal_type == meal_type
-    ).scalar()
+        FoodLog.date.in_(dates)
+    ).group_by(FoodLog.date, FoodLog.food_id, FoodLog.meal_type).all()
 
-    return result or 0.0
+    return {(log_date, food_id, meal_type): amount or 0.0 for log_date, food_id, meal_type, amount in rows}
 
 
 @router.post("/")
 def log_food(entries: List[FoodLogCreate],
-             current_user: User = Depends(get_current_user),
+             current_user: Principal = Depends(get_current_principal),
              db: Session = Depends(get_db)):
     debug_info = {
         "usuario_id": current_user.user_id,
@@ -51,29 +55,42 @@ def log_food(entries: List[FoodLogCreate],
     }
 
     try:
+        rows = [
+            {
+                "user_id": current_user.user_id,
+                "food_id": entry.food_id,
+                "meal_type": entry.meal_type,
+                "portion_size": entry.portion_size,
+                "date": entry.date if entry.date else datetime.utcnow().date()
+            }
+            for entry in entries
+        ]
+
+        # Cargar de una vez los planes, lo planificado y lo consumido de todas las fechas del lote
+        dates = {row["date"] for row in rows}
+        plan_dates = {
+            plan_date for (plan_date,) in db.query(NutritionPlan.plan_date).filter(
+                NutritionPlan.user_id == current_user.user_id,
+                NutritionPlan.plan_date.in_(dates)
+            ).distinct()
+        }
+        planned = get_planned_amounts(db, current_user.user_id, dates)
+        # Lo consumido se acumula con las entradas del propio lote (mismo alimento y comida)
+        consumed = defaultdict(float, get_consumed_amounts(db, current_user.user_id, dates))
+
         # Validar todas las entradas antes de insertar
-        for i, entry in enumerate(entries):
-            effective_date = entry.date if entry.date else datetime.utcnow().date()
+        for entry, row in zip(entries, rows):
+            effective_date = row["date"]
 
             # Verificar que existe un plan para esta fecha
-            nutrition_plan = db.query(NutritionPlan).filter(
-                and_(
-                    NutritionPlan.user_id == current_user.user_id,
-                    NutritionPlan.plan_date == effective_date
-                )
-            ).first()
-
-            if not nutrition_plan:
+            if effective_date not in plan_dates:
                 raise HTTPException(
                     status_code=400,
                     detail=f"No hay plan nutricional para la fecha {effective_date}"
                 )
 
-            # Obtener cantidad planificada
-            planned_amount = get_planned_amount(
-                db, current_user.user_id, effective_date,
-                entry.food_id, entry.meal_type
-            )
+            key = (effective_date, entry.food_id, entry.meal_type)
+            planned_amount = planned.get(key, 0.0)
 
             if planned_amount == 0:
                 raise HTTPException(
@@ -81,11 +98,7 @@ def log_food(entries: List[FoodLogCreate],
                     detail=f"No hay {entry.meal_type} planificado para el food_id {entry.food_id} en {effective_date}"
                 )
 
-            # Obtener cantidad ya consumida
-            already_consumed = get_consumed_amount(
-                db, current_user.user_id, effective_date,
-                entry.food_id, entry.meal_type
-            )
+            already_consumed = consumed[key]
 
             # Validar que no exceda lo planificado
             total_after_entry = already_consumed + entry.portion_size
@@ -99,6 +112,7 @@ def log_food(entries: List[FoodLogCreate],
                            f"Restante disponible: {remaining:.3f}, "
                            f"Intentando agregar: {entry.portion_size}"
                 )
+            consumed[key] = total_after_entry
 
             validation_result = {
                 "meal_type": entry.meal_type,
@@ -111,18 +125,15 @@ def log_food(entries: List[FoodLogCreate],
             debug_info["validation_results"].append(validation_result)
 
         # Si todas las validaciones pasan, insertar los registros
-        for entry in entries:
-            new_log = FoodLog(
-                user_id=current_user.user_id,
-                food_id=entry.food_id,
-                meal_type=entry.meal_type,
-                portion_size=entry.portion_size,
-                date=entry.date if entry.date else datetime.utcnow().date()
-            )
-            db.add(new_log)
-
-        # Confirmar transacción
-        db.commit()
+        def insert_logs():
+            if rows:
+                # Un único INSERT de varias filas en lugar de un objeto por registro
+                db.execute(insert(FoodLog), rows)
+            # Totales diarios en la misma transacción que los registros
+            nutrition_rollup.add_food_logs(db, current_user.user_id, rows)
+
+        # Confirmar transacción (reintenta si la base está bloqueada por otro escritor)
+        commit_with_retry(db, insert_logs)
 
         return {
             "message": f"{len(entries)} registros guardados correctamente",
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
-from fitFlow.backend.app.database.session import get_db
+from fitFlow.backend.app.database.session import get_db, get_async_db
 from fitFlow.backend.app.models.food import Food
 from fitFlow.backend.app.schemas.food import FoodCreate, FoodOut
+from fitFlow.backend.app.services import food_categories, food_search  # noqa: F401 (sus eventos mantienen índice y categorías)
+from fitFlow.backend.app.services import nutrition_rollup
+from fitFlow.backend.app.services.food_catalog import food_catalog, etag_matches, CATALOG_REQUESTS
 
 router = APIRouter(prefix="/foods", tags=["Foods"])
 
+NUTRIENT_FIELDS = ("calories_per_portion", "protein_per_portion", "fat_per_portion", "carbs_per_portion")
+
 @router.post("/", response_model=FoodOut)
 def create_food(food: FoodCreate, db: Session = Depends(get_db)):
     existing = db.query(Food).filter(Food.name == food.name).first()
@@ -15,6 +21,7 @@ def create_food(food: FoodCreate, db: Session = Depends(get_db)):
         raise HTTPException(400, "Este alimento ya está registrado")
     new_food = Food(
         name=food.name,
+        description=food.description,
         calories_per_portion=food.calories_per_portion,
         protein_per_portion=food.protein_per_portion,
         fat_per_portion=food.fat_per_portion,
@@ -23,6 +30,7 @@ def create_food(food: FoodCreate, db: Session = Depends(get_db)):
     )
     db.add(new_food)
     db.commit()
+    food_catalog.invalidate()
     db.refresh(new_food)
     return new_food
 
@@ -42,6 +50,8 @@ def update_food(food_id: int, food: FoodCreate, db: Session = Depends(get_db)):
     if name_conflict:
         raise HTTPException(400, "Ya existe otro alimento con ese nombre")
 
+    nutrients_changed = any(getattr(existing_food, field) != getattr(food, field) for field in NUTRIENT_FIELDS)
+
     # Actualizar campos
     existing_food.name = food.name
     existing_food.description = food.description if hasattr(food, 'description') else existing_food.description
@@ -51,13 +61,32 @@ def update_food(food_id: int, food: FoodCreate, db: Session = Depends(get_db)):
     existing_food.carbs_per_portion = food.carbs_per_portion
     existing_food.portion_unit = food.portion_unit
 
+    # Los totales diarios guardan los valores del momento del registro: recalcular los días afectados
+    if nutrients_changed:
+        db.flush()
+        nutrition_rollup.refresh_foods(db, [food_id])
+
     db.commit()
+    food_catalog.invalidate()
     db.refresh(existing_food)
     return existing_food
 
 @router.get("/", response_model=List[FoodOut])
-def list_foods(db: Session = Depends(get_db)):
-    return db.query(Food).all()
+async def list_foods(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Instantánea ya serializada; con If-None-Match vigente se responde 304 sin cuerpo
+    snapshot = await food_catalog.snapshot_async(db)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", "X-Catalog-Version": str(snapshot.version)}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        CATALOG_REQUESTS.inc(result="not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@router.get("/search", response_model=List[FoodOut])
+async def search_foods(q: str = Query(..., min_length=1, description="Texto a buscar; no distingue acentos"),
+                       limit: int = Query(food_search.SEARCH_DEFAULT_LIMIT, ge=1, le=food_search.SEARCH_MAX_LIMIT),
+                       db: AsyncSession = Depends(get_async_db)):
+    """Búsqueda y autocompletado por nombre y descripción, ordenada por relevancia"""
+    return await food_search.search_async(db, q, limit)
 
 @router.delete("/{food_id}")
 def delete_food(food_id: int, db: Session = Depends(get_db)):
@@ -66,4 +95,5 @@ def delete_food(food_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "Alimento no encontrado")
     db.delete(food)
     db.commit()
+    food_catalog.invalidate()
     return {"message": "Alimento eliminado correctamente"}
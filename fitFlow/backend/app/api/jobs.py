@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from typing import Callable, Dict
+
+from fitFlow.backend.app.database.session import get_db, SessionLocal
+from fitFlow.backend.app.api.auth import get_current_principal, Principal
+from fitFlow.backend.app.models.job import Job
+from fitFlow.backend.app.services.jobs import JobContext, job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def enqueue(kind: str, work: Callable[[Session, JobContext], Dict], params, current_user: Principal) -> JSONResponse:
+    """Ejecuta work(db, ctx) como trabajo en segundo plano y responde 202 con el job_id.
+    work recibe su propia sesión: la de la petición se cierra al responder."""
+
+    def run(ctx: JobContext):
+        with SessionLocal() as db:
+            return jsonable_encoder(work(db, ctx))
+
+    job_id = job_queue.submit(kind, run, params=jsonable_encoder(params), owner_id=current_user.user_id)
+    return JSONResponse(status_code=202, headers={"Location": f"/jobs/{job_id}"},
+                        content={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}"})
+
+
+def _visible_job(db: Session, job_id: str, current_user: Principal):
+    job = job_queue.get(db, job_id)
+    if job is None:
+        raise HTTPException(404, "Trabajo no encontrado")
+    if job.owner_id != current_user.user_id and current_user.role != "Administrador":
+        raise HTTPException(403, "No tienes permisos para ver este trabajo")
+    return job
+
+
+@router.get("/")
+def list_my_jobs(
+        limit: int = Query(20, ge=1, le=100),
+        current_user: Principal = Depends(get_current_principal),
+        db: Session = Depends(get_db)
+):
+    """Trabajos del usuario autenticado, del más reciente al más antiguo (sin resultados)"""
+    return [{**job_queue.describe(job), "result": None} for job in job_queue.for_owner(db, current_user.user_id, limit)]
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    """Estado, avance y, al terminar, resultado o error del trabajo"""
+    return job_queue.describe(_visible_job(db, job_id, current_user))
+
+
+@router.delete("/{job_id}")
+def cancel_job(job_id: str, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
+    """Pide cancelar el trabajo: en cola se descarta; en curso se detiene en su siguiente paso"""
+    job = _visible_job(db, job_id, current_user)
+    if not job_queue.cancel(job.job_id):
+        raise HTTPException(409, f"El trabajo ya terminó ({job.status.value})")
+    db.expire_all()
+    return job_queue.describe(db.get(Job, job.job_id))
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from fitFlow.backend.app.core import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -6,7 +6,8 @@ from pydantic import BaseModel
 
 from fitFlow.backend.app.database.session import get_db
 from fitFlow.backend.app.models.client import Client
-from fitFlow.backend.app.api.auth import get_current_user, User
+from fitFlow.backend.app.api.auth import get_current_principal, Principal
+from fitFlow.backend.app.api.jobs import enqueue
 
 # DEPENDENCY INVERSION PRINCIPLE - Importamos abstracciones, no implementaciones concretas
 from fitFlow.backend.app.services.nutrition_calculator import (
@@ -86,7 +87,8 @@ def get_available_plan_types(factory: NutritionPlanFactory = Depends(get_plan_fa
 @router.post("/generate-plan")
 def generate_enhanced_plan(
         request: PlanGenerationRequest,
-        current_user: User = Depends(get_current_user),
+        background: bool = Query(False, description="Encolar como trabajo: responde 202 y el resultado queda en GET /jobs/{job_id}"),
+        current_user: Principal = Depends(get_current_principal),
         factory: NutritionPlanFactory = Depends(get_plan_factory),
         db: Session = Depends(get_db)
 ):
@@ -95,15 +97,22 @@ def generate_enhanced_plan(
     Aplica DEPENDENCY INVERSION PRINCIPLE.
     """
 
+    # Verificar permisos
+    if current_user.user_id != request.user_id:
+        raise HTTPException(403, "No tienes permisos para generar planes de este usuario")
+
+    if background:
+        return enqueue("generate-plan", lambda job_db, ctx: _generate_enhanced_plan(job_db, request, factory),
+                       request, current_user)
+    return _generate_enhanced_plan(db, request, factory)
+
+
+def _generate_enhanced_plan(db: Session, request: PlanGenerationRequest, factory: NutritionPlanFactory):
     # Verificar cliente
     client = db.query(Client).filter(Client.client_id == request.user_id).first()
     if not client:
         raise HTTPException(404, "Cliente no encontrado")
 
-    # Verificar permisos
-    if current_user.user_id != request.user_id:
-        raise HTTPException(403, "No tienes permisos para generar planes de este usuario")
-
     try:
         # DEPENDENCY INVERSION: Usamos abstracciones inyectadas
         calculator = get_nutrition_calculator(request.calculator_type)
@@ -134,7 +143,7 @@ def generate_enhanced_plan(
 def get_enhanced_analysis(
         user_id: int,
         calculator_type: str = Query("standard", description="Tipo de calculadora: standard o sport"),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_principal),
         db: Session = Depends(get_db)
 ):
     """
@@ -171,7 +180,7 @@ def get_enhanced_analysis(
 @router.get("/compare-calculators/{user_id}")
 def compare_calculators(
         user_id: int,
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_principal),
         db: Session = Depends(get_db)
 ):
     """
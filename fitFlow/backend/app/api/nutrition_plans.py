@@ -1,52 +1,27 @@
 from datetime import date, datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, or_, func, insert, select
 from typing import Optional, List
-from fitFlow.backend.app.database.session import get_db
+from fitFlow.backend.app.database.session import get_db, get_async_db, commit_with_retry
 from fitFlow.backend.app.models.food import Food
 from fitFlow.backend.app.models.food_log import FoodLog
 from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
 from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal
 from fitFlow.backend.app.models.client import Client
 from fitFlow.backend.app.schemas.nutrition_plan import NutritionPlanCreate, NutritionPlanOut
-from fitFlow.backend.app.api.auth import get_current_user, User
+from fitFlow.backend.app.api.auth import get_current_principal, get_current_principal_async, Principal
+from fitFlow.backend.app.api.food_logs import get_consumed_amounts
+from fitFlow.backend.app.services import nutrition_rollup
 
 router = APIRouter(prefix="/nutrition-plans", tags=["NutritionPlans"])
 
 
-def get_user_role(user_id: int, db: Session):
-    """Determinar el rol del usuario"""
-    from fitFlow.backend.app.models.client import Client
-    try:
-        from fitFlow.backend.app.models.nutritionist import Nutritionist
-        from fitFlow.backend.app.models.admin import Admin
-    except ImportError:
-        # Si no existen estos modelos, solo verificar Client
-        pass
-
-    client = db.query(Client).filter(Client.client_id == user_id).first()
-    if client:
-        return "Cliente"
-
-    try:
-        nutritionist = db.query(Nutritionist).filter(Nutritionist.nutritionist_id == user_id).first()
-        if nutritionist:
-            return "Nutricionista"
-
-        admin = db.query(Admin).filter(Admin.admin_id == user_id).first()
-        if admin:
-            return "Admin"
-    except:
-        pass
-
-    return "Cliente"  # Default fallback
-
-
 @router.post("/")
 def create_plan(plan: NutritionPlanCreate,
                 db: Session = Depends(get_db),
-                current_user: User = Depends(get_current_user)):
+                current_user: Principal = Depends(get_current_principal)):
     """Crear un plan nutricional con validación de fecha única"""
 
     try:
@@ -74,28 +49,32 @@ def create_plan(plan: NutritionPlanCreate,
         }
 
         # Intentar agregar plan_date si existe la columna
-        try:
-            plan_data["plan_date"] = plan.plan_date
-            new_plan = NutritionPlan(**plan_data)
-        except TypeError:
-            # Si falla, la columna no existe, crear sin plan_date
-            del plan_data["plan_date"]
-            new_plan = NutritionPlan(**plan_data)
-
-        db.add(new_plan)
-        db.flush()  # Para obtener el ID
-
-        # Agregar las comidas
-        for meal in plan.meals:
-            new_meal = NutritionPlanMeal(
-                plan_id=new_plan.plan_id,
-                food_id=meal.food_id,
-                meal_type=meal.meal_type,
-                portion_size=meal.portion_size
-            )
-            db.add(new_meal)
+        plan_data["plan_date"] = plan.plan_date
+
+        def insert_plan():
+            try:
+                new_plan = NutritionPlan(**plan_data)
+            except TypeError:
+                # Si falla, la columna no existe, crear sin plan_date
+                new_plan = NutritionPlan(**{k: v for k, v in plan_data.items() if k != "plan_date"})
+
+            db.add(new_plan)
+            db.flush()  # Para obtener el ID
+
+            # Agregar las comidas con un único INSERT de varias filas
+            if plan.meals:
+                db.execute(insert(NutritionPlanMeal), [
+                    {
+                        "plan_id": new_plan.plan_id,
+                        "food_id": meal.food_id,
+                        "meal_type": meal.meal_type,
+                        "portion_size": meal.portion_size
+                    }
+                    for meal in plan.meals
+                ])
+            return new_plan
 
-        db.commit()
+        new_plan = commit_with_retry(db, insert_plan)
         db.refresh(new_plan)
 
         return {
@@ -114,9 +93,9 @@ def create_plan(plan: NutritionPlanCreate,
 
 
 @router.get("/my-plans")
-def get_my_plans(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db),
+async def get_my_plans(
+        current_user: Principal = Depends(get_current_principal_async),
+        db: AsyncSession = Depends(get_async_db),
         specific_date: Optional[date] = Query(None, description="Fecha específica (YYYY-MM-DD)"),
         start_date: Optional[date] = Query(None, description="Fecha de inicio del rango"),
         end_date: Optional[date] = Query(None, description="Fecha de fin del rango"),
@@ -130,16 +109,16 @@ def get_my_plans(
     """
 
     try:
-        query = db.query(NutritionPlan).options(
-            joinedload(NutritionPlan.meals).joinedload(NutritionPlanMeal.food)
-        ).filter(NutritionPlan.user_id == current_user.user_id)
+        query = select(NutritionPlan).options(
+            selectinload(NutritionPlan.meals).selectinload(NutritionPlanMeal.food)
+        ).where(NutritionPlan.user_id == current_user.user_id)
 
         # Aplicar filtros de fecha solo si la columna plan_date existe y no es NULL
         if specific_date:
-            query = query.filter(NutritionPlan.plan_date == specific_date)
+            query = query.where(NutritionPlan.plan_date == specific_date)
 
         elif start_date and end_date:
-            query = query.filter(
+            query = query.where(
                 and_(
                     NutritionPlan.plan_date >= start_date,
                     NutritionPlan.plan_date <= end_date
@@ -153,7 +132,7 @@ def get_my_plans(
             target_week_start = week_start + timedelta(weeks=week_offset)
             target_week_end = target_week_start + timedelta(days=6)
 
-            query = query.filter(
+            query = query.where(
                 and_(
                     NutritionPlan.plan_date >= target_week_start,
                     NutritionPlan.plan_date <= target_week_end
@@ -169,7 +148,7 @@ def get_my_plans(
                 else:
                     month_end = date(year, month + 1, 1) - timedelta(days=1)
 
-                query = query.filter(
+                query = query.where(
                     and_(
                         NutritionPlan.plan_date >= month_start,
                         NutritionPlan.plan_date <= month_end
@@ -178,7 +157,8 @@ def get_my_plans(
             except ValueError:
                 raise HTTPException(400, "Formato de month_year inválido. Use YYYY-MM")
 
-        plans = query.order_by(NutritionPlan.created_at.desc()).all()
+        rows = await db.execute(query.order_by(NutritionPlan.created_at.desc()))
+        plans = rows.scalars().all()
 
         # Formatear la respuesta manejando plan_date NULL
         result = []
@@ -218,7 +198,7 @@ def get_my_plans(
 
 @router.get("/by-date/{target_date}")
 def get_plan_by_date(target_date: date,
-                     current_user: User = Depends(get_current_user),
+                     current_user: Principal = Depends(get_current_principal),
                      db: Session = Depends(get_db)):
     """Obtener el plan específico de una fecha"""
 
@@ -259,9 +239,9 @@ def get_plan_by_date(target_date: date,
 
 
 @router.get("/week-overview")
-def get_week_overview(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db),
+async def get_week_overview(
+        current_user: Principal = Depends(get_current_principal_async),
+        db: AsyncSession = Depends(get_async_db),
         week_offset: int = Query(0, description="Semanas desde hoy (0=esta semana)")
 ):
     """Obtener vista semanal de planes (7 días)"""
@@ -270,25 +250,29 @@ def get_week_overview(
     days_since_monday = today.weekday()
     week_start = today - timedelta(days=days_since_monday)
     target_week_start = week_start + timedelta(weeks=week_offset)
+    target_week_end = target_week_start + timedelta(days=6)
+
+    # Una sola consulta para toda la semana en lugar de una por día
+    result = await db.execute(
+        select(NutritionPlan).options(
+            selectinload(NutritionPlan.meals).selectinload(NutritionPlanMeal.food)
+        ).where(
+            and_(
+                NutritionPlan.user_id == current_user.user_id,
+                NutritionPlan.plan_date >= target_week_start,
+                NutritionPlan.plan_date <= target_week_end
+            )
+        ).order_by(NutritionPlan.plan_id)
+    )
+    plans_by_date = {}
+    for plan in result.scalars().all():
+        plans_by_date.setdefault(plan.plan_date, plan)
 
     # Generar los 7 días de la semana
     week_days = []
     for i in range(7):
         day_date = target_week_start + timedelta(days=i)
-
-        # Buscar plan para este día - manejar plan_date NULL
-        plan_query = db.query(NutritionPlan).options(
-            joinedload(NutritionPlan.meals).joinedload(NutritionPlanMeal.food)
-        ).filter(NutritionPlan.user_id == current_user.user_id)
-
-        # Intentar buscar por plan_date, si falla buscar por created_at
-        try:
-            plan = plan_query.filter(NutritionPlan.plan_date == day_date).first()
-        except:
-            # Si plan_date no existe o falla, buscar por fecha de creación
-            plan = plan_query.filter(
-                func.date(NutritionPlan.created_at) == day_date
-            ).first()
+        plan = plans_by_date.get(day_date)
 
         day_info = {
             "date": day_date,
@@ -318,14 +302,14 @@ def get_week_overview(
 
     return {
         "week_start": target_week_start,
-        "week_end": target_week_start + timedelta(days=6),
+        "week_end": target_week_end,
         "week_offset": week_offset,
         "days": week_days
     }
 
 
 @router.delete("/{plan_id}")
-def delete_plan(plan_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_plan(plan_id: int, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     """Eliminar un plan nutricional"""
 
     plan = db.query(NutritionPlan).filter(NutritionPlan.plan_id == plan_id).first()
@@ -363,8 +347,7 @@ def delete_plan(plan_id: int, current_user: User = Depends(get_current_user), db
 
         plan_name = plan.name
         plan_date_display = plan_date or plan.created_at.date()
-        db.delete(plan)
-        db.commit()
+        commit_with_retry(db, lambda: db.delete(plan))
 
         return {
             "message": f"Plan '{plan_name}' del {plan_date_display} eliminado correctamente"
@@ -379,7 +362,7 @@ def delete_plan(plan_id: int, current_user: User = Depends(get_current_user), db
 
 
 @router.delete("/{plan_id}/force")
-def force_delete_plan(plan_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def force_delete_plan(plan_id: int, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     """Eliminar un plan forzadamente con todos sus registros"""
 
     plan = db.query(NutritionPlan).filter(NutritionPlan.plan_id == plan_id).first()
@@ -408,13 +391,18 @@ def force_delete_plan(plan_id: int, current_user: User = Depends(get_current_use
             ).all()
 
         deleted_logs = len(food_logs)
-        for log in food_logs:
-            db.delete(log)
-
         plan_name = plan.name
         plan_date_display = plan_date or plan.created_at.date()
-        db.delete(plan)
-        db.commit()
+
+        def delete_plan_and_logs():
+            for log in food_logs:
+                db.delete(log)
+            # Los totales diarios de los días afectados se eliminan junto con sus registros
+            for log_date in {log.date for log in food_logs}:
+                nutrition_rollup.remove_day(db, plan.user_id, log_date)
+            db.delete(plan)
+
+        commit_with_retry(db, delete_plan_and_logs)
 
         return {
             "message": f"Plan '{plan_name}' del {plan_date_display} eliminado forzadamente",
@@ -428,7 +416,7 @@ def force_delete_plan(plan_id: int, current_user: User = Depends(get_current_use
 
 
 @router.get("/status/{target_date}")
-def check_plan_compliance_by_date(target_date: date, current_user: User = Depends(get_current_user),
+def check_plan_compliance_by_date(target_date: date, current_user: Principal = Depends(get_current_principal),
                                   db: Session = Depends(get_db)):
     """Verificar cumplimiento del plan por fecha - CORREGIDO"""
 
@@ -465,18 +453,13 @@ def check_plan_compliance_by_date(target_date: date, current_user: User = Depend
     fulfilled_count = 0
     total_compliance = 0  # Para calcular adherencia correcta
 
+    # Lo consumido de todas las comidas del plan en una sola consulta agrupada
+    consumed = get_consumed_amounts(db, current_user.user_id, [target_date])
+
     for meal in plan.meals:
         print(f"DEBUG: Procesando comida - {meal.meal_type}: {meal.food.name}")
 
-        # 🔧 CORRECCIÓN PRINCIPAL: Usar SUM en lugar de .first()
-        consumed_portion = db.query(func.sum(FoodLog.portion_size)).filter(
-            and_(
-                FoodLog.user_id == current_user.user_id,
-                FoodLog.food_id == meal.food_id,
-                FoodLog.meal_type == meal.meal_type,
-                FoodLog.date == target_date
-            )
-        ).scalar() or 0.0
+        consumed_portion = consumed.get((target_date, meal.food_id, meal.meal_type), 0.0)
 
         planned_portion = meal.portion_size
         compliance_percentage = (consumed_portion / planned_portion * 100) if planned_portion > 0 else 0
@@ -525,7 +508,7 @@ def check_plan_compliance_by_date(target_date: date, current_user: User = Depend
 
 
 @router.get("/{plan_id}/status")
-def check_plan_compliance(plan_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def check_plan_compliance(plan_id: int, current_user: Principal = Depends(get_current_principal), db: Session = Depends(get_db)):
     """Verificar cumplimiento del plan por ID - CORREGIDO"""
 
     plan = db.query(NutritionPlan).options(
@@ -550,16 +533,11 @@ def check_plan_compliance(plan_id: int, current_user: User = Depends(get_current
     fulfilled_count = 0
     total_compliance = 0
 
+    # Lo consumido de todas las comidas del plan en una sola consulta agrupada
+    consumed = get_consumed_amounts(db, current_user.user_id, [target_date])
+
     for meal in plan.meals:
-        # 🔧 CORRECCIÓN: Usar SUM en lugar de .first()
-        consumed_portion = db.query(func.sum(FoodLog.portion_size)).filter(
-            and_(
-                FoodLog.user_id == current_user.user_id,
-                FoodLog.food_id == meal.food_id,
-                FoodLog.meal_type == meal.meal_type,
-                FoodLog.date == target_date
-            )
-        ).scalar() or 0.0
+        consumed_portion = consumed.get((target_date, meal.food_id, meal.meal_type), 0.0)
 
         planned_portion = meal.portion_size
         compliance_percentage = (consumed_portion / planned_portion * 100) if planned_portion > 0 else 0
@@ -603,7 +581,7 @@ def check_plan_compliance(plan_id: int, current_user: User = Depends(get_current
 @router.get("/check-date/{target_date}")
 def check_date_availability(target_date: date,
                             user_id: int = Query(..., description="ID del usuario"),
-                            current_user: User = Depends(get_current_user),
+                            current_user: Principal = Depends(get_current_principal),
                             db: Session = Depends(get_db)):
     """Verificar si una fecha está disponible para crear un plan"""
 
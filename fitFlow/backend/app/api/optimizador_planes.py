@@ -1,22 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException
+import multiprocessing
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-import random
-from typing import List, Dict
-from pydantic import BaseModel
-from datetime import date
-from fitFlow.backend.app.database.session import get_db
-from fitFlow.backend.app.models.food import Food
+from sqlalchemy import and_, select
+from typing import List, Dict, Optional
+from pydantic import BaseModel, Field
+from datetime import date, timedelta
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.database.session import get_db, commit_with_retry
 from fitFlow.backend.app.models.client import Client
 from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
-from fitFlow.backend.app.api.auth import get_current_user, User
+from fitFlow.backend.app.api.auth import get_current_principal, Principal
+from fitFlow.backend.app.api.jobs import enqueue
+from fitFlow.backend.app.services.food_categories import category_sets
+from fitFlow.backend.app.services.nutrient_matrix import nutrient_matrix
+from fitFlow.backend.app.services.jobs import JobContext
+from fitFlow.backend.app.services.plan_batch import PlanBatch, insert_plans, next_monday
+from fitFlow.backend.app.services.plan_cache import plan_cache, plan_key
+from fitFlow.backend.app.services.plan_optimizer import PlanSolution, PlanTargets, solve, solve_days
 
 router = APIRouter(prefix="/nutrition-optimizer", tags=["NutritionOptimizer"])
 
+BACKGROUND = Query(False, description="Encolar como trabajo: responde 202 y el resultado queda en GET /jobs/{job_id}")
+
 
 class OptimizeRequest(BaseModel):
     user_id: int
     plan_date: date
+    seed: Optional[int] = Field(None, ge=0)  # otra semilla, otra variante ("regenerar"); la misma, el mismo plan
+
+
+class RangeRequest(BaseModel):
+    user_id: int
+    start_date: date
+    end_date: date
+    persist: bool = False  # guardar los planes (una transacción) además de devolverlos
+    skip_existing: bool = False  # omitir las fechas que ya tienen plan en lugar de rechazar la petición
+    nutritionist_id: Optional[int] = None  # por defecto, el nutricionista autenticado
+    variety_days: Optional[int] = None  # por defecto PLAN_VARIETY_DAYS
+    seed: Optional[int] = Field(None, ge=0)
+
+
+class CaseloadRequest(BaseModel):
+    start_date: Optional[date] = None  # por defecto, el próximo lunes
+    days: int = 7
+    client_ids: Optional[List[int]] = None  # por defecto, los clientes con algún plan del nutricionista
+    nutritionist_id: Optional[int] = None  # solo administradores; por defecto, el nutricionista autenticado
+    variety_days: Optional[int] = None
 
 
 class GeneratedMeal(BaseModel):
@@ -28,11 +57,17 @@ class GeneratedMeal(BaseModel):
 @router.post("/generate")
 def generate_simple_plan(
         request: OptimizeRequest,
-        current_user: User = Depends(get_current_user),
+        background: bool = BACKGROUND,
+        current_user: Principal = Depends(get_current_principal),
         db: Session = Depends(get_db)
 ):
-    """Genera un plan nutricional usando un algoritmo simple y directo"""
+    """Genera un plan nutricional con el optimizador determinista (services/plan_optimizer.py)"""
+    if background:
+        return enqueue("generate", lambda job_db, ctx: _generate(job_db, request), request, current_user)
+    return _generate(db, request)
+
 
+def _generate(db: Session, request: OptimizeRequest) -> Dict:
     # 1. Verificar cliente
     client = db.query(Client).filter(Client.client_id == request.user_id).first()
     if not client:
@@ -45,127 +80,48 @@ def generate_simple_plan(
             NutritionPlan.plan_date == request.plan_date
         )
     ).first()
-
     if existing_plan:
         raise HTTPException(400, f"Ya existe un plan para la fecha {request.plan_date}")
 
-    # 3. Obtener alimentos y objetivos
-    foods = db.query(Food).all()
-    if not foods:
-        raise HTTPException(404, "No hay alimentos disponibles")
+    # 3. Objetivos: calorías (RCDE) y gramos de macronutrientes
+    targets = PlanTargets.for_client(client)
+
+    # 4. Elegir alimentos y porciones sobre la matriz de nutrientes y las categorías precalculadas,
+    #    salvo que el mismo perfil ya tenga el plan de esa fecha y semilla con este catálogo
+    matrix = nutrient_matrix.get(db)
+    key = plan_key(client, matrix.version, "daily", request.plan_date, request.seed)
+    solution = plan_cache.get(key)
+    cached = solution is not None
+    if not cached:
+        solution = solve(matrix, category_sets.get(db), targets, seed=request.seed)
+        if solution is None:
+            raise HTTPException(404, "No hay alimentos disponibles")
+        # Una búsqueda cortada por tiempo depende de la carga del momento: no se memoriza
+        if not solution.truncated:
+            plan_cache.put(key, solution)
+    payload = _plan_payload(request.plan_date, targets, solution)
+    payload["statistics"].update(seed=request.seed, cached=cached)
+    if cached:
+        payload["statistics"]["solver_ms"] = 0  # no se resolvió nada en esta petición
+    return {"success": True, **payload}
 
-    target_calories = client.calculate_RCDE()
-
-    # 4. ALGORITMO SIMPLE: Clasificar alimentos por heurísticas
-    proteins = [f for f in foods if any(
-        word in f.name.lower() for word in ['pollo', 'huevo', 'atún', 'salmón', 'queso']) or f.protein_per_portion > 15]
-    carbs = [f for f in foods if any(
-        word in f.name.lower() for word in ['arroz', 'avena', 'pan', 'pasta', 'quinoa']) or f.carbs_per_portion > 15]
-    fruits = [f for f in foods if any(word in f.name.lower() for word in ['manzana', 'plátano', 'naranja', 'fresa'])]
-    vegetables = [f for f in foods if
-                  any(word in f.name.lower() for word in ['brócoli', 'espinaca', 'zanahoria', 'lechuga'])]
-    dairy = [f for f in foods if any(word in f.name.lower() for word in ['yogur', 'leche'])]
-
-    # 5. Usar semilla diferente cada vez para variación
-    import time
-    random.seed(int(time.time() * 1000) % 10000)
-
-    # 6. GENERAR PLAN SIMPLE: Una estrategia directa por comida
-    generated_meals = []
-
-    # DESAYUNO (25% de calorías): Lácteo + Fruta + Carbohidrato
-    breakfast_calories = target_calories * 0.25
-    if dairy:
-        dairy_food = random.choice(dairy)
-        dairy_portion = min(2.0, breakfast_calories * 0.4 / dairy_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=dairy_food.food_id, meal_type="Desayuno", portion_size=round(dairy_portion, 1)))
-
-    if fruits:
-        fruit_food = random.choice(fruits)
-        fruit_portion = min(2.0, breakfast_calories * 0.3 / fruit_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=fruit_food.food_id, meal_type="Desayuno", portion_size=round(fruit_portion, 1)))
-
-    if carbs:
-        carb_food = random.choice([f for f in carbs if 'avena' in f.name.lower() or 'pan' in f.name.lower()])
-        if not carb_food:
-            carb_food = random.choice(carbs)
-        carb_portion = min(1.5, breakfast_calories * 0.3 / carb_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=carb_food.food_id, meal_type="Desayuno", portion_size=round(carb_portion, 1)))
-
-    # ALMUERZO (35% de calorías): Proteína + Carbohidrato + Verdura
-    lunch_calories = target_calories * 0.35
-    if proteins:
-        protein_food = random.choice(proteins)
-        protein_portion = min(2.0, lunch_calories * 0.5 / protein_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=protein_food.food_id, meal_type="Almuerzo", portion_size=round(protein_portion, 1)))
-
-    if carbs:
-        carb_food = random.choice([f for f in carbs if 'arroz' in f.name.lower() or 'pasta' in f.name.lower()])
-        if not carb_food:
-            carb_food = random.choice(carbs)
-        carb_portion = min(2.0, lunch_calories * 0.35 / carb_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=carb_food.food_id, meal_type="Almuerzo", portion_size=round(carb_portion, 1)))
-
-    if vegetables:
-        veg_food = random.choice(vegetables)
-        veg_portion = min(3.0, lunch_calories * 0.15 / max(veg_food.calories_per_portion, 10))
-        generated_meals.append(
-            GeneratedMeal(food_id=veg_food.food_id, meal_type="Almuerzo", portion_size=round(veg_portion, 1)))
-
-    # CENA (30% de calorías): Proteína + Verdura
-    dinner_calories = target_calories * 0.30
-    if proteins:
-        protein_food = random.choice(
-            [f for f in proteins if f.food_id != generated_meals[3].food_id])  # Diferente del almuerzo
-        if not protein_food:
-            protein_food = random.choice(proteins)
-        protein_portion = min(2.0, dinner_calories * 0.7 / protein_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=protein_food.food_id, meal_type="Cena", portion_size=round(protein_portion, 1)))
-
-    if vegetables:
-        veg_food = random.choice(
-            [f for f in vegetables if f.food_id != generated_meals[5].food_id])  # Diferente del almuerzo
-        if not veg_food:
-            veg_food = random.choice(vegetables)
-        veg_portion = min(3.0, dinner_calories * 0.3 / max(veg_food.calories_per_portion, 10))
-        generated_meals.append(
-            GeneratedMeal(food_id=veg_food.food_id, meal_type="Cena", portion_size=round(veg_portion, 1)))
-
-    # SNACK (10% de calorías): Fruta o Fruto Seco
-    snack_calories = target_calories * 0.10
-    snack_options = fruits + [f for f in foods if 'almendra' in f.name.lower()]
-    if snack_options:
-        snack_food = random.choice(snack_options)
-        snack_portion = min(1.5, snack_calories / snack_food.calories_per_portion)
-        generated_meals.append(
-            GeneratedMeal(food_id=snack_food.food_id, meal_type="Snack", portion_size=round(snack_portion, 1)))
-
-    # 7. Calcular estadísticas del plan generado
-    total_calories = 0
-    total_protein = 0
-    total_carbs = 0
-    total_fat = 0
-
-    for meal in generated_meals:
-        food = db.query(Food).filter(Food.food_id == meal.food_id).first()
-        calories = food.calories_per_portion * meal.portion_size
-        total_calories += calories
-        total_protein += food.protein_per_portion * meal.portion_size
-        total_carbs += food.carbs_per_portion * meal.portion_size
-        total_fat += food.fat_per_portion * meal.portion_size
+
+def _plan_payload(plan_date: date, targets: PlanTargets, solution: PlanSolution) -> Dict:
+    """plan_data (listo para POST /nutrition-plans/) y estadísticas de un plan generado"""
+    target_calories = targets.calories
+    generated_meals = [GeneratedMeal(food_id=food_id, meal_type=meal_type, portion_size=portion)
+                       for food_id, meal_type, portion in solution.meals]
+
+    total_calories = solution.totals["calories"]
+    total_protein = solution.totals["protein"]
+    total_carbs = solution.totals["carbs"]
+    total_fat = solution.totals["fat"]
 
     accuracy = round((total_calories / target_calories) * 100, 1)
 
     return {
-        "success": True,
         "plan_data": {
-            "name": f"Plan Nutricional Automático - {request.plan_date}",
+            "name": f"Plan Nutricional Automático - {plan_date}",
             "description": f"Plan generado automáticamente. Objetivo: {target_calories} kcal, Generado: {round(total_calories)} kcal, Precisión: {accuracy}%",
             "meals": [
                 {
@@ -183,6 +139,135 @@ def generate_simple_plan(
             "protein": round(total_protein, 1),
             "carbs": round(total_carbs, 1),
             "fat": round(total_fat, 1),
-            "meal_count": len(generated_meals)
+            "meal_count": len(generated_meals),
+            "target_protein": round(targets.protein, 1),
+            "target_carbs": round(targets.carbs, 1),
+            "target_fat": round(targets.fat, 1),
+            "errors_percentage": {nutrient: round(error * 100, 1) for nutrient, error in solution.errors.items()},
+            "within_tolerance": solution.feasible,
+            "solver_ms": solution.elapsed_ms,
+            "truncated": solution.truncated
+        }
+    }
+
+
+@router.post("/generate-range")
+def generate_plan_range(
+        request: RangeRequest,
+        background: bool = BACKGROUND,
+        current_user: Principal = Depends(get_current_principal),
+        db: Session = Depends(get_db)
+):
+    """Genera los planes de un rango de fechas variando los alimentos entre días y, con persist,
+    los guarda todos en una transacción (dos INSERT de varias filas)"""
+    days = (request.end_date - request.start_date).days + 1
+    if days < 1:
+        raise HTTPException(400, "La fecha final debe ser igual o posterior a la inicial")
+    if days > config.PLAN_RANGE_MAX_DAYS:
+        raise HTTPException(400, f"El rango no puede superar {config.PLAN_RANGE_MAX_DAYS} días")
+    if background:
+        return enqueue("generate-range", lambda job_db, ctx: _generate_range(job_db, request, current_user, ctx),
+                       request, current_user)
+    return _generate_range(db, request, current_user)
+
+
+def _generate_range(db: Session, request: RangeRequest, current_user: Principal,
+                    ctx: Optional[JobContext] = None) -> Dict:
+    days = (request.end_date - request.start_date).days + 1
+    client = db.query(Client).filter(Client.client_id == request.user_id).first()
+    if not client:
+        raise HTTPException(404, "Cliente no encontrado")
+
+    nutritionist_id = None
+    if request.persist:
+        nutritionist_id = request.nutritionist_id
+        if nutritionist_id is None and current_user.role == "Nutricionista":
+            nutritionist_id = current_user.user_id
+        if nutritionist_id is None:
+            raise HTTPException(400, "Indique nutritionist_id para guardar los planes")
+
+    # Fechas que ya tienen plan: una sola consulta para todo el rango
+    taken = set(db.execute(
+        select(NutritionPlan.plan_date).where(
+            NutritionPlan.user_id == request.user_id,
+            NutritionPlan.plan_date >= request.start_date,
+            NutritionPlan.plan_date <= request.end_date
+        )
+    ).scalars())
+    if taken and not request.skip_existing:
+        raise HTTPException(
+            400, f"Ya existen planes para las fechas {', '.join(str(day) for day in sorted(taken))}")
+    plan_dates = [request.start_date + timedelta(days=offset) for offset in range(days)
+                  if request.start_date + timedelta(days=offset) not in taken]
+
+    targets = PlanTargets.for_client(client)
+    progress = ctx and (lambda done, total: ctx.progress(done / total, f"{done}/{total} días resueltos"))
+    solutions = solve_days(nutrient_matrix.get(db), category_sets.get(db), targets, len(plan_dates),
+                           variety_days=request.variety_days, progress=progress, seed=request.seed)
+    if plan_dates and not solutions:
+        raise HTTPException(404, "No hay alimentos disponibles")
+    plans = [{"plan_date": plan_date, **_plan_payload(plan_date, targets, solution)}
+             for plan_date, solution in zip(plan_dates, solutions)]
+
+    if request.persist and plans:
+        if ctx:
+            ctx.check()  # cancelado mientras se resolvía: no guardar nada
+        rows = [{"user_id": request.user_id, "nutritionist_id": nutritionist_id, "plan_date": plan["plan_date"],
+                 "name": plan["plan_data"]["name"], "description": plan["plan_data"]["description"],
+                 "meals": plan["plan_data"]["meals"]} for plan in plans]
+        try:
+            plan_ids = commit_with_retry(db, lambda: insert_plans(db, rows))
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(500, f"Error al guardar los planes: {str(e)}")
+        for plan in plans:
+            plan["plan_id"] = plan_ids[(request.user_id, plan["plan_date"])]
+
+    return {
+        "success": True,
+        "persisted": bool(request.persist and plans),
+        "plans": plans,
+        "skipped_dates": sorted(taken),
+        "summary": {
+            "days": len(plans),
+            "within_tolerance": sum(plan["statistics"]["within_tolerance"] for plan in plans),
+            "distinct_foods": len({meal["food_id"] for plan in plans for meal in plan["plan_data"]["meals"]}),
+            "solver_ms": round(sum(solution.elapsed_ms for solution in solutions), 1),
+            "truncated": sum(solution.truncated for solution in solutions)
         }
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/generate-caseload", status_code=202)
+def generate_caseload_plans(
+        request: CaseloadRequest,
+        current_user: Principal = Depends(get_current_principal)
+):
+    """Genera y guarda los planes de toda la cartera de un nutricionista (services/plan_batch.py).
+    Siempre como trabajo en segundo plano; al cancelarlo se conservan los grupos de clientes ya guardados."""
+    if current_user.role == "Nutricionista":
+        if request.nutritionist_id not in (None, current_user.user_id):
+            raise HTTPException(403, "Solo puedes generar los planes de tu propia cartera")
+        nutritionist_id = current_user.user_id
+    elif current_user.role == "Administrador":
+        nutritionist_id = request.nutritionist_id
+        if nutritionist_id is None:
+            raise HTTPException(400, "Indique nutritionist_id")
+    else:
+        raise HTTPException(403, "Solo nutricionistas y administradores pueden generar planes por cartera")
+    if not 1 <= request.days <= config.PLAN_RANGE_MAX_DAYS:
+        raise HTTPException(400, f"days debe estar entre 1 y {config.PLAN_RANGE_MAX_DAYS}")
+
+    def work(db: Session, ctx: JobContext) -> Dict:
+        # spawn: los procesos del lote no heredan los hilos (y sus locks) del servidor
+        batch = PlanBatch(nutritionist_id, request.start_date or next_monday(), request.days,
+                          variety_days=request.variety_days, mp_context=multiprocessing.get_context("spawn"))
+        client_ids = batch.caseload(request.client_ids)
+        batch.progress = lambda state: ctx.progress(
+            len(state.results) / max(len(client_ids), 1),
+            f"{len(state.results)}/{len(client_ids)} clientes, {state.plans_created} planes guardados")
+        ctx.check()
+        return batch.run(client_ids)
+
+    return enqueue("generate-caseload", work, {**request.model_dump(), "nutritionist_id": nutritionist_id},
+                   current_user)
@@ -1,6 +1,12 @@
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
 from datetime import datetime
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from fitFlow.backend.app.database.session import get_db
 from fitFlow.backend.app.models.user import User
@@ -10,7 +16,11 @@ from fitFlow.backend.app.models.admin import Admin
 from fitFlow.backend.app.schemas.client import ClientCreate, ClientOut
 from fitFlow.backend.app.schemas.nutritionist import NutritionistCreate
 from fitFlow.backend.app.schemas.admin import AdminCreate
-from fitFlow.backend.app.core.security import get_password_hash
+from fitFlow.backend.app.core.password_hashing import hash_password_sync
+from fitFlow.backend.app.api.auth import get_current_principal, Principal
+from fitFlow.backend.app.api.jobs import enqueue
+from fitFlow.backend.app.services.jobs import JobContext
+from fitFlow.backend.app.services import client_import
 
 router = APIRouter(prefix="/register", tags=["Registration"])
 
@@ -29,7 +39,7 @@ def register_client(client_data: ClientCreate, db: Session = Depends(get_db)):
         last_name=client_data.last_name,
         cedula=client_data.cedula,
         email=client_data.email,
-        password=get_password_hash(client_data.password),
+        password=hash_password_sync(client_data.password),
         birth_date=client_data.birth_date,
         sex=client_data.sex
     )
@@ -75,7 +85,7 @@ def register_nutritionist(data: NutritionistCreate, db: Session = Depends(get_db
         last_name=data.last_name,
         cedula=data.cedula,
         email=data.email,
-        password=get_password_hash(data.password),
+        password=hash_password_sync(data.password),
         birth_date=data.birth_date,
         sex=data.sex,
     )
@@ -100,7 +110,7 @@ def register_admin(data: AdminCreate, db: Session = Depends(get_db)):
         last_name=data.last_name,
         cedula=data.cedula,
         email=data.email,
-        password=get_password_hash(data.password),
+        password=hash_password_sync(data.password),
         birth_date=data.birth_date,
         sex=data.sex,
     )
@@ -116,3 +126,42 @@ def register_admin(data: AdminCreate, db: Session = Depends(get_db)):
     db.add(admin)
     db.commit()
     return {"message": "Admin registered"}
+
+
+@router.post("/clients/bulk", status_code=202)
+def register_clients_bulk(file: UploadFile = File(..., description="CSV con cabecera o NDJSON con los campos de ClientCreate"),
+                          format: Optional[str] = Query(None, description="csv o ndjson; por defecto según la extensión"),
+                          current_user: Principal = Depends(get_current_principal)):
+    """Alta masiva de clientes (solo administradores). Siempre como trabajo en segundo plano:
+    el reporte con las filas rechazadas queda como resultado en GET /jobs/{job_id}."""
+    if current_user.role != "Administrador":
+        raise HTTPException(403, "Solo un administrador puede importar clientes")
+    fmt = format or client_import.detect_format(file.filename)
+    if fmt not in client_import.FORMATS:
+        raise HTTPException(400, f"Formato no soportado: {fmt}")
+
+    # La subida se cierra al responder: el trabajo lee una copia en disco y la borra al terminar
+    with tempfile.NamedTemporaryFile(prefix="fitflow-import-", suffix=f".{fmt}", delete=False) as copy:
+        shutil.copyfileobj(file.file, copy)
+        path, size = copy.name, copy.tell()
+
+    def work(db: Session, ctx: JobContext) -> Dict:
+        try:
+            with open(path, "rb") as raw:
+                def progress(importer):
+                    ctx.progress(raw.tell() / max(size, 1),
+                                 f"{importer.total} filas leídas, {importer.created} clientes creados")
+
+                stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+                # spawn: los procesos de hash no heredan los hilos (y sus locks) del servidor
+                return client_import.import_file(stream, fmt, progress=progress,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        finally:
+            os.remove(path)
+
+    try:
+        return enqueue("import-clients", work, {"filename": file.filename, "format": fmt, "bytes": size},
+                       current_user)
+    except BaseException:
+        os.remove(path)
+        raise
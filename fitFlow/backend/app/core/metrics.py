@@ -0,0 +1,196 @@
+"""
+Métricas de la API en formato de texto de Prometheus (expuestas en /metrics).
+
+Contadores, gauges e histogramas en memoria por proceso, seguros entre hilos. El middleware
+etiqueta cada petición con la plantilla de la ruta (/nutrition-plans/{plan_id}/status) y no con
+la URL concreta, para que el número de series quede acotado.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Sequence, Tuple
+
+from fitFlow.backend.app.core.query_metrics import current_stats
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self):
+        """(sufijo, etiquetas, valor) de cada serie"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, {"counts": list(s["counts"]), "sum": s["sum"]}) for key, s in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["counts"]):
+                cumulative += count
+                yield "_bucket", _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), series["sum"]
+            yield "_count", _format_labels(self.labelnames, key), cumulative
+
+
+def render() -> str:
+    """Todas las métricas registradas en formato de exposición de Prometheus"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ===== MÉTRICAS HTTP =====
+REQUESTS = Counter("fitflow_http_requests_total", "Peticiones HTTP atendidas", ["method", "route", "status"])
+REQUEST_LATENCY = Histogram("fitflow_http_request_duration_seconds", "Latencia de las peticiones HTTP",
+                            ["method", "route"])
+REQUESTS_IN_FLIGHT = Gauge("fitflow_http_requests_in_flight", "Peticiones HTTP en curso", ["method"])
+REQUEST_DB_TIME = Histogram("fitflow_http_request_db_seconds", "Tiempo en base de datos por petición",
+                            ["method", "route"])
+REQUEST_DB_QUERIES = Histogram("fitflow_http_request_db_queries", "Consultas SQL por petición", ["method", "route"],
+                               buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+
+
+def route_template(scope) -> str:
+    """Plantilla de la ruta que atendió la petición; las no encontradas comparten una sola etiqueta"""
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI de latencia, peticiones en curso, códigos de estado y tiempo en base de datos.
+    Debe quedar dentro de QueryMetricsMiddleware para ver las consultas de la petición.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec(method=method)
+            route = route_template(scope)
+            REQUESTS.inc(method=method, route=route, status=status["code"])
+            REQUEST_LATENCY.observe(elapsed, method=method, route=route)
+            stats = current_stats()
+            if stats is not None:
+                REQUEST_DB_TIME.observe(stats.total_ms / 1000, method=method, route=route)
+                REQUEST_DB_QUERIES.observe(stats.count, method=method, route=route)
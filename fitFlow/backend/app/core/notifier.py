@@ -0,0 +1,69 @@
+"""
+Canales de invalidación entre réplicas para las cachés en memoria (catálogo de alimentos, principales).
+
+Cada aviso es un texto; quien publica incluye su propio id para ignorar el eco. InMemoryNotifier solo
+reparte los avisos dentro del proceso (tests, un único worker); RedisNotifier usa Redis pub/sub
+(pip install redis) y los entrega desde un hilo de fondo.
+"""
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, List
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Notifier(ABC):
+    """Canal de invalidación entre réplicas"""
+
+    @abstractmethod
+    def publish(self, message: str):
+        pass
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None]):
+        pass
+
+
+class InMemoryNotifier(Notifier):
+    """Reparte los avisos entre los suscriptores del mismo proceso (tests); no cruza réplicas"""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def publish(self, message):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+
+class RedisNotifier(Notifier):
+    """Avisos por Redis pub/sub; un hilo de fondo los recibe y los entrega a los suscriptores"""
+
+    def __init__(self, url: str, channel: str):
+        import redis  # dependencia opcional, solo con una URL de Redis configurada
+
+        self._client = redis.Redis.from_url(url)
+        self._errors = (redis.RedisError,)
+        self.channel = channel
+        self._subscribers: List[Callable[[str], None]] = []
+        self._thread = None
+
+    def _on_message(self, message):
+        data = message["data"].decode() if isinstance(message["data"], bytes) else str(message["data"])
+        for callback in list(self._subscribers):
+            callback(data)
+
+    def publish(self, message):
+        try:
+            self._client.publish(self.channel, message)
+        except self._errors as exc:
+            logger.warning("No se pudo publicar la invalidación en Redis (%s, canal %s)", exc, self.channel)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        if self._thread is None:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._on_message})
+            self._thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
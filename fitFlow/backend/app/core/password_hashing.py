@@ -0,0 +1,100 @@
+"""
+Pool dedicado y acotado para bcrypt.
+
+bcrypt libera el GIL, así que PASSWORD_HASH_WORKERS hilos equivalen a ese número de núcleos
+ocupados como máximo: una avalancha de logins se encola aquí en lugar de acaparar el threadpool
+y la CPU del resto de endpoints. Con más de PASSWORD_HASH_MAX_PENDING operaciones pendientes se
+rechaza con PasswordHashingBusy (el login responde 503 con Retry-After).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge, Histogram
+from fitFlow.backend.app.core.security import get_password_hash, verify_and_update_password
+
+HASH_QUEUE_DEPTH = Gauge("fitflow_password_hash_queue_depth", "Operaciones bcrypt esperando un hilo")
+HASH_IN_PROGRESS = Gauge("fitflow_password_hash_in_progress", "Operaciones bcrypt en curso")
+HASH_WAIT = Histogram("fitflow_password_hash_wait_seconds", "Espera en cola de las operaciones bcrypt", ["operation"])
+HASH_DURATION = Histogram("fitflow_password_hash_duration_seconds", "Duración de las operaciones bcrypt", ["operation"])
+HASH_REJECTED = Counter("fitflow_password_hash_rejected_total", "Operaciones bcrypt rechazadas por cola llena",
+                        ["operation"])
+HASH_REHASHED = Counter("fitflow_password_rehash_total", "Hashes actualizados al coste configurado en el login")
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+_executor = ThreadPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending_lock = threading.Lock()
+_pending = 0
+
+
+def _reserve(operation: str):
+    global _pending
+    with _pending_lock:
+        if _pending >= config.PASSWORD_HASH_MAX_PENDING:
+            HASH_REJECTED.inc(operation=operation)
+            raise PasswordHashingBusy(f"{_pending} operaciones bcrypt pendientes")
+        _pending += 1
+    HASH_QUEUE_DEPTH.inc()
+
+
+def _release():
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def is_saturated() -> bool:
+    """Cola llena: los llamadores pueden rechazar antes de hacer trabajo previo (consultas, etc.)"""
+    return _pending >= config.PASSWORD_HASH_MAX_PENDING
+
+
+def _instrumented(operation: str, fn, *args):
+    submitted = time.perf_counter()
+
+    def run():
+        started = time.perf_counter()
+        HASH_QUEUE_DEPTH.dec()
+        HASH_IN_PROGRESS.inc()
+        HASH_WAIT.observe(started - submitted, operation=operation)
+        try:
+            return fn(*args)
+        finally:
+            HASH_DURATION.observe(time.perf_counter() - started, operation=operation)
+            HASH_IN_PROGRESS.dec()
+            _release()
+
+    return run
+
+
+def _submit(operation: str, fn, *args):
+    _reserve(operation)
+    try:
+        return _executor.submit(_instrumented(operation, fn, *args))
+    except BaseException:
+        HASH_QUEUE_DEPTH.dec()
+        _release()
+        raise
+
+
+async def verify_and_update(password: str, hashed_password: str):
+    """(válida, nuevo_hash) sin bloquear el event loop"""
+    return await asyncio.wrap_future(_submit("verify", verify_and_update_password, password, hashed_password))
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.wrap_future(_submit("hash", get_password_hash, password))
+
+
+def hash_password_sync(password: str) -> str:
+    """Para endpoints síncronos y scripts: el hilo llamador espera, pero la CPU la limita el pool"""
+    return _submit("hash", get_password_hash, password).result()
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,153 @@
+"""
+Caché de principales autenticados: token JWT -> Principal (user_id, cedula, rol).
+
+Acotada por tamaño (LRU) y por tiempo: cada entrada vive PRINCIPAL_CACHE_TTL segundos como
+máximo y nunca más allá de la expiración del propio token. Aciertos, fallos y tamaño se exportan
+en /metrics.
+
+Los cambios y borrados de User invalidan sus entradas mediante eventos del mapper: en este proceso
+al momento y, tras el commit, en las demás réplicas por el canal de core/notifier.py configurado con
+PRINCIPAL_CACHE_REDIS_URL. Sin ese canal cada réplica solo se entera de sus propios cambios: en las
+demás, un usuario borrado o modificado sigue autenticándose desde la caché, sin consultar la base,
+hasta PRINCIPAL_CACHE_TTL segundos.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge
+from fitFlow.backend.app.core.notifier import InMemoryNotifier, Notifier, RedisNotifier
+from fitFlow.backend.app.models.user import User
+
+CACHE_REQUESTS = Counter("fitflow_principal_cache_requests_total", "Consultas a la caché de principales", ["result"])
+CACHE_SIZE = Gauge("fitflow_principal_cache_size", "Entradas en la caché de principales")
+CACHE_HIT_RATIO = Gauge("fitflow_principal_cache_hit_ratio", "Proporción de aciertos de la caché de principales")
+
+
+class Principal:
+    """Usuario autenticado sin cargar el modelo ORM: basta para los endpoints que solo usan user_id o el rol"""
+    __slots__ = ("user_id", "cedula", "role")
+
+    def __init__(self, user_id: int, cedula: str, role: str = None):
+        self.user_id = user_id
+        self.cedula = cedula
+        self.role = role
+
+    def __repr__(self):
+        return f"Principal(user_id={self.user_id}, cedula={self.cedula!r}, role={self.role!r})"
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # token -> (principal, expira)
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_REQUESTS.inc(result="hit" if hit else "miss")
+        CACHE_HIT_RATIO.set(round(self.hits / (self.hits + self.misses), 4))
+
+    def _discard(self, token: str):
+        principal, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.user_id]
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._discard(token)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(token)
+            self._record(entry is not None)
+            CACHE_SIZE.set(len(self._entries))
+            return entry[0] if entry is not None else None
+
+    def put(self, token: str, principal: Principal, token_expires_at: float = None):
+        """token_expires_at: campo exp del JWT (epoch); la entrada no sobrevive al token"""
+        expires = time.monotonic() + self.ttl
+        if token_expires_at is not None:
+            expires = min(expires, time.monotonic() + (token_expires_at - time.time()))
+        with self._lock:
+            if token in self._entries:
+                self._discard(token)
+            self._entries[token] = (principal, expires)
+            self._tokens_by_user.setdefault(principal.user_id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+            CACHE_SIZE.set(len(self._entries))
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+            CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            CACHE_SIZE.set(0)
+
+
+principal_cache = PrincipalCache(config.PRINCIPAL_CACHE_SIZE, config.PRINCIPAL_CACHE_TTL)
+
+_origin = uuid.uuid4().hex  # para ignorar los avisos propios
+_PENDING = "principal_cache_invalidations"  # clave en Session.info: user_id cambiados en la transacción
+_notifier: Notifier = None
+
+
+def _on_remote_invalidation(message: str):
+    origin, _, user_id = message.partition(":")
+    if origin != _origin and user_id.isdigit():
+        principal_cache.invalidate_user(int(user_id))
+
+
+def set_notifier(notifier: Notifier):
+    global _notifier
+    _notifier = notifier
+    notifier.subscribe(_on_remote_invalidation)
+
+
+set_notifier(RedisNotifier(config.PRINCIPAL_CACHE_REDIS_URL, "fitflow:principals")
+             if config.PRINCIPAL_CACHE_REDIS_URL else InMemoryNotifier())
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.user_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, set()).add(target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_invalidations(session):
+    # Después del commit: una réplica que recargue el principal ya lee los datos nuevos
+    for user_id in session.info.pop(_PENDING, ()):
+        principal_cache.invalidate_user(user_id)
+        _notifier.publish(f"{_origin}:{user_id}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,155 @@
+"""
+Contador de consultas SQL por petición y detector de N+1.
+
+Los eventos de SQLAlchemy se registran sobre la clase Engine, así que cubren el engine síncrono
+y el asíncrono. Cada petición HTTP acumula en un ContextVar el número de sentencias, el tiempo
+total en base de datos y las repeticiones de cada sentencia. El middleware lo publica en las
+cabeceras X-DB-Query-Count / X-DB-Time-ms y en el log "fitflow.queries".
+
+Con DB_QUERY_BUDGET_STRICT=true (modo test) una petición que supera su presupuesto de consultas
+o repite una sentencia N+1 falla con QueryBudgetExceeded en lugar de solo registrarse.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from fitFlow.backend.app.core import config
+
+logger = logging.getLogger("fitflow.queries")
+
+QUERY_COUNT_HEADER = b"x-db-query-count"
+QUERY_TIME_HEADER = b"x-db-time-ms"
+
+# Presupuesto de consultas por ruta ("MÉTODO plantilla"); el resto usa DB_QUERY_BUDGET
+QUERY_BUDGETS = {
+    "GET /auth/clients": 2,
+    "GET /auth/nutritionists": 2,
+    "GET /auth/admins": 2,
+    "GET /auth/users": 2,
+    "GET /auth/directory": 1,
+    "GET /auth/me": 1,
+    "GET /foods/": 2,  # versión del catálogo (cada FOOD_CATALOG_REVALIDATE_SECONDS) y, si cambió, los alimentos
+    "GET /foods/search": 1,
+    "POST /food-logs/": 8,
+    "GET /nutrition-plans/my-plans": 5,
+    "GET /nutrition-plans/week-overview": 5,
+    "GET /nutrition-plans/status/{target_date}": 3,
+    "GET /nutrition-plans/{plan_id}/status": 3,
+    "GET /dashboard/nutrition-metrics": 5,
+    "POST /nutrition-optimizer/generate-range": 8,  # incluye la lectura de catalog_version
+    "GET /jobs/": 2,
+    "GET /jobs/{job_id}": 4,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Consultas ejecutadas durante una petición"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int = None) -> Dict[str, int]:
+        """Sentencias idénticas ejecutadas threshold veces o más (candidatas a N+1)"""
+        threshold = threshold or config.DB_N_PLUS_ONE_THRESHOLD
+        return {sql: times for sql, times in self.statements.items() if times >= threshold}
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+# Inicio de la sentencia en curso: una conexión ejecuta una sentencia a la vez, basta un valor
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start")
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, (time.perf_counter() - start) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Una sentencia que falla no llega a after_cursor_execute: se descarta su inicio para que
+    # no quede en la conexión al volver al pool
+    if exception_context.connection is not None:
+        exception_context.connection.info.pop("query_start", None)
+
+
+def route_name(scope) -> str:
+    """Método y plantilla de la ruta (/nutrition-plans/{plan_id}/status) en lugar de la URL concreta"""
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+
+def check_budget(name: str, stats: QueryStats) -> list:
+    """Problemas de la petición: presupuesto excedido y sentencias repetidas"""
+    problems = []
+    budget = QUERY_BUDGETS.get(name, config.DB_QUERY_BUDGET)
+    if stats.count > budget:
+        problems.append(f"{stats.count} consultas (presupuesto {budget})")
+    for sql, times in stats.repeated().items():
+        problems.append(f"posible N+1, {times}x: {' '.join(sql.split())[:200]}")
+    return problems
+
+
+class QueryMetricsMiddleware:
+    """Middleware ASGI que mide las consultas de cada petición HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                name = route_name(scope)
+                problems = check_budget(name, stats)
+                logger.info(
+                    "%s status=%s db_queries=%s db_time_ms=%.1f", name, message["status"], stats.count, stats.total_ms,
+                    extra={"route": name, "status": message["status"], "db_queries": stats.count,
+                           "db_time_ms": round(stats.total_ms, 1)}
+                )
+                if problems:
+                    if config.DB_QUERY_BUDGET_STRICT:
+                        raise QueryBudgetExceeded(f"{name}: " + "; ".join(problems))
+                    logger.warning("%s: %s", name, "; ".join(problems),
+                                   extra={"route": name, "query_problems": problems})
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER, str(stats.count).encode()))
+                headers.append((QUERY_TIME_HEADER, f"{stats.total_ms:.1f}".encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_stats.reset(token)
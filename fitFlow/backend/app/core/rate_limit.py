@@ -0,0 +1,151 @@
+"""
+Limitador token bucket para /auth/login, por cédula y por IP de cliente.
+
+El backend por defecto vive en memoria del proceso (cada worker limita por su cuenta). Con
+RATE_LIMIT_REDIS_URL los buckets se comparten entre workers y pods mediante Redis (pip install redis);
+cualquier otro backend compartido puede registrarse con set_backend(). Las decisiones se exportan en /metrics.
+"""
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger("uvicorn.error")
+
+RATE_LIMIT_DECISIONS = Counter("fitflow_rate_limit_decisions_total", "Decisiones del limitador de peticiones",
+                               ["limiter", "result"])
+RATE_LIMIT_KEYS = Gauge("fitflow_rate_limit_tracked_keys", "Claves con bucket en el backend en memoria")
+
+
+class RateLimitBackend(ABC):
+    """Interfaz de los backends: consume cost fichas de un bucket y devuelve (permitido, segundos de espera)"""
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: float, cost: float = 1) -> Tuple[bool, float]:
+        pass
+
+
+class InMemoryBackend(RateLimitBackend):
+    """Buckets en un OrderedDict acotado: las claves menos usadas se descartan (equivale a un bucket lleno)"""
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or config.RATE_LIMIT_MAX_KEYS
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()  # clave -> (fichas, instante)
+
+    def take(self, key, rate, burst, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            RATE_LIMIT_KEYS.set(len(self._buckets))
+        return allowed, retry_after
+
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Buckets compartidos en Redis, actualizados atómicamente con un script Lua. Si Redis no responde
+    se usa el backend en memoria del proceso para no bloquear los logins.
+    """
+
+    def __init__(self, url: str, prefix: str = "fitflow:rate-limit:"):
+        import redis  # dependencia opcional, solo con RATE_LIMIT_REDIS_URL
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._errors = (redis.RedisError,)
+        self._fallback = InMemoryBackend()
+        self.prefix = prefix
+
+    def take(self, key, rate, burst, cost=1):
+        try:
+            allowed, retry_after = self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+        except self._errors as exc:
+            logger.warning("Rate limit: Redis no disponible (%s), usando el backend en memoria", exc)
+            return self._fallback.take(key, rate, burst, cost)
+        return bool(int(allowed)), float(retry_after)
+
+
+_backend: RateLimitBackend = RedisBackend(config.RATE_LIMIT_REDIS_URL) if config.RATE_LIMIT_REDIS_URL \
+    else InMemoryBackend()
+
+
+def set_backend(backend: RateLimitBackend):
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> RateLimitBackend:
+    return _backend
+
+
+class RateLimiter:
+    """per_minute fichas por minuto con ráfagas de hasta burst; per_minute <= 0 lo desactiva"""
+
+    def __init__(self, name: str, per_minute: int, burst: int):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    def check(self, key: str) -> Optional[int]:
+        """None si la petición pasa; si no, los segundos (redondeados hacia arriba) para reintentar"""
+        if self.rate <= 0:
+            return None
+        allowed, retry_after = get_backend().take(f"{self.name}:{key}", self.rate, self.burst)
+        RATE_LIMIT_DECISIONS.inc(limiter=self.name, result="allowed" if allowed else "rejected")
+        return None if allowed else max(1, math.ceil(retry_after))
+
+
+login_ip_limiter = RateLimiter("login_ip", config.LOGIN_RATE_PER_IP, config.LOGIN_BURST_PER_IP)
+login_cedula_limiter = RateLimiter("login_cedula", config.LOGIN_RATE_PER_CEDULA, config.LOGIN_BURST_PER_CEDULA)
+
+
+def client_ip(request) -> str:
+    """IP del cliente. Detrás del ingress (RATE_LIMIT_TRUST_FORWARDED) se toma de X-Forwarded-For la
+    entrada RATE_LIMIT_TRUSTED_PROXIES posiciones desde la derecha: esas las añaden nuestros proxies;
+    las de la izquierda las controla el cliente y no sirven como clave"""
+    if config.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+            if hops:
+                return hops[max(0, len(hops) - max(1, config.RATE_LIMIT_TRUSTED_PROXIES))]
+    return request.client.host if request.client else "unknown"
@@ -3,11 +3,17 @@ from datetime import datetime, timedelta
 from jose import jwt
 import os
 
+from fitFlow.backend.app.core import config
+
 SECRET_KEY = "fitflow-secret"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Coste fijo: los hashes con otro número de rondas (mayor o menor) se consideran desactualizados
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__default_rounds=config.BCRYPT_ROUNDS,
+                           bcrypt__min_rounds=config.BCRYPT_ROUNDS,
+                           bcrypt__max_rounds=config.BCRYPT_ROUNDS)
 
 def get_password_hash(password: str):
     return pwd_context.hash(password)
@@ -15,6 +21,10 @@ def get_password_hash(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(válida, nuevo_hash); nuevo_hash no es None si el hash usa un coste distinto de BCRYPT_ROUNDS"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -0,0 +1,274 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada paso tiene un número de versión y se aplica una sola vez, en orden, dentro de su propia
+transacción; la tabla schema_version registra los pasos aplicados. Los pasos son idempotentes
+para poder adoptar bases creadas antes con create_all o con los scripts manuales.
+
+Uso (fuera de banda, una vez por despliegue):
+    python -m fitFlow.backend.app.database.migrations upgrade
+    python -m fitFlow.backend.app.database.migrations current
+    python -m fitFlow.backend.app.database.migrations explain
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from sqlalchemy import (Column, DateTime, Index, Integer, MetaData, String, Table, and_, func, inspect,
+                        select, text)
+from sqlalchemy.schema import CreateIndex
+
+from fitFlow.backend.app.database.session import Base, engine
+from fitFlow.backend.app.models import user, client, nutritionist, admin, food  # noqa: F401 (registra los modelos)
+from fitFlow.backend.app.models.catalog_version import CatalogVersion
+from fitFlow.backend.app.models.daily_nutrition_total import DailyNutritionTotal
+from fitFlow.backend.app.models.food_category import FoodCategory
+from fitFlow.backend.app.models.food_log import FoodLog
+from fitFlow.backend.app.models.job import Job
+from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
+from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal, MealType
+from fitFlow.backend.app.services import food_categories, food_search
+from fitFlow.backend.app.services.nutrition_rollup import rebuild_users, user_batches
+
+BACKFILL_BATCH_SIZE = 5000
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# ===== PASOS =====
+def _baseline(conn):
+    """Tablas del modelo actual (no hace nada sobre las que ya existen)"""
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_plan_date(conn):
+    """
+    Agrega nutrition_plans.plan_date a bases antiguas. Los planes existentes reciben fechas
+    escalonadas por usuario (hoy, hoy+1, ...) según su orden de creación, con UPDATEs por lotes
+    de rangos de plan_id en lugar de fila a fila.
+    """
+    columns = [column["name"] for column in inspect(conn).get_columns("nutrition_plans")]
+    if "plan_date" not in columns:
+        conn.execute(text("ALTER TABLE nutrition_plans ADD COLUMN plan_date DATE"))
+
+        if conn.dialect.name == "sqlite":
+            new_date = "date(:today, '+' || ranked.offset_days || ' days')"
+        else:
+            new_date = "CAST(:today AS DATE) + ranked.offset_days"
+
+        backfill = text(f"""
+            UPDATE nutrition_plans
+            SET plan_date = {new_date}
+            FROM (
+                SELECT plan_id,
+                       ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, plan_id) - 1 AS offset_days
+                FROM nutrition_plans
+            ) AS ranked
+            WHERE ranked.plan_id = nutrition_plans.plan_id
+              AND nutrition_plans.plan_id BETWEEN :low AND :high
+        """)
+        low, high = conn.execute(text("SELECT MIN(plan_id), MAX(plan_id) FROM nutrition_plans")).one()
+        if low is not None:
+            for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+                conn.execute(backfill, {"today": date.today().isoformat(), "low": start,
+                                        "high": start + BACKFILL_BATCH_SIZE - 1})
+
+    Index("idx_user_nutritionist_date", NutritionPlan.__table__.c.user_id,
+          NutritionPlan.__table__.c.nutritionist_id, NutritionPlan.__table__.c.plan_date,
+          unique=True).create(bind=conn, checkfirst=True)
+
+
+HOT_INDEXES = [
+    index
+    for model in (FoodLog, NutritionPlan, NutritionPlanMeal)
+    for index in model.__table__.indexes
+    if len(index.columns) > 1
+]
+
+
+def _hot_indexes(conn):
+    """Índices compuestos de las consultas calientes (food_logs, nutrition_plans, nutrition_plan_meals)"""
+    for index in HOT_INDEXES:
+        index.create(bind=conn, checkfirst=True)
+
+
+def _daily_nutrition_totals(conn):
+    """Tabla de totales diarios pre-agregados, calculada desde los food_logs existentes"""
+    DailyNutritionTotal.__table__.create(bind=conn, checkfirst=True)
+    for low, high in user_batches(conn):
+        rebuild_users(conn, low, high)
+
+
+def _food_search_index(conn):
+    """Índice FTS5 (trigram, sin acentos) de nombre y descripción de los alimentos; solo SQLite"""
+    if conn.dialect.name == "sqlite":
+        food_search.create_index(conn)
+        food_search.reindex(conn)
+
+
+def _food_categories(conn):
+    """Tabla food_categories con la clasificación de los alimentos existentes"""
+    FoodCategory.__table__.create(bind=conn, checkfirst=True)
+    food_categories.rebuild(conn)
+
+
+def _jobs(conn):
+    """Tabla jobs con los registros de los trabajos en segundo plano"""
+    Job.__table__.create(bind=conn, checkfirst=True)
+
+
+def _food_logs_by_food(conn):
+    """Índice de food_logs por alimento, usuario y fecha (refresco de totales al editar un alimento)"""
+    next(index for index in FoodLog.__table__.indexes
+         if index.name == "ix_food_logs_food_user_date").create(bind=conn, checkfirst=True)
+
+
+def _users_email_lower(conn):
+    """Índice por lower(email) (duplicados sin distinguir mayúsculas en la alta masiva).
+    IF NOT EXISTS: la reflexión de SQLite no ve los índices por expresión, así que checkfirst no sirve"""
+    index = next(index for index in user.User.__table__.indexes if index.name == "ix_users_email_lower")
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _catalog_version(conn):
+    """Versión compartida del catálogo de alimentos (la fila inicial la inserta su evento after_create)"""
+    CatalogVersion.__table__.create(bind=conn, checkfirst=True)
+
+
+def _unaccent(conn):
+    """Extensión unaccent para buscar alimentos sin acentos; solo PostgreSQL"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+
+
+MIGRATIONS = [
+    (1, "baseline", _baseline),
+    (2, "nutrition_plans.plan_date", _add_plan_date),
+    (3, "hot composite indexes", _hot_indexes),
+    (4, "daily_nutrition_totals", _daily_nutrition_totals),
+    (5, "foods full-text index", _food_search_index),
+    (6, "food_categories", _food_categories),
+    (7, "jobs", _jobs),
+    (8, "food_logs by food", _food_logs_by_food),
+    (9, "users lower(email) index", _users_email_lower),
+    (10, "catalog_version", _catalog_version),
+    (11, "unaccent extension", _unaccent),
+]
+
+
+# ===== RUNNER =====
+def current_version(bind=engine) -> int:
+    with bind.connect() as conn:
+        if not inspect(conn).has_table("schema_version"):
+            return 0
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(bind=engine, target: int = None) -> list:
+    """Aplica en orden los pasos pendientes hasta target (o el último). Devuelve los aplicados."""
+    _version_metadata.create_all(bind=bind)
+    applied = []
+    version = current_version(bind)
+    for number, name, step in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        with bind.begin() as conn:
+            step(conn)
+            conn.execute(schema_version.insert().values(version=number, name=name, applied_at=datetime.utcnow()))
+        applied.append((number, name))
+    return applied
+
+
+# ===== VERIFICACIÓN DE ÍNDICES =====
+def hot_queries():
+    """Consultas calientes y los índices que cada una debe usar"""
+    day = date.today()
+    return {
+        "compliance": (
+            select(func.sum(FoodLog.portion_size)).where(
+                FoodLog.user_id == 1, FoodLog.date == day,
+                FoodLog.food_id == 1, FoodLog.meal_type == MealType.Almuerzo
+            ),
+            ["COVERING INDEX ix_food_logs_user_date_food_meal"]
+        ),
+        "get_consumed_amounts": (
+            select(FoodLog.date, FoodLog.food_id, FoodLog.meal_type, func.sum(FoodLog.portion_size)).where(
+                FoodLog.user_id == 1, FoodLog.date.in_([day, day + timedelta(days=1)])
+            ).group_by(FoodLog.date, FoodLog.food_id, FoodLog.meal_type),
+            ["COVERING INDEX ix_food_logs_user_date_food_meal"]
+        ),
+        "dashboard logs del día": (
+            select(FoodLog).where(FoodLog.user_id == 1, FoodLog.date == day),
+            ["ix_food_logs_user_date_food_meal"]
+        ),
+        "dashboard adherencia semanal": (
+            select(FoodLog.date, func.count(FoodLog.log_id)).where(
+                FoodLog.user_id == 1, FoodLog.date >= day, FoodLog.date <= day
+            ).group_by(FoodLog.date),
+            ["ix_food_logs_user_date_food_meal"]
+        ),
+        "plan por usuario y fecha": (
+            select(NutritionPlan).where(and_(NutritionPlan.user_id == 1, NutritionPlan.plan_date == day)),
+            ["ix_nutrition_plans_user_date"]
+        ),
+        "get_planned_amounts": (
+            select(NutritionPlan.plan_date, NutritionPlanMeal.food_id, NutritionPlanMeal.meal_type,
+                   func.sum(NutritionPlanMeal.portion_size)).join(
+                NutritionPlan, NutritionPlan.plan_id == NutritionPlanMeal.plan_id
+            ).where(
+                NutritionPlan.user_id == 1, NutritionPlan.plan_date.in_([day, day + timedelta(days=1)])
+            ).group_by(NutritionPlan.plan_date, NutritionPlanMeal.food_id, NutritionPlanMeal.meal_type),
+            ["ix_nutrition_plans_user_date", "COVERING INDEX ix_nutrition_plan_meals_plan_food_meal"]
+        ),
+    }
+
+
+def verify_query_plans(bind=engine) -> dict:
+    """Ejecuta EXPLAIN QUERY PLAN (SQLite) y comprueba que cada consulta caliente usa sus índices"""
+    results = {}
+    with bind.connect() as conn:
+        for name, (statement, expected) in hot_queries().items():
+            sql = str(statement.compile(bind, compile_kwargs={"literal_binds": True}))
+            plan = " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+            results[name] = (all(index in plan for index in expected), plan)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de Fit Flow")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subcommands.add_parser("upgrade", help="Aplica las migraciones pendientes")
+    upgrade_parser.add_argument("--target", type=int, default=None)
+    subcommands.add_parser("current", help="Muestra la versión actual del esquema")
+    subcommands.add_parser("explain", help="Verifica que las consultas calientes usan sus índices (SQLite)")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = upgrade(target=args.target)
+        for number, name in applied:
+            print(f"✅ Migración {number} aplicada: {name}")
+        print(f"📊 Versión del esquema: {current_version()}")
+        return 0
+
+    if args.command == "current":
+        print(current_version())
+        return 0
+
+    ok = True
+    for name, (uses_index, plan) in verify_query_plans().items():
+        print(f"{'✅' if uses_index else '❌'} {name}: {plan}")
+        ok = ok and uses_index
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,175 @@
-from sqlalchemy import create_engine
+import random
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from fitFlow.backend.app.core import config
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+
+def apply_sqlite_profile(bind):
+    """Configura WAL y pragmas de rendimiento en cada conexión SQLite nueva"""
+
+    @event.listens_for(bind, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+        # cache_size negativo = tamaño en KiB en lugar de número de páginas
+        cursor.execute(f"PRAGMA cache_size=-{int(config.DB_SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.DB_SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return bind
+
+
+def _pool_options(overrides: dict) -> dict:
+    options = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    options.update(overrides)
+    return options
+
+
+def build_engine(url: str = SQLALCHEMY_DATABASE_URL, sqlite_profile: bool = config.DB_SQLITE_PROFILE,
+                 **overrides):
+    """
+    Construye el engine a partir de la configuración.
+    SQLite en archivo y PostgreSQL usan el mismo QueuePool dimensionado por configuración,
+    así el camino de producción se puede probar en local contra un archivo SQLite.
+    """
+    pool_options = _pool_options(overrides)
+
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False
+        if parsed.database in (None, "", ":memory:"):
+            # Una base en memoria solo existe dentro de su conexión: se comparte una única conexión
+            return create_engine(url, connect_args=connect_args, poolclass=StaticPool, echo=config.DB_ECHO)
+
+    new_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=QueuePool,
+        echo=config.DB_ECHO,
+        **pool_options
+    )
+    if sqlite_profile and parsed.get_backend_name() == "sqlite":
+        apply_sqlite_profile(new_engine)
+    return new_engine
+
+
+def to_async_url(url: str) -> str:
+    """Traduce la URL síncrona al driver asíncrono equivalente (aiosqlite / asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./fitflow.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+def build_async_engine(url: str = SQLALCHEMY_DATABASE_URL, sqlite_profile: bool = config.DB_SQLITE_PROFILE,
+                       **overrides):
+    """Engine asíncrono con la misma configuración de pool que build_engine"""
+    pool_options = _pool_options(overrides)
+
+    parsed = make_url(url)
+    async_url = to_async_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return create_async_engine(async_url, poolclass=StaticPool, echo=config.DB_ECHO)
+
+    new_engine = create_async_engine(async_url, echo=config.DB_ECHO, **pool_options)
+    if sqlite_profile and parsed.get_backend_name() == "sqlite":
+        apply_sqlite_profile(new_engine.sync_engine)
+    return new_engine
+
+
+def describe_pool(bind) -> dict:
+    """Configuración efectiva del pool (se reporta al arrancar el servidor)"""
+    pool = bind.pool
+    description = {
+        "url": bind.url.render_as_string(hide_password=True),
+        "dialect": bind.dialect.name,
+        "pool_class": type(pool).__name__,
+        "pre_ping": pool._pre_ping,
+        "recycle": pool._recycle,
+    }
+    if bind.dialect.name == "sqlite":
+        with bind.connect() as conn:
+            description["journal_mode"] = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+            description["busy_timeout_ms"] = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+    if isinstance(pool, QueuePool):
+        description.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "pool_timeout": pool.timeout(),
+            "max_connections_per_pod": (pool.size() + pool._max_overflow) * config.WEB_CONCURRENCY,
+        })
+    return description
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Camino asíncrono para endpoints de lectura: no ocupan un hilo del threadpool mientras esperan I/O
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _is_lock_error(error: OperationalError) -> bool:
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def commit_with_retry(db, apply_changes, retries: int = None, backoff_ms: int = None):
+    """
+    Aplica los cambios y hace commit, reintentando con backoff exponencial si SQLite
+    devuelve "database is locked". Tras un fallo la sesión se revierte, por eso los cambios
+    se pasan como función y se vuelven a aplicar en cada intento.
+    """
+    retries = config.DB_COMMIT_RETRIES if retries is None else retries
+    backoff_ms = config.DB_COMMIT_BACKOFF_MS if backoff_ms is None else backoff_ms
+
+    attempt = 0
+    while True:
+        try:
+            result = apply_changes()
+            db.commit()
+            return result
+        except OperationalError as e:
+            db.rollback()
+            if not _is_lock_error(e) or attempt >= retries:
+                raise
+            # Backoff exponencial con jitter para no sincronizar a los escritores en conflicto
+            delay = backoff_ms * (2 ** attempt) * (0.5 + random.random())
+            time.sleep(delay / 1000)
+            attempt += 1
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, DateTime, DDL, event
+from fitFlow.backend.app.database.session import Base
+
+
+class CatalogVersion(Base):
+    """Versión compartida del catálogo de alimentos (una sola fila); cada escritura en foods la incrementa
+    en su misma transacción y las réplicas la consultan para invalidar sus cachés (services/food_catalog.py)"""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)  # siempre 1
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+
+
+# La fila existe desde que se crea la tabla: las escrituras solo hacen UPDATE
+event.listen(CatalogVersion.__table__, "after_create",
+             DDL("INSERT INTO catalog_version (id, version) VALUES (1, 1)"))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Float, Date
+from fitFlow.backend.app.database.session import Base
+from fitFlow.backend.app.models.nutrition_plan_meal import MealType
+
+
+class DailyNutritionTotal(Base):
+    """Totales nutricionales pre-agregados por usuario, día y comida (se mantienen junto con food_logs)"""
+    __tablename__ = "daily_nutrition_totals"
+
+    user_id = Column(Integer, ForeignKey("users.user_id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    meal_type = Column(Enum(MealType), primary_key=True)
+
+    calories = Column(Float, nullable=False, default=0.0)
+    protein = Column(Float, nullable=False, default=0.0)
+    carbs = Column(Float, nullable=False, default=0.0)
+    fat = Column(Float, nullable=False, default=0.0)
+    log_count = Column(Integer, nullable=False, default=0)
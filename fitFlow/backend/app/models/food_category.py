@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Index
+from fitFlow.backend.app.database.session import Base
+import enum
+
+class Category(str, enum.Enum):
+    Proteina = "Proteina"
+    Carbohidrato = "Carbohidrato"
+    CarbohidratoDesayuno = "CarbohidratoDesayuno"  # avena, pan
+    CarbohidratoAlmuerzo = "CarbohidratoAlmuerzo"  # arroz, pasta
+    Fruta = "Fruta"
+    Verdura = "Verdura"
+    Lacteo = "Lacteo"
+    FrutoSeco = "FrutoSeco"
+
+
+class FoodCategory(Base):
+    """Categorías de cada alimento (un alimento puede tener varias); se asignan al crearlo o importarlo"""
+    __tablename__ = "food_categories"
+
+    food_id = Column(Integer, ForeignKey("foods.food_id", ondelete="CASCADE"), primary_key=True)
+    category = Column(Enum(Category), primary_key=True)
+
+    # Miembros de una categoría sin recorrer el catálogo
+    __table_args__ = (
+        Index("ix_food_categories_category_food", "category", "food_id"),
+    )
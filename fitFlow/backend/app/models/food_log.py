@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, ForeignKey, Enum, Float, Date
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Float, Date, Index
 from sqlalchemy.orm import relationship
 from fitFlow.backend.app.database.session import Base
 from fitFlow.backend.app.models.nutrition_plan_meal import MealType
@@ -19,3 +19,11 @@ class FoodLog(Base):
 
     user = relationship("User")
     food = relationship("Food")
+
+    # Índice compuesto para las consultas calientes (consumo por usuario/fecha/alimento/comida).
+    # Incluye portion_size para que SUM(portion_size) se resuelva solo con el índice (covering).
+    __table_args__ = (
+        Index("ix_food_logs_user_date_food_meal", "user_id", "date", "food_id", "meal_type", "portion_size"),
+        # Días que registraron un alimento (recalcular sus totales al cambiar sus valores)
+        Index("ix_food_logs_food_user_date", "food_id", "user_id", "date"),
+    )
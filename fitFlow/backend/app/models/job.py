@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, Enum, Index
+from fitFlow.backend.app.database.session import Base
+import enum
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+    orphaned = "orphaned"  # su instancia se detuvo o dejó de dar señales antes de terminarlo
+
+
+ACTIVE_STATUSES = (JobStatus.queued, JobStatus.running)
+
+
+class Job(Base):
+    """Registro de un trabajo en segundo plano (services/jobs.py); sobrevive al proceso que lo ejecuta"""
+    __tablename__ = "jobs"
+
+    job_id = Column(String(32), primary_key=True)  # uuid4 en hexadecimal
+    kind = Column(String(50), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
+    owner_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    params = Column(Text, nullable=True)  # JSON
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    message = Column(String(255), nullable=True)
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    error_status = Column(Integer, nullable=True)  # código HTTP equivalente del error
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    instance = Column(String(100), nullable=False)  # host:pid que lo ejecuta
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Trabajos de un usuario (GET /jobs) y trabajos activos (detección de huérfanos)
+        Index("ix_jobs_owner_created", "owner_id", "created_at"),
+        Index("ix_jobs_status_heartbeat", "status", "heartbeat_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from fitFlow.backend.app.database.session import Base
@@ -18,7 +18,10 @@ class NutritionPlan(Base):
     meals = relationship("NutritionPlanMeal", back_populates="plan", cascade="all, delete-orphan")
 
     # Agregar índice único para evitar múltiples planes por día
+    # El índice (user_id, plan_date) sirve las búsquedas de plan por usuario y fecha/rango,
+    # que la restricción única (encabezada por nutritionist_id en algunas bases) no cubre
     __table_args__ = (
         UniqueConstraint('user_id', 'nutritionist_id', 'plan_date',
                          name='_user_nutritionist_date_uc'),
-    )
\ No newline at end of file
+        Index("ix_nutrition_plans_user_date", "user_id", "plan_date"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, ForeignKey, Enum, Float, Index
 from sqlalchemy.orm import relationship
 from fitFlow.backend.app.database.session import Base
 import enum
@@ -21,3 +21,8 @@ class NutritionPlanMeal(Base):
 
     plan = relationship("NutritionPlan", back_populates="meals")
     food = relationship("Food")
+
+    # Cubre la carga de comidas por plan y la cantidad planificada por (plan, alimento, comida)
+    __table_args__ = (
+        Index("ix_nutrition_plan_meals_plan_food_meal", "plan_id", "food_id", "meal_type", "portion_size"),
+    )
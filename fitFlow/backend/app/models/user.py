@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Enum
+from sqlalchemy import Column, Integer, String, Date, Enum, Index, func
 from sqlalchemy.orm import relationship
 from fitFlow.backend.app.database.session import Base
 import enum
@@ -19,6 +19,11 @@ class User(Base):
     birth_date = Column(Date, nullable=False)
     sex = Column(Enum(Sex), nullable=False)
 
+    __table_args__ = (
+        # Búsqueda de emails sin distinguir mayúsculas (alta masiva de clientes)
+        Index("ix_users_email_lower", func.lower(email)),
+    )
+
     client = relationship(
         "Client",
         uselist=False,
@@ -0,0 +1,268 @@
+"""
+Alta masiva de clientes desde CSV o NDJSON.
+
+El archivo se lee en streaming y se procesa por lotes: validación con ClientCreate (incluida la
+cédula), duplicados dentro del archivo y contra la base con una consulta por lote, hash de las
+contraseñas en un pool de procesos e inserción del lote en su propia transacción. Las filas
+inválidas no detienen la importación: se devuelven en el reporte con su número de fila.
+
+Las contraseñas importadas se hashean con IMPORT_BCRYPT_ROUNDS, que por defecto es BCRYPT_ROUNDS. Para
+cargas grandes el CLI acepta --rounds con un coste menor: es una rebaja de seguridad explícita, el login
+recalcula el hash con el coste normal la primera vez que se usa, pero las cuentas que nunca inician
+sesión conservan el hash barato.
+
+Uso:
+    python -m fitFlow.backend.app.services.client_import clientes.csv --errors errores.csv
+    python -m fitFlow.backend.app.services.client_import clientes.csv --rounds 8  # importación rápida
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from passlib.hash import bcrypt
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models import user, nutritionist, admin, food, nutrition_plan  # noqa: F401 (registra los modelos)
+from fitFlow.backend.app.models.client import Client
+from fitFlow.backend.app.models.user import User
+from fitFlow.backend.app.schemas.client import ClientCreate
+
+IMPORT_BATCH_SIZE = 1000
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(número de fila, registro, error de lectura) sin cargar el archivo entero en memoria"""
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(stream), start=2):  # la fila 1 es la cabecera
+            yield number, {k: (v.strip() if isinstance(v, str) else v) for k, v in record.items() if k}, None
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"JSON inválido: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield number, record, None
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+class ClientImporter:
+    """Estado de una importación: contadores, errores y cédulas/emails ya vistos en el archivo"""
+
+    def __init__(self, bind=engine, batch_size: int = IMPORT_BATCH_SIZE, rounds: int = None,
+                 processes: int = None, progress=None, mp_context=None):
+        self.bind = bind
+        self.batch_size = batch_size
+        self.rounds = rounds or config.IMPORT_BCRYPT_ROUNDS
+        self.processes = processes or config.IMPORT_HASH_PROCESSES
+        self.progress = progress
+        self.mp_context = mp_context  # "spawn" desde un proceso con hilos (la API), por defecto el del sistema
+        self.total = 0
+        self.created = 0
+        self.errors: List[Dict] = []
+        self._seen_cedulas = set()
+        self._seen_emails = set()
+
+    def _error(self, row: int, cedula, message: str):
+        self.errors.append({"row": row, "cedula": cedula, "error": message})
+
+    def _validate(self, batch) -> List[Tuple[int, ClientCreate]]:
+        """Validación del esquema y duplicados dentro del archivo"""
+        valid = []
+        for number, record, read_error in batch:
+            if read_error:
+                self._error(number, None, read_error)
+                continue
+            try:
+                client = ClientCreate(**record)
+            except ValidationError as exc:
+                self._error(number, record.get("cedula"), _validation_message(exc))
+                continue
+            email = client.email.lower()
+            if client.cedula in self._seen_cedulas:
+                self._error(number, client.cedula, "Cédula repetida en el archivo")
+            elif email in self._seen_emails:
+                self._error(number, client.cedula, "Email repetido en el archivo")
+            else:
+                self._seen_cedulas.add(client.cedula)
+                self._seen_emails.add(email)
+                valid.append((number, client))
+        return valid
+
+    def _without_existing(self, conn, rows: List[Tuple[int, ClientCreate]]) -> List[Tuple[int, ClientCreate]]:
+        """Descarta en una sola consulta las cédulas y emails que ya existen en la base"""
+        if not rows:
+            return rows
+        cedulas = [client.cedula for _, client in rows]
+        # Emails sin distinguir mayúsculas, igual que los repetidos dentro del archivo
+        emails = [client.email.lower() for _, client in rows]
+        existing = conn.execute(
+            select(User.cedula, User.email).where(or_(User.cedula.in_(cedulas), func.lower(User.email).in_(emails)))
+        ).all()
+        taken_cedulas = {cedula for cedula, _ in existing}
+        taken_emails = {email.lower() for _, email in existing}
+
+        remaining = []
+        for number, client in rows:
+            if client.cedula in taken_cedulas:
+                self._error(number, client.cedula, "Email o cédula ya registrados")
+            elif client.email.lower() in taken_emails:
+                self._error(number, client.cedula, "Email o cédula ya registrados")
+            else:
+                remaining.append((number, client))
+        return remaining
+
+    def _insert(self, rows: List[Tuple[int, ClientCreate]], hashes: Dict[str, str]) -> int:
+        """Inserta el lote en una transacción; si otro proceso registró alguna cédula entretanto, reintenta sin ella"""
+        for _ in range(2):
+            try:
+                with self.bind.begin() as conn:
+                    rows = self._without_existing(conn, rows)
+                    if not rows:
+                        return 0
+                    user_ids = conn.execute(
+                        insert(User).returning(User.user_id, sort_by_parameter_order=True),
+                        [{
+                            "first_name": client.first_name,
+                            "last_name": client.last_name,
+                            "cedula": client.cedula,
+                            "email": client.email,
+                            "password": hashes[client.cedula],
+                            "birth_date": client.birth_date,
+                            "sex": client.sex.value,
+                        } for _, client in rows]
+                    ).scalars().all()
+                    conn.execute(insert(Client), [{
+                        "client_id": user_id,
+                        "height_cm": client.height_cm,
+                        "weight_current_kg": client.weight_current_kg,
+                        "weight_goal_kg": client.weight_goal_kg,
+                        "activity_level": client.activity_level.value,
+                        "goal": client.goal.value,
+                    } for user_id, (_, client) in zip(user_ids, rows)])
+                return len(rows)
+            except IntegrityError:
+                continue
+        for number, client in rows:
+            self._error(number, client.cedula, "No se pudo insertar (conflicto con registros concurrentes)")
+        return 0
+
+    def _submit(self, pool, rows: List[Tuple[int, ClientCreate]]):
+        """Descarta los ya registrados y encarga los hashes al pool (Executor.map los envía de inmediato)"""
+        with self.bind.connect() as conn:
+            rows = self._without_existing(conn, rows)
+        passwords = [client.password for _, client in rows]
+        chunksize = max(1, len(passwords) // (self.processes * 4))
+        return rows, pool.map(_hash, passwords, [self.rounds] * len(passwords), chunksize=chunksize)
+
+    def _flush(self, rows: List[Tuple[int, ClientCreate]], hashed):
+        hashes = dict(zip((client.cedula for _, client in rows), hashed))
+        self.created += self._insert(rows, hashes)
+        if self.progress:
+            self.progress(self)
+
+    def _batches(self, records: Iterable) -> Iterator[list]:
+        batch = []
+        for item in records:
+            self.total += 1
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, records: Iterable) -> dict:
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=self.mp_context) as pool:
+            # Mientras se inserta un lote, el pool ya está hasheando el siguiente
+            pending = None
+            for batch in self._batches(records):
+                current = self._submit(pool, self._validate(batch))
+                if pending is not None:
+                    self._flush(*pending)
+                pending = current
+            if pending is not None:
+                self._flush(*pending)
+
+        self.errors.sort(key=lambda error: error["row"])
+        return self.report()
+
+    def report(self) -> dict:
+        return {"total": self.total, "created": self.created, "failed": len(self.errors), "errors": self.errors}
+
+
+def import_file(stream: io.TextIOBase, fmt: str, **options) -> dict:
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    return ClientImporter(**options).run(iter_records(stream, fmt))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Alta masiva de clientes desde CSV o NDJSON")
+    parser.add_argument("path", help="archivo .csv, .ndjson o .jsonl")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="por defecto, según la extensión")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--rounds", type=int, default=None,
+                        help="coste bcrypt de la importación (por defecto IMPORT_BCRYPT_ROUNDS); un valor menor "
+                             "que BCRYPT_ROUNDS acelera la carga a costa de hashes más débiles hasta el primer login")
+    parser.add_argument("--processes", type=int, default=None, help="procesos para los hashes")
+    parser.add_argument("--errors", default=None, help="escribe el reporte de filas rechazadas en este CSV")
+    args = parser.parse_args(argv)
+
+    if args.rounds is not None and args.rounds < config.BCRYPT_ROUNDS:
+        print(f"⚠️ Coste bcrypt {args.rounds} (BCRYPT_ROUNDS={config.BCRYPT_ROUNDS}): las cuentas importadas "
+              f"lo conservan hasta su primer login")
+
+    def progress(importer):
+        print(f"🚀 {importer.total} filas leídas, {importer.created} clientes creados, {len(importer.errors)} con error")
+
+    with open(args.path, encoding="utf-8-sig", newline="") as stream:
+        report = import_file(stream, args.format or detect_format(args.path), batch_size=args.batch_size,
+                             rounds=args.rounds, processes=args.processes, progress=progress)
+
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=["row", "cedula", "error"])
+            writer.writeheader()
+            writer.writerows(report["errors"])
+    else:
+        for error in report["errors"][:20]:
+            print(f"❌ Fila {error['row']} ({error['cedula']}): {error['error']}")
+
+    print(f"✅ {report['created']} de {report['total']} clientes importados")
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Instantánea en memoria del catálogo de alimentos para GET /foods/.
+
+El catálogo se serializa una sola vez por versión: la respuesta son bytes JSON ya preparados y un
+ETag (hash del contenido, igual en todas las réplicas), así que los clientes que envían If-None-Match
+reciben 304 sin tocar la base.
+
+La versión vive en la tabla catalog_version (migración 10): cada alta, cambio o borrado de un alimento
+la incrementa en su misma transacción (eventos del mapper de Food; las escrituras masivas con Core
+llaman a bump_version()). Cada proceso la vuelve a leer como mucho cada FOOD_CATALOG_REVALIDATE_SECONDS,
+así que una réplica, o el CLI de importación, invalida a las demás sin configuración adicional; la
+matriz de nutrientes, las categorías y la caché de planes siguen la misma versión.
+
+invalidate(), después del commit, fuerza la relectura en este proceso y la anuncia por un canal de
+core/notifier.py para que las demás réplicas no esperen al siguiente intervalo: Redis pub/sub con
+FOOD_CATALOG_REDIS_URL o, si no, InMemoryNotifier, que no sale del proceso (tests). Cualquier otro
+canal puede registrarse con set_notifier().
+"""
+import hashlib
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, select, update
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge
+from fitFlow.backend.app.core.notifier import InMemoryNotifier, Notifier, RedisNotifier
+from fitFlow.backend.app.models.catalog_version import CatalogVersion
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.schemas.food import FoodOut
+
+CATALOG_REQUESTS = Counter("fitflow_food_catalog_requests_total", "Peticiones al catálogo de alimentos", ["result"])
+CATALOG_VERSION = Gauge("fitflow_food_catalog_version", "Versión del catálogo de alimentos vista por este proceso")
+CATALOG_CHECKS = Counter("fitflow_food_catalog_version_checks_total", "Lecturas de catalog_version", ["result"])
+
+_foods_adapter = TypeAdapter(List[FoodOut])
+_version_statement = select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+
+def bump_version(conn):
+    """Incrementa la versión compartida dentro de la transacción de conn (Session o Connection)"""
+    conn.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(
+        version=CatalogVersion.version + 1, updated_at=datetime.utcnow()))
+
+
+@event.listens_for(Food, "after_insert")
+@event.listens_for(Food, "after_update")
+@event.listens_for(Food, "after_delete")
+def _bump_food(mapper, connection, target):
+    bump_version(connection)
+
+
+class CatalogSnapshot:
+    __slots__ = ("version", "body", "etag", "count")
+
+    def __init__(self, version: int, body: bytes, count: int):
+        self.version = version
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.count = count
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (lista separada por comas, W/ o *)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class FoodCatalog:
+    def __init__(self, notifier: Notifier):
+        self.id = uuid.uuid4().hex  # para ignorar los avisos propios
+        self._lock = threading.Lock()
+        self._version = 0  # última versión leída de catalog_version (0: todavía ninguna)
+        self._checked_at = float("-inf")  # time.monotonic() de esa lectura
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.notifier = None
+        self.attach(notifier)
+
+    def attach(self, notifier: Notifier):
+        self.notifier = notifier
+        notifier.subscribe(self._on_remote_change)
+
+    @property
+    def version(self) -> int:
+        """Versión vista en la última lectura; revalidate() la actualiza"""
+        return self._version
+
+    def _stale(self) -> bool:
+        return time.monotonic() - self._checked_at >= config.FOOD_CATALOG_REVALIDATE_SECONDS
+
+    def _see(self, version: int) -> int:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            changed = version != self._version
+            if changed:
+                self._version = version
+                self._snapshot = None
+        CATALOG_CHECKS.inc(result="changed" if changed else "unchanged")
+        CATALOG_VERSION.set(version)
+        return version
+
+    def revalidate(self, db) -> int:
+        """Versión vigente; consulta catalog_version si la última lectura tiene más de
+        FOOD_CATALOG_REVALIDATE_SECONDS"""
+        if not self._stale():
+            return self._version
+        return self._see(db.execute(_version_statement).scalar_one())
+
+    async def revalidate_async(self, db) -> int:
+        if not self._stale():
+            return self._version
+        return self._see((await db.execute(_version_statement)).scalar_one())
+
+    def _expire(self):
+        self._checked_at = float("-inf")
+
+    def _on_remote_change(self, origin: str):
+        if origin != self.id:
+            self._expire()
+
+    def invalidate(self):
+        """Llamar después del commit que cambia la tabla foods: la próxima petición relee la versión"""
+        self._expire()
+        self.notifier.publish(self.id)
+
+    def cached(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    def store(self, version: int, foods) -> CatalogSnapshot:
+        """
+        Serializa los alimentos leídos en la versión indicada. Si el catálogo cambió mientras se
+        leían, la instantánea se devuelve pero no se guarda (la próxima petición la reconstruye).
+        """
+        body = _foods_adapter.dump_json(_foods_adapter.validate_python(foods, from_attributes=True))
+        snapshot = CatalogSnapshot(version, body, len(foods))
+        with self._lock:
+            if self._version == version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _hit(self, version: int) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            CATALOG_REQUESTS.inc(result="hit")
+            return snapshot
+        CATALOG_REQUESTS.inc(result="miss")
+        return None
+
+    async def snapshot_async(self, db) -> CatalogSnapshot:
+        # La versión se lee antes que los alimentos: la instantánea nunca queda etiquetada con una más nueva
+        version = await self.revalidate_async(db)
+        snapshot = self._hit(version)
+        if snapshot is not None:
+            return snapshot
+        foods = (await db.execute(select(Food).order_by(Food.food_id))).scalars().all()
+        return self.store(version, foods)
+
+    def snapshot(self, db) -> CatalogSnapshot:
+        version = self.revalidate(db)
+        snapshot = self._hit(version)
+        if snapshot is not None:
+            return snapshot
+        foods = db.execute(select(Food).order_by(Food.food_id)).scalars().all()
+        return self.store(version, foods)
+
+
+_notifier: Notifier = RedisNotifier(config.FOOD_CATALOG_REDIS_URL, "fitflow:food-catalog") \
+    if config.FOOD_CATALOG_REDIS_URL else InMemoryNotifier()
+
+food_catalog = FoodCatalog(_notifier)
+
+
+def set_notifier(notifier: Notifier):
+    food_catalog.attach(notifier)
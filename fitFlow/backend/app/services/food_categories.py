@@ -0,0 +1,164 @@
+"""
+Categorías de alimentos para la generación de planes.
+
+Las reglas (palabras clave del nombre, sin acentos, y umbrales de macronutrientes) se evalúan una
+sola vez por alimento, al crearlo, modificarlo o importarlo, y se guardan en food_categories. Los
+generadores consultan CategorySets: tuplas de food_id por categoría cargadas con una consulta y
+reconstruidas cuando cambia la versión del catálogo (services/food_catalog.py); rebuild desde la
+línea de comandos la incrementa para que los servidores en marcha recarguen las categorías.
+
+Uso:
+    python -m fitFlow.backend.app.services.food_categories rebuild
+"""
+import argparse
+import os
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from sqlalchemy import String, delete, event, insert, select, type_coerce
+
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.food_category import Category, FoodCategory
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+from fitFlow.backend.app.services.food_search import normalize
+
+ASSIGN_BATCH_SIZE = 5000
+PROTEIN_THRESHOLD = 15  # gramos por porción a partir de los cuales cuenta como proteína
+CARBS_THRESHOLD = 15
+
+CATEGORY_KEYWORDS = {
+    Category.Proteina: ("pollo", "huevo", "atun", "salmon", "queso"),
+    Category.Carbohidrato: ("arroz", "avena", "pan", "pasta", "quinoa"),
+    Category.CarbohidratoDesayuno: ("avena", "pan"),
+    Category.CarbohidratoAlmuerzo: ("arroz", "pasta"),
+    Category.Fruta: ("manzana", "platano", "naranja", "fresa"),
+    Category.Verdura: ("brocoli", "espinaca", "zanahoria", "lechuga"),
+    Category.Lacteo: ("yogur", "leche"),
+    Category.FrutoSeco: ("almendra",),
+}
+
+
+def classify(name: str, protein: float, carbs: float) -> Set[Category]:
+    normalized = normalize(name)
+    categories = {category for category, keywords in CATEGORY_KEYWORDS.items()
+                  if any(keyword in normalized for keyword in keywords)}
+    if protein > PROTEIN_THRESHOLD:
+        categories.add(Category.Proteina)
+    if carbs > CARBS_THRESHOLD:
+        categories.add(Category.Carbohidrato)
+    return categories
+
+
+def assign(conn, rows: Iterable[Tuple[int, str, float, float]]):
+    """Recalcula las categorías de las filas (food_id, name, protein, carbs) ya leídas por el llamador"""
+    rows = list(rows)
+    for start in range(0, len(rows), ASSIGN_BATCH_SIZE):
+        batch = rows[start:start + ASSIGN_BATCH_SIZE]
+        conn.execute(delete(FoodCategory).where(FoodCategory.food_id.in_([row[0] for row in batch])))
+        values = [{"food_id": food_id, "category": category}
+                  for food_id, name, protein, carbs in batch
+                  for category in classify(name, protein, carbs)]
+        if values:
+            conn.execute(insert(FoodCategory), values)
+
+
+def rebuild(conn):
+    """Reclasifica el catálogo completo por lotes de food_id"""
+    conn.execute(delete(FoodCategory))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(Food.food_id, Food.name, Food.protein_per_portion, Food.carbs_per_portion)
+            .where(Food.food_id > last_id).order_by(Food.food_id).limit(ASSIGN_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        assign(conn, rows)
+        last_id = rows[-1][0]
+
+
+@event.listens_for(Food, "after_insert")
+@event.listens_for(Food, "after_update")
+def _assign_food(mapper, connection, target):
+    assign(connection, [(target.food_id, target.name, target.protein_per_portion, target.carbs_per_portion)])
+
+
+@event.listens_for(Food, "after_delete")
+def _unassign_food(mapper, connection, target):
+    # SQLite no aplica ON DELETE CASCADE sin PRAGMA foreign_keys
+    connection.execute(delete(FoodCategory).where(FoodCategory.food_id == target.food_id))
+
+
+# ===== CONJUNTOS EN MEMORIA =====
+class CategorySets:
+    """food_id por categoría para una versión del catálogo; tuplas ordenadas, aptas para random.choice"""
+    __slots__ = ("version", "members", "_lookup")
+
+    def __init__(self, version: int, rows: Iterable[Tuple[str, int]]):
+        self.version = version
+        grouped: Dict[Category, List[int]] = {category: [] for category in Category}
+        by_name = {category.name: ids for category, ids in grouped.items()}
+        for category, food_id in rows:
+            by_name[category].append(food_id)
+        self.members: Dict[Category, Tuple[int, ...]] = {category: tuple(ids) for category, ids in grouped.items()}
+        self._lookup: Dict[Category, frozenset] = {category: frozenset(ids) for category, ids in grouped.items()}
+
+    @classmethod
+    def from_members(cls, version: int, members: Dict[Category, Sequence[int]]) -> "CategorySets":
+        return cls(version, ((category.name, food_id) for category, ids in members.items() for food_id in ids))
+
+    def __getitem__(self, category: Category) -> Tuple[int, ...]:
+        return self.members[category]
+
+    def contains(self, category: Category, food_id: int) -> bool:
+        return food_id in self._lookup[category]
+
+
+# La columna se lee como texto: convertir cada fila al Enum duplicaba el tiempo de carga
+_sets_statement = select(type_coerce(FoodCategory.category, String), FoodCategory.food_id).order_by(
+    FoodCategory.category, FoodCategory.food_id)
+
+
+class CategorySetsCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sets: Optional[CategorySets] = None
+
+    def get(self, db) -> CategorySets:
+        version = food_catalog.revalidate(db)
+        sets = self._sets
+        if sets is not None and sets.version == version:
+            return sets
+        sets = CategorySets(version, db.execute(_sets_statement).all())
+        with self._lock:
+            if version == food_catalog.version:
+                self._sets = sets
+        return sets
+
+
+category_sets = CategorySetsCache()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Categorías del catálogo de alimentos")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("rebuild", help="Reclasifica todos los alimentos")
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        with engine.begin() as conn:
+            rebuild(conn)
+            bump_version(conn)
+            counts = {category.value: len(ids) for category, ids in CategorySets(0, conn.execute(_sets_statement)).members.items()}
+        for category, count in counts.items():
+            print(f"📊 {category}: {count} alimentos")
+        print("✅ Categorías reconstruidas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
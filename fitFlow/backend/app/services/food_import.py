@@ -0,0 +1,365 @@
+"""
+Importación masiva de alimentos desde tablas de composición (CSV o JSONL, comprimidos con gzip o no).
+
+El archivo se lee en streaming y se procesa por lotes de IMPORT_BATCH_SIZE filas, así que la memoria
+no depende del tamaño del archivo. Cada lote se inserta con un solo INSERT ... ON CONFLICT (name)
+DO UPDATE en su propia transacción: los alimentos que ya existen se actualizan. Las columnas se
+reconocen por nombre en español o inglés (FIELD_ALIASES, o --map campo=columna) y la porción se
+normaliza a portion_unit ("100 g", "250 ml", "1 taza"); si falta, se usa --default-portion. En la
+misma transacción se actualizan el índice de búsqueda y las categorías de los alimentos del lote, y
+los totales diarios de los días que registraron un alimento cuyos valores nutricionales cambiaron.
+
+Las filas inválidas no detienen la importación; el reporte guarda las primeras MAX_REPORTED_ERRORS.
+
+Uso:
+    python -m fitFlow.backend.app.services.food_import alimentos.csv.gz --errors errores.csv
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.schemas.food import FoodCreate
+from fitFlow.backend.app.services import food_categories, food_search, nutrition_rollup
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+DEFAULT_PORTION = "100 g"
+FORMATS = ("csv", "jsonl")
+KJ_PER_KCAL = 4.184
+NUTRIENT_FIELDS = ("calories_per_portion", "protein_per_portion", "fat_per_portion", "carbs_per_portion")
+
+# Columnas reconocidas (ya normalizadas: minúsculas, sin acentos, "_" como separador)
+FIELD_ALIASES = {
+    "name": ("name", "nombre", "alimento", "food_name", "product_name", "food"),
+    "description": ("description", "descripcion", "notes", "notas", "generic_name"),
+    "calories": ("calories", "calorias", "kcal", "energy_kcal", "energia_kcal", "energy_kcal_100g",
+                 "calories_per_portion"),
+    "energy_kj": ("energy_kj", "energia_kj", "kj", "energy_kj_100g", "energy_100g"),
+    "protein": ("protein", "proteina", "proteinas", "protein_g", "proteins_100g", "protein_per_portion"),
+    "fat": ("fat", "grasa", "grasas", "lipidos", "total_fat", "fat_g", "fat_100g", "fat_per_portion"),
+    "carbs": ("carbs", "carbohidratos", "hidratos_de_carbono", "carbohydrates", "carbohydrate", "carbs_g",
+              "carbohydrates_100g", "carbs_per_portion"),
+    "portion_amount": ("portion_amount", "portion_size", "porcion", "cantidad", "serving_size", "serving_amount"),
+    "portion_unit": ("portion_unit", "unidad", "unit", "serving_unit", "serving_size_unit"),
+}
+
+# Unidad de entrada (normalizada) -> (unidad de portion_unit, factor de conversión)
+UNITS = {}
+for _canonical, _factor, _aliases in (
+    ("g", 1, ("g", "gr", "grs", "gramo", "gramos", "gram", "grams")),
+    ("g", 1000, ("kg", "kilo", "kilos", "kilogramo", "kilogramos", "kilogram", "kilograms")),
+    ("g", 0.001, ("mg", "miligramo", "miligramos", "milligram", "milligrams")),
+    ("g", 28.3495, ("oz", "onza", "onzas", "ounce", "ounces")),
+    ("g", 453.592, ("lb", "lbs", "libra", "libras", "pound", "pounds")),
+    ("ml", 1, ("ml", "mililitro", "mililitros", "milliliter", "milliliters", "millilitre", "millilitres")),
+    ("ml", 1000, ("l", "lt", "litro", "litros", "liter", "liters", "litre", "litres")),
+    ("ml", 10, ("cl",)),
+    ("ml", 100, ("dl",)),
+    ("ml", 29.5735, ("fl oz", "floz")),
+    ("taza", 1, ("taza", "tazas", "cup", "cups")),
+    ("cda", 1, ("cda", "cucharada", "cucharadas", "tbsp", "tablespoon", "tablespoons")),
+    ("cdta", 1, ("cdta", "cucharadita", "cucharaditas", "tsp", "teaspoon", "teaspoons")),
+    ("unidad", 1, ("unidad", "unidades", "u", "und", "unit", "units", "pieza", "piezas", "piece", "pieces",
+                   "pc", "pcs")),
+    ("rebanada", 1, ("rebanada", "rebanadas", "slice", "slices")),
+    ("porción", 1, ("porcion", "porciones", "racion", "raciones", "serving", "servings")),
+):
+    for _alias in _aliases:
+        UNITS[_alias] = (_canonical, _factor)
+
+_portion_pattern = re.compile(r"^\s*(\d+(?:[.,]\d+)?)?\s*([^\d(\[]*)")
+
+
+def _column_key(header: str) -> str:
+    return food_search.normalize(header).replace(" ", "_")
+
+
+def normalize_portion(amount=None, unit: Optional[str] = None, default: str = DEFAULT_PORTION) -> Tuple[str, bool]:
+    """
+    (portion_unit, reconocida): "0.5", "kg" -> "500 g"; "1 cup (240 ml)" -> "1 taza". Las unidades
+    desconocidas se conservan tal cual.
+    """
+    text = " ".join(str(part).strip() for part in (amount, unit) if part not in (None, ""))
+    if not text:
+        return default, True
+    match = _portion_pattern.match(text)
+    quantity = float(match.group(1).replace(",", ".")) if match.group(1) else 1.0
+    raw_unit = match.group(2).strip()
+    known = UNITS.get(food_search.normalize(raw_unit)) if raw_unit else None
+    if known is None:
+        return (text[:50], False) if raw_unit else (default, True)
+    canonical, factor = known
+    return f"{round(quantity * factor, 2):g} {canonical}", True
+
+
+def _number(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).strip().replace(",", "."))
+
+
+# ===== LECTURA =====
+def open_dataset(path: str) -> io.TextIOBase:
+    """Abre en modo texto, descomprimiendo si el archivo empieza con la firma de gzip"""
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == b"\x1f\x8b"
+    if compressed:
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def detect_format(path: str) -> str:
+    name = path.lower().removesuffix(".gz")
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def iter_records(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(número de fila, registro, error de lectura); en CSV el separador (, ; o tab) se toma de la cabecera"""
+    if fmt == "csv":
+        header = stream.readline()
+        delimiter = max((",", ";", "\t"), key=header.count)
+        fieldnames = next(csv.reader([header], delimiter=delimiter))
+        for number, record in enumerate(csv.DictReader(stream, fieldnames=fieldnames, delimiter=delimiter), start=2):
+            yield number, record, None
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"JSON inválido: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield number, record, None
+
+
+def resolve_columns(headers, overrides: Dict[str, str] = None) -> Dict[str, str]:
+    """campo -> columna del archivo; overrides (campo=columna) tiene prioridad sobre FIELD_ALIASES"""
+    by_key = {}
+    for header in headers:
+        by_key.setdefault(_column_key(header), header)
+    columns = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in by_key:
+                columns[field] = by_key[alias]
+                break
+    for field, header in (overrides or {}).items():
+        if field not in FIELD_ALIASES:
+            raise ValueError(f"Campo desconocido en --map: {field}")
+        columns[field] = header
+    return columns
+
+
+# ===== IMPORTACIÓN =====
+def _upsert_statement(dialect_name: str):
+    """
+    INSERT ... ON CONFLICT (name) que actualiza los valores del alimento existente y devuelve lo
+    guardado. Se ejecuta con la lista de filas (executemany), así la sentencia se compila una vez.
+    """
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    table = Food.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={
+            "description": func.coalesce(stmt.excluded.description, table.c.description),
+            "calories_per_portion": stmt.excluded.calories_per_portion,
+            "protein_per_portion": stmt.excluded.protein_per_portion,
+            "fat_per_portion": stmt.excluded.fat_per_portion,
+            "carbs_per_portion": stmt.excluded.carbs_per_portion,
+            "portion_unit": stmt.excluded.portion_unit,
+        }
+    ).returning(table.c.food_id, table.c.name, table.c.description, table.c.protein_per_portion,
+                table.c.carbs_per_portion)
+
+
+class FoodImporter:
+    """Estado de una importación: contadores, errores reportados y ritmo"""
+
+    def __init__(self, bind=engine, batch_size: int = IMPORT_BATCH_SIZE, columns: Dict[str, str] = None,
+                 default_portion: str = DEFAULT_PORTION, progress=None):
+        self.bind = bind
+        self.batch_size = batch_size
+        self.overrides = columns or {}
+        self.default_portion = default_portion
+        self.progress = progress
+        self._columns: Dict[tuple, Dict[str, str]] = {}  # cabeceras -> campo: columna (una sola entrada en CSV)
+        self.total = 0
+        self.upserted = 0
+        self.failed = 0
+        self.merged = 0  # nombres repetidos dentro de un lote: gana la última fila
+        self.units_unrecognized = 0
+        self.errors: List[Dict] = []
+        self.started = time.perf_counter()
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / max(time.perf_counter() - self.started, 1e-9)
+
+    def _error(self, row: int, name, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "name": name, "error": message})
+
+    def columns_for(self, record: dict) -> Dict[str, str]:
+        headers = tuple(record.keys())
+        columns = self._columns.get(headers)
+        if columns is None:
+            columns = self._columns[headers] = resolve_columns(headers, self.overrides)
+        return columns
+
+    def parse(self, record: dict, columns: Dict[str, str]) -> dict:
+        """Fila del archivo -> valores de Food validados con FoodCreate"""
+        def value(field):
+            return record.get(columns[field]) if field in columns else None
+
+        protein = _number(value("protein")) or 0.0
+        fat = _number(value("fat")) or 0.0
+        carbs = _number(value("carbs")) or 0.0
+        calories = _number(value("calories"))
+        if calories is None:
+            kilojoules = _number(value("energy_kj"))
+            # Sin energía declarada se estima con los factores de Atwater (4/4/9 kcal por gramo)
+            calories = kilojoules / KJ_PER_KCAL if kilojoules is not None else 4 * protein + 4 * carbs + 9 * fat
+        portion_unit, recognized = normalize_portion(value("portion_amount"), value("portion_unit"),
+                                                     self.default_portion)
+        if not recognized:
+            self.units_unrecognized += 1
+
+        description = str(value("description") or "").strip()
+        food = FoodCreate(name=str(value("name") or "").strip(), description=description[:255] or None,
+                          calories_per_portion=round(calories, 2), protein_per_portion=round(protein, 2),
+                          fat_per_portion=round(fat, 2), carbs_per_portion=round(carbs, 2), portion_unit=portion_unit)
+        return food.model_dump()
+
+    def _flush(self, rows: Dict[str, dict]):
+        if rows:
+            with self.bind.begin() as conn:
+                # Valores anteriores de los que ya existen: solo se recalculan totales si cambian
+                previous = {name: values for name, *values in conn.execute(
+                    select(Food.name, *(getattr(Food, field) for field in NUTRIENT_FIELDS))
+                    .where(Food.name.in_(list(rows))))}
+                saved = conn.execute(_upsert_statement(conn.dialect.name), list(rows.values())).all()
+                changed = [food_id for food_id, name, _, _, _ in saved if name in previous
+                           and previous[name] != [rows[name][field] for field in NUTRIENT_FIELDS]]
+                nutrition_rollup.refresh_foods(conn, changed)
+                food_search.index_foods(conn, [(food_id, name, description)
+                                               for food_id, name, description, _, _ in saved])
+                food_categories.assign(conn, [(food_id, name, protein, carbs)
+                                              for food_id, name, _, protein, carbs in saved])
+                bump_version(conn)
+            self.upserted += len(saved)
+        if self.progress:
+            self.progress(self)
+
+    def run(self, records) -> dict:
+        batch: Dict[str, dict] = {}
+        for number, record, read_error in records:
+            self.total += 1
+            if read_error:
+                self._error(number, None, read_error)
+                continue
+            columns = self.columns_for(record)
+            if "name" not in columns:
+                self._error(number, None, f"Sin columna de nombre entre {list(record.keys())[:10]}")
+                continue
+            try:
+                food = self.parse(record, columns)
+            except ValidationError as exc:
+                self._error(number, record.get(columns["name"]), "; ".join(
+                    f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in exc.errors()))
+                continue
+            except (ValueError, TypeError) as exc:
+                self._error(number, record.get(columns["name"]), f"Valor numérico inválido: {exc}")
+                continue
+            if food["name"] in batch:
+                self.merged += 1
+            batch[food["name"]] = food
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = {}
+        self._flush(batch)
+        if self.upserted:
+            food_catalog.invalidate()
+        return self.report()
+
+    def report(self) -> dict:
+        return {"total": self.total, "upserted": self.upserted, "failed": self.failed, "merged": self.merged,
+                "units_unrecognized": self.units_unrecognized,
+                "elapsed_s": round(time.perf_counter() - self.started, 2),
+                "rows_per_s": round(self.rows_per_second, 1), "errors": self.errors}
+
+
+def import_file(path: str, fmt: str = None, **options) -> dict:
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    with open_dataset(path) as stream:
+        return FoodImporter(**options).run(iter_records(stream, fmt))
+
+
+def _mapping(value: str) -> Tuple[str, str]:
+    field, _, header = value.partition("=")
+    if not header:
+        raise argparse.ArgumentTypeError("Use campo=columna, p.ej. name=Descripcion")
+    return field.strip(), header.strip()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de alimentos (CSV/JSONL, opcionalmente .gz)")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="por defecto, según la extensión")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--map", type=_mapping, action="append", default=[], metavar="CAMPO=COLUMNA",
+                        help=f"columna del archivo para un campo ({', '.join(FIELD_ALIASES)})")
+    parser.add_argument("--default-portion", default=DEFAULT_PORTION, help="porción si el archivo no la indica")
+    parser.add_argument("--errors", default=None, help="escribe las filas rechazadas en este CSV")
+    args = parser.parse_args(argv)
+
+    def progress(importer):
+        print(f"🚀 {importer.total} filas leídas, {importer.upserted} alimentos guardados, "
+              f"{importer.failed} con error ({importer.rows_per_second:.0f} filas/s)")
+
+    report = import_file(args.path, args.format, batch_size=args.batch_size, columns=dict(args.map),
+                         default_portion=args.default_portion, progress=progress)
+
+    if args.errors:
+        with open(args.errors, "w", encoding="utf-8", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=["row", "name", "error"])
+            writer.writeheader()
+            writer.writerows(report["errors"])
+    else:
+        for error in report["errors"][:20]:
+            print(f"❌ Fila {error['row']} ({error['name']}): {error['error']}")
+
+    if report["units_unrecognized"]:
+        print(f"⚠️ {report['units_unrecognized']} porciones con unidad no reconocida se guardaron tal cual")
+    print(f"✅ {report['upserted']} alimentos guardados de {report['total']} filas "
+          f"en {report['elapsed_s']} s ({report['rows_per_s']} filas/s)")
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
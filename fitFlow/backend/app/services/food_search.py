@@ -0,0 +1,225 @@
+"""
+Búsqueda y autocompletado de alimentos sin distinguir acentos ni mayúsculas.
+
+En SQLite el índice es la tabla FTS5 foods_fts (tokenizador trigram, rowid = food_id) con el
+nombre y la descripción ya normalizados en Python ("Atún" -> "atun"): trigram no elimina
+diacríticos. Cada palabra de 3 o más letras se busca como subcadena con MATCH; las más cortas y
+las consultas de 1-2 letras filtran por prefijo. bm25 (el nombre pesa más que la descripción) elige
+los mejores candidatos dentro del índice y entre ellos van primero los nombres que empiezan por la
+consulta; el texto del índice y la tabla foods solo se leen para esos pocos.
+
+El índice se mantiene desde la aplicación: los eventos del mapper de Food lo actualizan en la
+misma transacción, y las escrituras masivas con Core llaman a reindex() o index_foods().
+
+En otros motores no hay índice: cada palabra se busca como subcadena del nombre con LIKE (los % y _ de
+la consulta se escapan). En PostgreSQL se compara sin acentos con unaccent (extensión creada por la
+migración 11); en los demás la búsqueda distingue acentos.
+
+Uso:
+    python -m fitFlow.backend.app.services.food_search rebuild
+    python -m fitFlow.backend.app.services.food_search search atun
+"""
+import argparse
+import os
+import re
+import sys
+import unicodedata
+from typing import Iterable, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from sqlalchemy import bindparam, case, column, event, func, literal_column, select, table, text
+
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+REINDEX_BATCH_SIZE = 5000
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+RERANK_FACTOR = 5  # candidatos por bm25 que se reordenan por prefijo
+SHORT_QUERY_CANDIDATES = 500
+
+foods_fts = table("foods_fts", column("rowid"), column("name"), column("description"))
+
+_non_word = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(value: Optional[str]) -> str:
+    """Minúsculas sin acentos ni signos: "Atún en agua (lata)" -> "atun en agua lata" """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _non_word.sub(" ", stripped).strip()
+
+
+# ===== ÍNDICE =====
+def create_index(conn):
+    conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5(name, description, tokenize='trigram')"))
+
+
+def _index_rows(conn, rows: Iterable):
+    params = [{"food_id": food_id, "name": normalize(name), "description": normalize(description)}
+              for food_id, name, description in rows]
+    if params:
+        conn.execute(text("INSERT INTO foods_fts(rowid, name, description) VALUES (:food_id, :name, :description)"),
+                     params)
+
+
+def _delete_rows(conn, food_ids: List[int]):
+    conn.execute(text("DELETE FROM foods_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True)),
+                 {"ids": food_ids})
+
+
+def reindex(conn, food_ids: List[int] = None):
+    """Reindexa esos alimentos (los que ya no existen se eliminan del índice) o, sin ids, el catálogo completo"""
+    if conn.dialect.name != "sqlite":
+        return
+    if food_ids is None:
+        conn.execute(text("DELETE FROM foods_fts"))
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(Food.food_id, Food.name, Food.description)
+                .where(Food.food_id > last_id).order_by(Food.food_id).limit(REINDEX_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            _index_rows(conn, rows)
+            last_id = rows[-1][0]
+        conn.execute(text("INSERT INTO foods_fts(foods_fts) VALUES ('optimize')"))
+        return
+
+    for start in range(0, len(food_ids), REINDEX_BATCH_SIZE):
+        batch = food_ids[start:start + REINDEX_BATCH_SIZE]
+        _delete_rows(conn, batch)
+        _index_rows(conn, conn.execute(
+            select(Food.food_id, Food.name, Food.description).where(Food.food_id.in_(batch))
+        ).all())
+
+
+def index_foods(conn, rows: List):
+    """Como reindex, pero con las filas (food_id, name, description) que el llamador ya tiene"""
+    if conn.dialect.name != "sqlite":
+        return
+    for start in range(0, len(rows), REINDEX_BATCH_SIZE):
+        batch = rows[start:start + REINDEX_BATCH_SIZE]
+        _delete_rows(conn, [food_id for food_id, _, _ in batch])
+        _index_rows(conn, batch)
+
+
+@event.listens_for(Food, "after_insert")
+@event.listens_for(Food, "after_update")
+def _index_food(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM foods_fts WHERE rowid = :food_id"), {"food_id": target.food_id})
+        _index_rows(connection, [(target.food_id, target.name, target.description)])
+
+
+@event.listens_for(Food, "after_delete")
+def _unindex_food(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM foods_fts WHERE rowid = :food_id"), {"food_id": target.food_id})
+
+
+# ===== CONSULTA =====
+def _word_prefix(name, word: str):
+    return name.like(word + "%") | name.like("% " + word + "%")
+
+
+def _match_expression(words: List[str]) -> str:
+    return " AND ".join('"' + word + '"' for word in words)
+
+
+def _fallback_statement(query: str, normalized: str, limit: int, dialect: str):
+    """Sin índice: todas las palabras como subcadenas del nombre, en orden alfabético"""
+    if dialect == "postgresql":
+        name = func.lower(func.unaccent(Food.name))
+        conditions = [name.contains(word, autoescape=True) for word in normalized.split()]
+    else:
+        conditions = [Food.name.icontains(word, autoescape=True) for word in query.split()]
+    return select(Food).where(*conditions).order_by(Food.name).limit(limit)
+
+
+def search_statement(query: str, limit: int = SEARCH_DEFAULT_LIMIT, dialect: str = "sqlite"):
+    """SELECT de Food con los mejores resultados para query; None si la consulta no tiene letras ni números"""
+    normalized = normalize(query)
+    if not normalized:
+        return None
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    if dialect != "sqlite":
+        return _fallback_statement(query, normalized, limit, dialect)
+
+    words = normalized.split()
+    long_words = [word for word in words if len(word) >= 3]
+    short_words = [word for word in words if len(word) < 3]
+
+    if not long_words:
+        # Autocompletado de 1-2 letras: sin MATCH no hay bm25; de los primeros candidatos, nombres más cortos primero
+        candidates = select(foods_fts.c.rowid, foods_fts.c.name)
+        for word in short_words:
+            candidates = candidates.where(_word_prefix(foods_fts.c.name, word))
+        candidates = candidates.limit(SHORT_QUERY_CANDIDATES).subquery()
+        return (select(Food).join(candidates, candidates.c.rowid == Food.food_id)
+                .order_by(func.length(candidates.c.name), candidates.c.name).limit(limit))
+
+    # bm25 elige los mejores candidatos leyendo solo el índice; el texto se lee después, para esos pocos
+    rank = func.bm25(literal_column("foods_fts"), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+    candidates = (select(foods_fts.c.rowid, rank.label("rank"))
+                  .where(literal_column("foods_fts").op("MATCH")(_match_expression(long_words))))
+    for word in short_words:
+        # Las palabras cortas (no indexables con trigram) deben empezar alguna palabra del nombre
+        candidates = candidates.where(_word_prefix(foods_fts.c.name, word))
+    candidates = candidates.order_by(rank).limit(limit * RERANK_FACTOR).subquery()
+    indexed = foods_fts.alias("indexed")
+    # Entre los candidatos, primero los nombres que empiezan por la consulta
+    return (select(Food)
+            .join(candidates, candidates.c.rowid == Food.food_id)
+            .join(indexed, indexed.c.rowid == Food.food_id)
+            .order_by(case((indexed.c.name.like(normalized + "%"), 0), else_=1), candidates.c.rank)
+            .limit(limit))
+
+
+def search(db, query: str, limit: int = SEARCH_DEFAULT_LIMIT) -> List[Food]:
+    statement = search_statement(query, limit, db.get_bind().dialect.name)
+    return db.execute(statement).scalars().all() if statement is not None else []
+
+
+async def search_async(db, query: str, limit: int = SEARCH_DEFAULT_LIMIT) -> List[Food]:
+    statement = search_statement(query, limit, db.get_bind().dialect.name)
+    return (await db.execute(statement)).scalars().all() if statement is not None else []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice de búsqueda del catálogo de alimentos")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("rebuild", help="Reconstruye foods_fts desde la tabla foods (SQLite)")
+    search_parser = subcommands.add_parser("search", help="Prueba una búsqueda")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        if engine.dialect.name != "sqlite":
+            print("❌ El índice FTS5 solo existe en SQLite")
+            return 1
+        with engine.begin() as conn:
+            create_index(conn)
+            reindex(conn)
+            indexed = conn.execute(text("SELECT COUNT(*) FROM foods_fts")).scalar()
+        print(f"✅ Índice reconstruido: {indexed} alimentos")
+        return 0
+
+    from sqlalchemy.orm import Session
+
+    with Session(engine) as db:
+        for food in search(db, args.query, args.limit):
+            print(f"🔍 {food.food_id}: {food.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
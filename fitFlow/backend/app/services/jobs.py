@@ -0,0 +1,281 @@
+"""
+Trabajos en segundo plano (generación de planes larga, fuera del timeout HTTP).
+
+submit() guarda el registro en la tabla jobs, encola la función en un pool de JOB_WORKERS hilos y
+devuelve el job_id; GET /jobs/{job_id} lee el registro, así que cualquier réplica puede responder.
+Con JOB_MAX_DEPTH trabajos en cola o en curso en este proceso se rechaza con JobQueueFull (503).
+
+La función recibe un JobContext para informar el avance y comprobar la cancelación, que es
+cooperativa (un trabajo todavía en cola se descarta sin ejecutarse). Un hilo de latido renueva
+heartbeat_at de los trabajos de este proceso cada JOB_HEARTBEAT_SECONDS y recoge las cancelaciones
+pedidas desde otra réplica. Un trabajo activo sin latido durante JOB_ORPHAN_AFTER_SECONDS (pod
+reiniciado o caído) se marca como orphaned al consultarlo o al arrancar la aplicación.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select, update
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge, Histogram
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.job import ACTIVE_STATUSES, Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL_SECONDS = 1.0  # escrituras de avance como mucho una vez por segundo y trabajo
+
+JOBS_PENDING = Gauge("fitflow_jobs_pending", "Trabajos en cola o en curso en este proceso")
+JOBS_REJECTED = Counter("fitflow_jobs_rejected_total", "Trabajos rechazados por cola llena", ["kind"])
+JOBS_FINISHED = Counter("fitflow_jobs_finished_total", "Trabajos terminados por estado", ["kind", "status"])
+JOB_WAIT = Histogram("fitflow_job_wait_seconds", "Espera en cola de los trabajos", ["kind"])
+JOB_DURATION = Histogram("fitflow_job_duration_seconds", "Duración de los trabajos", ["kind"])
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def instance_id() -> str:
+    # Se calcula en cada llamada: los workers de uvicorn se crean después de importar el módulo
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _to_json(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+class JobContext:
+    """Lo que ve la función de un trabajo: su id, el avance y la cancelación"""
+    __slots__ = ("job_id", "_queue", "_cancel", "_written_at")
+
+    def __init__(self, queue: "JobQueue", job_id: str, cancel: threading.Event):
+        self.job_id = job_id
+        self._queue = queue
+        self._cancel = cancel
+        self._written_at = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self):
+        """Lanza JobCancelled si se pidió cancelar; llamarla entre pasos del trabajo"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, fraction: float, message: str = None):
+        """Avance entre 0 y 1 (y comprobación de cancelación)"""
+        self.check()
+        now = time.monotonic()
+        if now - self._written_at < PROGRESS_INTERVAL_SECONDS and fraction < 1:
+            return
+        self._written_at = now
+        values = {"progress": round(min(max(fraction, 0.0), 1.0), 4), "heartbeat_at": datetime.utcnow()}
+        if message is not None:
+            values["message"] = message[:255]
+        self._queue._update(self.job_id, **values)
+
+
+class JobQueue:
+    """Pool acotado de trabajos con registro persistente"""
+
+    def __init__(self, bind=engine, workers: int = None, max_depth: int = None):
+        self.bind = bind
+        self.workers = workers or config.JOB_WORKERS
+        self.max_depth = max_depth or config.JOB_MAX_DEPTH
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._active: Dict[str, list] = {}  # job_id -> [future, evento de cancelación, kind]
+        self._stopped = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    # ----- registro -----
+    def _update(self, job_id: str, **values):
+        with self.bind.begin() as conn:
+            conn.execute(update(Job).where(Job.job_id == job_id).values(**values))
+
+    def _release(self, job_id: str):
+        with self._lock:
+            self._active.pop(job_id, None)
+            JOBS_PENDING.set(len(self._active))
+
+    # ----- envío y ejecución -----
+    def submit(self, kind: str, fn: Callable[[JobContext], Any], params: Dict = None,
+               owner_id: int = None) -> str:
+        """Registra y encola fn(ctx); su valor de retorno (serializable a JSON) queda como resultado"""
+        job_id = uuid.uuid4().hex
+        cancel = threading.Event()
+        with self._lock:
+            if len(self._active) >= self.max_depth:
+                JOBS_REJECTED.inc(kind=kind)
+                raise JobQueueFull(f"{len(self._active)} trabajos pendientes")
+            self._active[job_id] = [None, cancel, kind]
+            JOBS_PENDING.set(len(self._active))
+        try:
+            now = datetime.utcnow()
+            with self.bind.begin() as conn:
+                conn.execute(insert(Job).values(
+                    job_id=job_id, kind=kind, status=JobStatus.queued, owner_id=owner_id,
+                    params=_to_json(params), progress=0.0, cancel_requested=False, instance=instance_id(),
+                    created_at=now, heartbeat_at=now))
+            future = self._executor.submit(self._run, job_id, kind, fn, cancel, time.perf_counter())
+        except BaseException:
+            self._release(job_id)
+            raise
+        with self._lock:
+            if job_id in self._active:  # puede haber terminado ya
+                self._active[job_id][0] = future
+        self._start_heartbeat()
+        return job_id
+
+    def _run(self, job_id: str, kind: str, fn, cancel: threading.Event, submitted: float):
+        started = time.perf_counter()
+        JOB_WAIT.observe(started - submitted, kind=kind)
+        status, values = JobStatus.succeeded, {}
+        try:
+            if cancel.is_set():
+                raise JobCancelled()
+            self._update(job_id, status=JobStatus.running, started_at=datetime.utcnow(),
+                         heartbeat_at=datetime.utcnow())
+            values = {"result": _to_json(fn(JobContext(self, job_id, cancel))), "progress": 1.0}
+        except JobCancelled:
+            status, values = JobStatus.cancelled, {"message": "Cancelado"}
+        except Exception as exc:
+            # HTTPException de los endpoints: se conserva su código y detalle
+            status = JobStatus.failed
+            values = {"error": str(getattr(exc, "detail", exc)), "error_status": getattr(exc, "status_code", 500)}
+            if values["error_status"] >= 500:
+                logger.exception("Trabajo %s (%s) fallido", job_id, kind)
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - started, kind=kind)
+            JOBS_FINISHED.inc(kind=kind, status=status.value)
+            try:
+                now = datetime.utcnow()
+                self._update(job_id, status=status, finished_at=now, heartbeat_at=now, **values)
+            except Exception:
+                logger.exception("No se pudo guardar el estado final del trabajo %s", job_id)
+            self._release(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Pide cancelar un trabajo activo (de este proceso o de otra réplica); False si ya terminó"""
+        with self._lock:
+            entry = self._active.get(job_id)
+        if entry:
+            future, event, kind = entry
+            event.set()
+            if future is not None and future.cancel():  # todavía en cola: no llega a ejecutarse
+                self._release(job_id)
+                JOBS_FINISHED.inc(kind=kind, status=JobStatus.cancelled.value)
+                self._update(job_id, status=JobStatus.cancelled, finished_at=datetime.utcnow(),
+                             message="Cancelado antes de empezar")
+                return True
+        with self.bind.begin() as conn:
+            requested = conn.execute(
+                update(Job).where(Job.job_id == job_id, Job.status.in_(ACTIVE_STATUSES))
+                .values(cancel_requested=True)
+            ).rowcount
+        return bool(requested or entry)
+
+    # ----- latido y huérfanos -----
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None or not self._heartbeat.is_alive():
+                self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stopped.wait(config.JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                events = {job_id: entry[1] for job_id, entry in self._active.items()}
+            if not events:
+                continue
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(update(Job).where(Job.job_id.in_(events), Job.status.in_(ACTIVE_STATUSES))
+                                 .values(heartbeat_at=datetime.utcnow()))
+                    for job_id in conn.execute(select(Job.job_id).where(Job.job_id.in_(events),
+                                                                        Job.cancel_requested)).scalars():
+                        events[job_id].set()
+            except Exception:
+                logger.warning("No se pudo renovar el latido de los trabajos", exc_info=True)
+
+    def mark_orphans(self, job_id: str = None) -> int:
+        """Marca como orphaned los trabajos activos sin latido reciente (o solo job_id); devuelve cuántos"""
+        now = datetime.utcnow()
+        statement = update(Job).where(
+            Job.status.in_(ACTIVE_STATUSES),
+            Job.heartbeat_at < now - timedelta(seconds=config.JOB_ORPHAN_AFTER_SECONDS))
+        if job_id is not None:
+            statement = statement.where(Job.job_id == job_id)
+        with self._lock:
+            local = list(self._active)
+        if local:
+            statement = statement.where(Job.job_id.notin_(local))
+        with self.bind.begin() as conn:
+            return conn.execute(statement.values(
+                status=JobStatus.orphaned, finished_at=now,
+                message="La instancia que lo ejecutaba dejó de responder")).rowcount
+
+    # ----- consulta -----
+    @staticmethod
+    def describe(job: Job) -> Dict:
+        return {
+            "job_id": job.job_id,
+            "kind": job.kind,
+            "status": job.status.value,
+            "progress": job.progress,
+            "message": job.message,
+            "owner_id": job.owner_id,
+            "instance": job.instance,
+            "cancel_requested": job.cancel_requested,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "error_status": job.error_status,
+        }
+
+    def get(self, db, job_id: str) -> Optional[Job]:
+        """Registro del trabajo, marcándolo como orphaned si su instancia dejó de dar señales"""
+        job = db.get(Job, job_id)
+        if job is not None and job.status in ACTIVE_STATUSES and job.heartbeat_at < (
+                datetime.utcnow() - timedelta(seconds=config.JOB_ORPHAN_AFTER_SECONDS)):
+            if self.mark_orphans(job_id):
+                db.refresh(job)
+        return job
+
+    def for_owner(self, db, owner_id: int, limit: int = 20) -> List[Job]:
+        return db.execute(select(Job).where(Job.owner_id == owner_id)
+                          .order_by(Job.created_at.desc()).limit(limit)).scalars().all()
+
+    def shutdown(self):
+        """Descarta lo que sigue en cola y marca como orphaned los trabajos de este proceso"""
+        self._stopped.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            local = list(self._active)
+        if not local:
+            return
+        try:
+            with self.bind.begin() as conn:
+                conn.execute(update(Job).where(Job.job_id.in_(local), Job.status.in_(ACTIVE_STATUSES)).values(
+                    status=JobStatus.orphaned, finished_at=datetime.utcnow(), message="Servidor detenido"))
+        except Exception:
+            logger.warning("No se pudieron marcar los trabajos pendientes al detener el servidor", exc_info=True)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,108 @@
+"""
+Representación columnar de los valores nutricionales del catálogo.
+
+Un arreglo float64 contiguo por nutriente (calorías, proteína, grasa, carbohidratos por porción) y
+un índice food_id -> fila. Los totales de lotes (food_ids, porciones) se calculan vectorizados en
+lugar de recorrer objetos Food atributo por atributo. La matriz se reconstruye (una consulta) cuando
+cambia la versión compartida de services/food_catalog.py, así que sigue las altas, cambios y borrados
+hechos en cualquier réplica.
+"""
+import threading
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+from fitFlow.backend.app.core.metrics import Counter
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services.food_catalog import food_catalog
+
+NUTRIENTS = ("calories", "protein", "fat", "carbs")
+
+MATRIX_REBUILDS = Counter("fitflow_nutrient_matrix_rebuilds_total", "Reconstrucciones de la matriz de nutrientes")
+
+_columns_statement = select(Food.food_id, Food.calories_per_portion, Food.protein_per_portion,
+                            Food.fat_per_portion, Food.carbs_per_portion).order_by(Food.food_id)
+
+
+class NutrientMatrix:
+    __slots__ = ("version", "food_ids", "index", "values", "calories", "protein", "fat", "carbs")
+
+    def __init__(self, version: int, rows: Sequence):
+        self.version = version
+        self.food_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        self.index: Dict[int, int] = {food_id: position for position, food_id in enumerate(self.food_ids.tolist())}
+        # Una fila por nutriente: cada nutriente queda contiguo en memoria
+        self.values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), 4).T.copy()
+        self.calories, self.protein, self.fat, self.carbs = self.values
+
+    @classmethod
+    def from_arrays(cls, version: int, food_ids: np.ndarray, values: np.ndarray) -> "NutrientMatrix":
+        """Matriz sobre arreglos ya construidos (p. ej. en memoria compartida), sin copiarlos"""
+        matrix = cls.__new__(cls)
+        matrix.version = version
+        matrix.food_ids = food_ids
+        matrix.index = {food_id: position for position, food_id in enumerate(food_ids.tolist())}
+        matrix.values = values
+        matrix.calories, matrix.protein, matrix.fat, matrix.carbs = values
+        return matrix
+
+    def __len__(self):
+        return len(self.food_ids)
+
+    def rows(self, food_ids: Iterable[int]) -> np.ndarray:
+        """Filas de esos alimentos (KeyError si alguno no existe)"""
+        return np.fromiter((self.index[food_id] for food_id in food_ids), dtype=np.intp)
+
+    def totals(self, food_ids: Sequence[int], portions: Sequence[float]) -> Dict[str, float]:
+        """Suma de calories/protein/fat/carbs de las porciones indicadas"""
+        if not len(food_ids):
+            return dict.fromkeys(NUTRIENTS, 0.0)
+        sums = self.values[:, self.rows(food_ids)] @ np.asarray(portions, dtype=np.float64)
+        return dict(zip(NUTRIENTS, sums.tolist()))
+
+    def totals_by(self, food_ids: Sequence[int], portions: Sequence[float], groups: Sequence) -> Dict[object, Dict]:
+        """Como totals, agrupando por groups (p. ej. tipo de comida o fecha) en una sola pasada"""
+        positions: Dict[object, int] = {}
+        inverse = np.fromiter((positions.setdefault(group, len(positions)) for group in groups), dtype=np.intp)
+        weighted = self.values[:, self.rows(food_ids)] * np.asarray(portions, dtype=np.float64)
+        sums = np.zeros((len(NUTRIENTS), len(positions)))
+        for nutrient in range(len(NUTRIENTS)):
+            sums[nutrient] = np.bincount(inverse, weights=weighted[nutrient], minlength=len(positions))
+        return {group: dict(zip(NUTRIENTS, sums[:, position].tolist())) for group, position in positions.items()}
+
+
+class NutrientMatrixCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix: Optional[NutrientMatrix] = None
+
+    def _current(self, version: int) -> Optional[NutrientMatrix]:
+        matrix = self._matrix
+        return matrix if matrix is not None and matrix.version == version else None
+
+    def _store(self, version: int, rows) -> NutrientMatrix:
+        matrix = NutrientMatrix(version, rows)
+        MATRIX_REBUILDS.inc()
+        with self._lock:
+            # Si el catálogo cambió mientras se leía, se usa esta vez pero no se guarda
+            if version == food_catalog.version:
+                self._matrix = matrix
+        return matrix
+
+    def get(self, db) -> NutrientMatrix:
+        version = food_catalog.revalidate(db)
+        matrix = self._current(version)
+        if matrix is not None:
+            return matrix
+        return self._store(version, db.execute(_columns_statement).all())
+
+    async def get_async(self, db) -> NutrientMatrix:
+        version = await food_catalog.revalidate_async(db)
+        matrix = self._current(version)
+        if matrix is not None:
+            return matrix
+        return self._store(version, (await db.execute(_columns_statement)).all())
+
+
+nutrient_matrix = NutrientMatrixCache()
@@ -0,0 +1,170 @@
+"""
+Mantenimiento de la tabla daily_nutrition_totals.
+
+Los totales se actualizan en la misma transacción que inserta o elimina los food_logs, con los
+valores nutricionales del alimento en el momento del registro; si después cambian los valores de un
+alimento, refresh_foods recalcula en la misma transacción los días que lo registraron. El comando
+rebuild los recalcula desde los registros crudos, por lotes de usuarios:
+
+    python -m fitFlow.backend.app.services.nutrition_rollup rebuild
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models import user, client, nutritionist, admin, nutrition_plan  # noqa: F401 (registra los modelos)
+from fitFlow.backend.app.models.daily_nutrition_total import DailyNutritionTotal
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.food_log import FoodLog
+
+REBUILD_BATCH_USERS = 500
+
+
+def _upsert_statement(dialect_name: str, rows: List[Dict]):
+    """INSERT ... ON CONFLICT que suma los incrementos a los totales existentes"""
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = dialect_insert(DailyNutritionTotal).values(rows)
+    table = DailyNutritionTotal.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.date, table.c.meal_type],
+        set_={
+            "calories": table.c.calories + stmt.excluded.calories,
+            "protein": table.c.protein + stmt.excluded.protein,
+            "carbs": table.c.carbs + stmt.excluded.carbs,
+            "fat": table.c.fat + stmt.excluded.fat,
+            "log_count": table.c.log_count + stmt.excluded.log_count,
+        }
+    )
+
+
+def add_food_logs(db: Session, user_id: int, entries: Iterable[Dict], foods: Dict[int, Food] = None):
+    """
+    Suma a los totales diarios los registros nuevos. entries son dicts con food_id, date,
+    meal_type y portion_size. foods permite reutilizar alimentos ya cargados por el llamador.
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    if foods is None:
+        food_ids = {entry["food_id"] for entry in entries}
+        foods = {f.food_id: f for f in db.query(Food).filter(Food.food_id.in_(food_ids)).all()}
+
+    totals = defaultdict(lambda: {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "log_count": 0})
+    for entry in entries:
+        food = foods[entry["food_id"]]
+        portion = entry["portion_size"]
+        bucket = totals[(entry["date"], entry["meal_type"])]
+        bucket["calories"] += food.calories_per_portion * portion
+        bucket["protein"] += food.protein_per_portion * portion
+        bucket["carbs"] += food.carbs_per_portion * portion
+        bucket["fat"] += food.fat_per_portion * portion
+        bucket["log_count"] += 1
+
+    rows = [
+        {"user_id": user_id, "date": log_date, "meal_type": meal_type, **values}
+        for (log_date, meal_type), values in totals.items()
+    ]
+    db.execute(_upsert_statement(db.get_bind().dialect.name, rows))
+
+
+def remove_day(db: Session, user_id: int, log_date: date):
+    """Elimina los totales de un día cuyos registros se borraron por completo"""
+    db.execute(delete(DailyNutritionTotal).where(
+        DailyNutritionTotal.user_id == user_id,
+        DailyNutritionTotal.date == log_date
+    ))
+
+
+_AGGREGATED_COLUMNS = ["user_id", "date", "meal_type", "calories", "protein", "carbs", "fat", "log_count"]
+
+
+def _aggregated_logs():
+    return select(
+        FoodLog.user_id,
+        FoodLog.date,
+        FoodLog.meal_type,
+        func.sum(Food.calories_per_portion * FoodLog.portion_size),
+        func.sum(Food.protein_per_portion * FoodLog.portion_size),
+        func.sum(Food.carbs_per_portion * FoodLog.portion_size),
+        func.sum(Food.fat_per_portion * FoodLog.portion_size),
+        func.count(FoodLog.log_id),
+    ).join(Food, Food.food_id == FoodLog.food_id).group_by(FoodLog.user_id, FoodLog.date, FoodLog.meal_type)
+
+
+def refresh_foods(db, food_ids: Iterable[int]) -> int:
+    """
+    Recalcula los totales de los (usuario, día) que registraron alguno de estos alimentos, tras
+    cambiar sus valores nutricionales. Usa la transacción del llamador (Session o Connection); con
+    una Session, los cambios de los alimentos deben estar ya enviados (flush).
+    """
+    food_ids = list(food_ids)
+    if not food_ids:
+        return 0
+    affected = select(FoodLog.user_id, FoodLog.date).where(FoodLog.food_id.in_(food_ids)).distinct()
+    db.execute(delete(DailyNutritionTotal).where(
+        tuple_(DailyNutritionTotal.user_id, DailyNutritionTotal.date).in_(affected)
+    ))
+    return db.execute(insert(DailyNutritionTotal).from_select(
+        _AGGREGATED_COLUMNS, _aggregated_logs().where(tuple_(FoodLog.user_id, FoodLog.date).in_(affected))
+    )).rowcount
+
+
+def user_batches(conn, batch_users: int = REBUILD_BATCH_USERS):
+    """Rangos (primer, último) user_id con registros, de batch_users usuarios cada uno"""
+    user_ids = conn.execute(select(FoodLog.user_id).distinct().order_by(FoodLog.user_id)).scalars().all()
+    for start in range(0, len(user_ids), batch_users):
+        yield user_ids[start], user_ids[min(start + batch_users, len(user_ids)) - 1]
+
+
+def rebuild_users(conn, low: int, high: int) -> int:
+    """Recalcula con un INSERT ... SELECT los totales de los usuarios en [low, high]"""
+    conn.execute(delete(DailyNutritionTotal).where(DailyNutritionTotal.user_id.between(low, high)))
+    result = conn.execute(insert(DailyNutritionTotal).from_select(
+        _AGGREGATED_COLUMNS, _aggregated_logs().where(FoodLog.user_id.between(low, high))
+    ))
+    return result.rowcount
+
+
+def rebuild(bind=engine, batch_users: int = REBUILD_BATCH_USERS) -> int:
+    """Recalcula todos los totales desde food_logs, un lote de usuarios por transacción"""
+    with bind.connect() as conn:
+        batches = list(user_batches(conn, batch_users))
+
+    rebuilt = 0
+    for low, high in batches:
+        # Borrado e inserción del lote en la misma transacción: nunca se ven totales a medias
+        with bind.begin() as conn:
+            rebuilt += rebuild_users(conn, low, high)
+
+    # Totales de usuarios que ya no tienen registros
+    with bind.begin() as conn:
+        conn.execute(delete(DailyNutritionTotal).where(
+            DailyNutritionTotal.user_id.not_in(select(FoodLog.user_id).distinct())
+        ))
+    return rebuilt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totales nutricionales diarios")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subcommands.add_parser("rebuild", help="Recalcula los totales desde food_logs")
+    rebuild_parser.add_argument("--batch-users", type=int, default=REBUILD_BATCH_USERS)
+    args = parser.parse_args(argv)
+
+    rows = rebuild(batch_users=args.batch_users)
+    print(f"✅ {rows} totales diarios recalculados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
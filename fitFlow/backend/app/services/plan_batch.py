@@ -0,0 +1,304 @@
+"""
+Generación de planes para toda la cartera de un nutricionista.
+
+Los clientes se reparten en un pool de procesos. La matriz de nutrientes y las categorías se publican
+una vez en memoria compartida y cada proceso las adjunta al arrancar, sin copiarlas: las tareas
+solo llevan el client_id y sus objetivos. Las fechas ya ocupadas se consultan una vez para toda la
+cartera, y los resultados se guardan en transacciones de PLAN_BATCH_CHUNK_SIZE clientes (dos INSERT
+de varias filas cada una). El reporte indica el resultado de cada cliente y el rendimiento.
+
+Cartera: los client_id indicados o, por defecto, los clientes con algún plan del nutricionista.
+
+Uso:
+    python -m fitFlow.backend.app.services.plan_batch --nutritionist-id 7 --start 2025-06-02 --days 7
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models import user, nutritionist, admin, food, nutrition_plan_meal  # noqa: F401 (registra los modelos)
+from fitFlow.backend.app.models.client import Client
+from fitFlow.backend.app.models.food_category import Category
+from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
+from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal
+from fitFlow.backend.app.services import plan_optimizer
+from fitFlow.backend.app.services.food_categories import CategorySets, category_sets
+from fitFlow.backend.app.services.nutrient_matrix import NutrientMatrix, nutrient_matrix
+
+PLAN_COLUMNS = ("user_id", "nutritionist_id", "plan_date", "name", "description")
+
+
+def insert_plans(db, plans: Sequence[Dict]) -> Dict[Tuple[int, date], int]:
+    """Inserta planes (PLAN_COLUMNS más meals) y sus comidas con dos INSERT de varias filas, dentro de la
+    transacción del llamador (Session o Connection). Devuelve plan_id por (user_id, plan_date)."""
+    if not plans:
+        return {}
+    # RETURNING sin orden garantizado en un solo INSERT: se asocia por (user_id, plan_date), que es único
+    created = {(user_id, plan_date): plan_id for user_id, plan_date, plan_id in db.execute(
+        insert(NutritionPlan).returning(NutritionPlan.user_id, NutritionPlan.plan_date, NutritionPlan.plan_id),
+        [{column: plan[column] for column in PLAN_COLUMNS} for plan in plans]
+    )}
+    meals = [{"plan_id": created[(plan["user_id"], plan["plan_date"])], **meal}
+             for plan in plans for meal in plan["meals"]]
+    if meals:
+        db.execute(insert(NutritionPlanMeal), meals)
+    return created
+
+
+# ===== CATÁLOGO EN MEMORIA COMPARTIDA =====
+class SharedCatalog:
+    """Publica los arreglos de la matriz y los food_id por categoría en bloques de memoria compartida.
+    handle es lo único que viaja a los procesos (nombres, formas y desplazamientos)."""
+
+    def __init__(self, matrix: NutrientMatrix, categories: CategorySets):
+        members = [categories[category] for category in Category]
+        offsets = np.cumsum([0] + [len(ids) for ids in members]).tolist()
+        arrays = {
+            "food_ids": matrix.food_ids,
+            "values": matrix.values,
+            "members": np.fromiter((food_id for ids in members for food_id in ids), dtype=np.int64,
+                                   count=offsets[-1]),
+        }
+        self._blocks = []
+        self.handle = {"version": matrix.version, "offsets": offsets, "arrays": {}}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.handle["arrays"][name] = (block.name, array.shape, array.dtype.str)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+    @staticmethod
+    def attach(handle: Dict) -> Tuple[NutrientMatrix, CategorySets, list]:
+        """(matriz, categorías, bloques); los bloques deben seguir abiertos mientras se usen los arreglos"""
+        blocks, arrays = [], {}
+        for name, (block_name, shape, dtype) in handle["arrays"].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        offsets = handle["offsets"]
+        members = {category: arrays["members"][offsets[i]:offsets[i + 1]].tolist()
+                   for i, category in enumerate(Category)}
+        return (NutrientMatrix.from_arrays(handle["version"], arrays["food_ids"], arrays["values"]),
+                CategorySets.from_members(handle["version"], members), blocks)
+
+
+_worker_catalog = None
+
+
+def _init_worker(handle: Dict):
+    global _worker_catalog
+    _worker_catalog = SharedCatalog.attach(handle)
+
+
+def _solve_client(task) -> Tuple[int, Optional[list], Optional[str]]:
+    """(client_id, [(meals, feasible)] por fecha, error); los errores no interrumpen el lote"""
+    client_id, targets, days, variety_days = task
+    matrix, categories, _ = _worker_catalog
+    try:
+        solutions = plan_optimizer.solve_days(matrix, categories, plan_optimizer.PlanTargets(*targets), days,
+                                              variety_days=variety_days)
+    except Exception as exc:
+        return client_id, None, f"Error del optimizador: {exc}"
+    if days and not solutions:
+        return client_id, None, "No hay alimentos disponibles"
+    return client_id, [(solution.meals, solution.feasible) for solution in solutions], None
+
+
+# ===== LOTE =====
+class PlanBatch:
+    """Estado de una generación por cartera: resultado por cliente y contadores"""
+
+    def __init__(self, nutritionist_id: int, start: date, days: int = 7, bind=engine,
+                 processes: int = None, chunk_size: int = None, variety_days: int = None, progress=None,
+                 mp_context=None):
+        self.nutritionist_id = nutritionist_id
+        self.start = start
+        self.days = days
+        self.bind = bind
+        self.processes = processes or config.PLAN_BATCH_PROCESSES
+        self.chunk_size = chunk_size or config.PLAN_BATCH_CHUNK_SIZE
+        self.variety_days = variety_days
+        self.progress = progress
+        self.mp_context = mp_context  # "spawn" desde un proceso con hilos (la API), por defecto el del sistema
+        self.results: Dict[int, Dict] = {}
+        self.plans_created = 0
+
+    @property
+    def dates(self) -> List[date]:
+        return [self.start + timedelta(days=offset) for offset in range(self.days)]
+
+    def caseload(self, client_ids: Optional[Iterable[int]] = None) -> List[int]:
+        if client_ids is not None:
+            return sorted(set(client_ids))
+        with self.bind.connect() as conn:
+            return conn.execute(
+                select(NutritionPlan.user_id).where(NutritionPlan.nutritionist_id == self.nutritionist_id)
+                .distinct().order_by(NutritionPlan.user_id)
+            ).scalars().all()
+
+    def _result(self, client_id: int, status: str, **details):
+        self.results[client_id] = {"client_id": client_id, "status": status, **details}
+
+    def _tasks(self, client_ids: List[int]) -> Tuple[List, Dict[int, List[date]]]:
+        """Objetivos de cada cliente y fechas libres, con una consulta de clientes y una de fechas ocupadas"""
+        with Session(self.bind) as db:
+            clients = {client.client_id: client for client in db.execute(
+                select(Client).options(joinedload(Client.user)).where(Client.client_id.in_(client_ids))
+            ).scalars()}
+            taken: Dict[int, set] = {}
+            for user_id, plan_date in db.execute(
+                    select(NutritionPlan.user_id, NutritionPlan.plan_date).where(
+                        NutritionPlan.user_id.in_(client_ids),
+                        NutritionPlan.plan_date >= self.start,
+                        NutritionPlan.plan_date <= self.dates[-1])):
+                taken.setdefault(user_id, set()).add(plan_date)
+
+            tasks, free_dates = [], {}
+            for client_id in client_ids:
+                client = clients.get(client_id)
+                if client is None:
+                    self._result(client_id, "error", error="Cliente no encontrado")
+                    continue
+                free = [day for day in self.dates if day not in taken.get(client_id, ())]
+                if not free:
+                    self._result(client_id, "skipped", plans=0, skipped_dates=len(self.dates))
+                    continue
+                try:
+                    targets = plan_optimizer.PlanTargets.for_client(client)
+                except Exception as exc:
+                    self._result(client_id, "error", error=f"Perfil incompleto: {exc}")
+                    continue
+                free_dates[client_id] = free
+                tasks.append((client_id, (targets.calories, targets.protein, targets.carbs, targets.fat),
+                              len(free), self.variety_days))
+        return tasks, free_dates
+
+    def _flush(self, chunk: List[Tuple[int, list]], free_dates: Dict[int, List[date]]):
+        """Guarda los planes de un grupo de clientes en una transacción"""
+        plans = []
+        for client_id, solutions in chunk:
+            for plan_date, (meals, _) in zip(free_dates[client_id], solutions):
+                plans.append({
+                    "user_id": client_id, "nutritionist_id": self.nutritionist_id, "plan_date": plan_date,
+                    "name": f"Plan Nutricional Automático - {plan_date}",
+                    "description": "Plan generado automáticamente para la cartera",
+                    "meals": [{"food_id": food_id, "meal_type": meal_type, "portion_size": portion}
+                              for food_id, meal_type, portion in meals],
+                })
+        try:
+            with self.bind.begin() as conn:
+                insert_plans(conn, plans)
+        except Exception as exc:
+            for client_id, _ in chunk:
+                self._result(client_id, "error", error=f"No se pudieron guardar los planes: {exc}")
+            return
+        for client_id, solutions in chunk:
+            skipped = self.days - len(solutions)
+            self._result(client_id, "created", plans=len(solutions), skipped_dates=skipped,
+                         within_tolerance=sum(feasible for _, feasible in solutions))
+            self.plans_created += len(solutions)
+        if self.progress:
+            self.progress(self)
+
+    def run(self, client_ids: Optional[Iterable[int]] = None) -> dict:
+        started = time.perf_counter()
+        client_ids = self.caseload(client_ids)
+        tasks, free_dates = self._tasks(client_ids)
+
+        if tasks:
+            with Session(self.bind) as db:
+                shared = SharedCatalog(nutrient_matrix.get(db), category_sets.get(db))
+            try:
+                processes = min(self.processes, len(tasks))
+                chunksize = max(1, len(tasks) // (processes * 4))
+                with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                         initargs=(shared.handle,), mp_context=self.mp_context) as pool:
+                    try:
+                        chunk = []
+                        for client_id, solutions, error in pool.map(_solve_client, tasks, chunksize=chunksize):
+                            if error:
+                                self._result(client_id, "error", error=error)
+                                continue
+                            chunk.append((client_id, solutions))
+                            if len(chunk) >= self.chunk_size:
+                                self._flush(chunk, free_dates)
+                                chunk = []
+                        if chunk:
+                            self._flush(chunk, free_dates)
+                    except BaseException:
+                        # Error o cancelación desde progress: no esperar a los clientes que siguen en cola
+                        pool.shutdown(cancel_futures=True)
+                        raise
+            finally:
+                shared.close()
+
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> dict:
+        results = [self.results[client_id] for client_id in sorted(self.results)]
+        statuses = [result["status"] for result in results]
+        return {
+            "clients": len(results),
+            "created": statuses.count("created"),
+            "skipped": statuses.count("skipped"),
+            "failed": statuses.count("error"),
+            "plans_created": self.plans_created,
+            "elapsed_s": round(elapsed, 2),
+            "clients_per_s": round(len(results) / elapsed, 1) if elapsed else None,
+            "plans_per_s": round(self.plans_created / elapsed, 1) if elapsed else None,
+            "results": results,
+        }
+
+
+def next_monday(today: date = None) -> date:
+    today = today or date.today()
+    return today + timedelta(days=7 - today.weekday())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera los planes de la cartera de un nutricionista")
+    parser.add_argument("--nutritionist-id", type=int, required=True)
+    parser.add_argument("--client-ids", type=int, nargs="+", default=None,
+                        help="por defecto, los clientes con algún plan del nutricionista")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="por defecto, el próximo lunes")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None, help="clientes por transacción")
+    args = parser.parse_args(argv)
+
+    def progress(batch):
+        print(f"🚀 {len(batch.results)} clientes procesados, {batch.plans_created} planes guardados")
+
+    batch = PlanBatch(args.nutritionist_id, args.start or next_monday(), args.days, processes=args.processes,
+                      chunk_size=args.chunk_size, progress=progress)
+    report = batch.run(args.client_ids)
+
+    for result in report["results"]:
+        if result["status"] == "error":
+            print(f"❌ Cliente {result['client_id']}: {result['error']}")
+    print(f"📊 {report['clients_per_s']} clientes/s, {report['plans_per_s']} planes/s en {report['elapsed_s']} s")
+    print(f"✅ {report['created']} clientes con planes nuevos, {report['skipped']} sin fechas libres, "
+          f"{report['failed']} con error")
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
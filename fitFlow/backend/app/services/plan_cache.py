@@ -0,0 +1,79 @@
+"""
+Memoización de planes generados por el optimizador.
+
+Clave: (huella del perfil, versión del catálogo, tipo de plan, fecha, semilla). La huella resume lo que
+determina los objetivos del cliente (peso, altura, edad, sexo, actividad y objetivo): editar el perfil o
+cumplir años cambia la clave sin invalidar nada. Las entradas de una versión anterior del catálogo no
+vuelven a acertarse y se descartan en cuanto aparece una versión nueva. LRU de PLAN_CACHE_SIZE entradas
+por worker; aciertos, fallos y tamaño se exportan en /metrics.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional, Tuple
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Counter, Gauge
+
+CACHE_REQUESTS = Counter("fitflow_plan_cache_requests_total", "Consultas a la caché de planes generados", ["result"])
+CACHE_SIZE = Gauge("fitflow_plan_cache_size", "Entradas en la caché de planes generados")
+
+PlanKey = Tuple[str, int, str, date, Optional[int]]
+
+
+def profile_fingerprint(client) -> str:
+    """Huella de los datos del cliente que intervienen en calculate_RCDE y get_macronutrient_targets"""
+    profile = (round(client.weight_current_kg, 3), round(client.height_cm, 3), client.calculate_age(),
+               client.user.sex.value, client.activity_level.value, client.goal.value)
+    return hashlib.blake2b(repr(profile).encode(), digest_size=8).hexdigest()
+
+
+def plan_key(client, catalog_version: int, plan_type: str, plan_date: date, seed: Optional[int]) -> PlanKey:
+    return profile_fingerprint(client), catalog_version, plan_type, plan_date, seed
+
+
+class PlanCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[PlanKey, Any]" = OrderedDict()
+        self._version = None  # versión del catálogo de las entradas guardadas
+
+    def _see_version(self, version: int):
+        """Una versión más nueva del catálogo deja obsoletas todas las entradas"""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self._entries.clear()
+                CACHE_SIZE.set(0)
+            self._version = version
+
+    def get(self, key: PlanKey) -> Optional[Any]:
+        with self._lock:
+            self._see_version(key[1])
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        CACHE_REQUESTS.inc(result="hit" if value is not None else "miss")
+        return value
+
+    def put(self, key: PlanKey, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._see_version(key[1])
+            if key[1] != self._version:  # resuelto con un catálogo que ya cambió
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_SIZE.set(0)
+
+
+plan_cache = PlanCache(config.PLAN_CACHE_SIZE)
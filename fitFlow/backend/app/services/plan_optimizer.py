@@ -0,0 +1,367 @@
+"""
+Optimizador determinista de planes diarios.
+
+Cada comida tiene huecos (lácteo, fruta, proteína...) que se llenan con alimentos de su categoría
+(services/food_categories.py). Para una elección de alimentos, las porciones se obtienen resolviendo
+mínimos cuadrados con cotas: error relativo de calorías (calculate_RCDE) y de gramos de proteína,
+carbohidratos y grasa (get_macronutrient_targets), cada uno dividido por su tolerancia, más el reparto
+de calorías entre comidas con menor peso. La elección de alimentos se mejora por búsqueda local
+(cambiar el alimento de un hueco por otro candidato) hasta no mejorar, agotar PLAN_SOLVER_MAX_EVALUATIONS
+o agotar el tiempo, y se devuelve la mejor solución encontrada; es factible si todos los errores quedan
+dentro de tolerancia. Si el tiempo cortó la búsqueda la solución queda marcada como truncated: otra
+ejecución, con otra carga en el servidor, puede llegar más lejos.
+
+Sin semilla no usa aleatoriedad: mismo catálogo y mismos objetivos producen el mismo plan salvo
+truncamiento. Con seed, los candidatos de cada hueco se muestrean con un generador propio
+(np.random.default_rng(seed)), nunca con el estado global de random, y la búsqueda se acota solo por
+evaluaciones, no por tiempo: la misma semilla reproduce el plan y otra semilla da otra variante.
+"""
+import time
+from typing import Callable, Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.metrics import Histogram
+from fitFlow.backend.app.models.food_category import Category
+from fitFlow.backend.app.services.food_categories import CategorySets
+from fitFlow.backend.app.services.nutrient_matrix import NUTRIENTS, NutrientMatrix
+
+# Reparto de calorías por comida
+MEAL_SHARES = {"Desayuno": 0.25, "Almuerzo": 0.35, "Cena": 0.30, "Snack": 0.10}
+MEAL_SHARE_TOLERANCE = 0.15  # desvío relativo del reparto que pesa como una tolerancia completa
+MEAL_SHARE_WEIGHT = 0.25  # peso del reparto frente a calorías y macros
+
+PORTION_STEP = 0.1  # las porciones se redondean a décimas, como en el resto de la aplicación
+SCREENED = 3  # candidatos por hueco que se resuelven completos tras la criba
+RIDGE = 1e-4  # regularización hacia porción 1.0: hace único el óptimo cuando hay más huecos que objetivos
+SEEDED_POOL_FACTOR = 3  # con semilla, los candidatos se muestrean entre los 3 x limit más parecidos
+
+MACROS = NUTRIENTS[1:]  # mismo orden que las filas de la matriz: proteína, grasa, carbohidratos
+KCAL_PER_GRAM = np.array([4.0, 9.0, 4.0])
+
+SOLVE_SECONDS = Histogram("fitflow_plan_solver_seconds", "Tiempo del optimizador de planes",
+                          buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+class Slot:
+    """Hueco de una comida: categorías alternativas (la primera con alimentos) y cotas de porción"""
+    __slots__ = ("meal_type", "alternatives", "min_portion", "max_portion")
+
+    def __init__(self, meal_type: str, alternatives: Sequence[Sequence[Category]],
+                 min_portion: float = 0.5, max_portion: float = 2.0):
+        self.meal_type = meal_type
+        self.alternatives = alternatives
+        self.min_portion = min_portion
+        self.max_portion = max_portion
+
+
+DAILY_SLOTS = (
+    Slot("Desayuno", [(Category.Lacteo,)]),
+    Slot("Desayuno", [(Category.Fruta,)]),
+    Slot("Desayuno", [(Category.CarbohidratoDesayuno,), (Category.Carbohidrato,)], max_portion=1.5),
+    Slot("Almuerzo", [(Category.Proteina,)]),
+    Slot("Almuerzo", [(Category.CarbohidratoAlmuerzo,), (Category.Carbohidrato,)]),
+    Slot("Almuerzo", [(Category.Verdura,)], max_portion=3.0),
+    Slot("Cena", [(Category.Proteina,)]),
+    Slot("Cena", [(Category.Verdura,)], max_portion=3.0),
+    Slot("Snack", [(Category.Fruta, Category.FrutoSeco)], max_portion=1.5),
+)
+
+
+class PlanTargets:
+    __slots__ = ("calories", "protein", "carbs", "fat")
+
+    def __init__(self, calories: float, protein: float, carbs: float, fat: float):
+        self.calories = calories
+        self.protein = protein
+        self.carbs = carbs
+        self.fat = fat
+
+    @classmethod
+    def for_client(cls, client) -> "PlanTargets":
+        macros = client.get_macronutrient_targets()
+        return cls(client.calculate_RCDE(), macros["protein_g"], macros["carbs_g"], macros["fat_g"])
+
+    def vector(self) -> np.ndarray:
+        """Objetivos en el orden de NUTRIENTS"""
+        return np.array([getattr(self, nutrient) for nutrient in NUTRIENTS], dtype=np.float64)
+
+
+class PlanSolution:
+    __slots__ = ("meals", "totals", "errors", "feasible", "evaluations", "elapsed_ms", "truncated")
+
+    def __init__(self, meals: List[Tuple[int, str, float]], totals: Dict[str, float], errors: Dict[str, float],
+                 feasible: bool, evaluations: int, elapsed_ms: float, truncated: bool = False):
+        self.meals = meals  # (food_id, meal_type, portion_size)
+        self.totals = totals
+        self.errors = errors  # error relativo con signo por nutriente
+        self.feasible = feasible
+        self.evaluations = evaluations
+        self.elapsed_ms = elapsed_ms
+        self.truncated = truncated  # la búsqueda se cortó por tiempo antes de terminar
+
+
+def _slot_members(slot: Slot, categories: CategorySets) -> Tuple[int, ...]:
+    for alternative in slot.alternatives:
+        if len(alternative) == 1:
+            members = categories[alternative[0]]
+        else:
+            members = tuple(sorted({food_id for category in alternative for food_id in categories[category]}))
+        if members:
+            return members
+    return ()
+
+
+def _energy_split(matrix: NutrientMatrix, rows: np.ndarray) -> np.ndarray:
+    """Fracción de la energía de cada alimento que aporta cada macronutriente (3 x n, orden de MACROS)"""
+    energy = matrix.values[1:, rows] * KCAL_PER_GRAM[:, None]
+    return energy / np.maximum(energy.sum(axis=0), 1e-9)
+
+
+def _smallest(values: np.ndarray, count: int) -> np.ndarray:
+    """Posiciones de los count menores, ordenadas por valor y luego por posición"""
+    if count < len(values):
+        positions = np.argpartition(values, count)[:count]
+    else:
+        positions = np.arange(len(values))
+    return positions[np.lexsort((positions, values[positions]))]
+
+
+def _candidates(matrix: NutrientMatrix, members: Sequence[int], goal_split: np.ndarray, limit: int,
+                excluded: np.ndarray, rng: Optional[np.random.Generator] = None) -> List[int]:
+    """Candidatos del hueco: los de reparto de macros más parecido al objetivo, más los más ricos en
+    cada macronutriente para que las porciones puedan corregir desequilibrios. Orden determinista; con
+    rng, los parecidos son una muestra de los SEEDED_POOL_FACTOR * limit más cercanos.
+    Los excluidos solo se descartan si quedan otros alimentos en el hueco."""
+    ids = np.asarray(members, dtype=np.int64)
+    if len(excluded):
+        allowed = ids[~np.isin(ids, excluded)]
+        if len(allowed):
+            ids = allowed
+    # food_ids de la matriz está ordenado: búsqueda binaria vectorizada en lugar del índice por alimento,
+    # descartando los que aún no estén en la matriz (categorías de una versión más nueva)
+    rows = np.minimum(np.searchsorted(matrix.food_ids, ids), len(matrix) - 1)
+    present = matrix.food_ids[rows] == ids
+    ids, rows = ids[present], rows[present]
+    split = _energy_split(matrix, rows)
+    distance = np.abs(split - goal_split[:, None]).sum(axis=0)
+    if rng is None:
+        nearest = _smallest(distance, limit)
+    else:
+        nearest = _smallest(distance, limit * SEEDED_POOL_FACTOR)
+        nearest = nearest[np.sort(rng.choice(len(nearest), size=min(limit, len(nearest)), replace=False))]
+    picked = ids[nearest].tolist()
+    richest = max(1, limit // 4)
+    for macro in range(len(MACROS)):
+        picked.extend(ids[_smallest(-split[macro], richest)].tolist())
+    return list(dict.fromkeys(picked))
+
+
+class _Problem:
+    """Mínimos cuadrados ponderados sobre los huecos activos. Cada hueco tiene una matriz de columnas,
+    una por alimento candidato; el sistema de una elección es una columna de cada hueco."""
+
+    def __init__(self, matrix: NutrientMatrix, slots: Sequence[Slot], pools: Sequence[Sequence[int]],
+                 targets: PlanTargets, calorie_tolerance: float, macro_tolerance: float):
+        self.goal = targets.vector()
+        self.tolerance = np.array([calorie_tolerance] + [macro_tolerance] * len(MACROS))
+        meal_types = list(dict.fromkeys(slot.meal_type for slot in slots))
+        shares = np.array([MEAL_SHARES.get(meal_type, 0.0) for meal_type in meal_types])
+        meal_goal = shares / max(shares.sum(), 1e-9) * self.goal[0]
+        meal_weight = np.sqrt(MEAL_SHARE_WEIGHT) / MEAL_SHARE_TOLERANCE
+        # Filas escaladas: nutriente / (objetivo * tolerancia), calorías de cada comida / su objetivo
+        row_scale = 1.0 / (np.maximum(self.goal, 1e-9) * self.tolerance)
+        meal_scale = meal_weight / np.maximum(meal_goal, 1e-9)
+        self.rhs = np.concatenate([self.goal * row_scale, np.full(len(meal_types), meal_weight)])
+        self.columns = []
+        for slot, pool in zip(slots, pools):
+            values = matrix.values[:, matrix.rows(pool)]
+            meal_rows = np.zeros((len(meal_types), len(pool)))
+            meal = meal_types.index(slot.meal_type)
+            meal_rows[meal] = values[0] * meal_scale[meal]
+            self.columns.append(np.vstack([values * row_scale[:, None], meal_rows]))
+        self.lower = np.array([slot.min_portion for slot in slots])
+        self.upper = np.array([slot.max_portion for slot in slots])
+
+    def system(self, picks: Sequence[int]) -> np.ndarray:
+        """Sistema de la elección picks (posición del alimento en el pool de cada hueco)"""
+        return np.stack([columns[:, pick] for columns, pick in zip(self.columns, picks)], axis=1)
+
+    def portions(self, system: np.ndarray) -> np.ndarray:
+        """Porciones dentro de cotas que minimizan el error (conjunto activo sobre las ecuaciones normales)"""
+        n = system.shape[1]
+        gram = system.T @ system + RIDGE * np.eye(n)
+        linear = system.T @ self.rhs + RIDGE
+        portions = np.clip(np.linalg.solve(gram, linear), self.lower, self.upper)
+        previous = None
+        for _ in range(n):
+            # Fijas: porciones en una cota hacia la que el gradiente sigue empujando
+            gradient = gram @ portions - linear
+            fixed = ((portions <= self.lower) & (gradient > 0)) | ((portions >= self.upper) & (gradient < 0))
+            free = ~fixed
+            if not free.any() or (previous is not None and (fixed == previous).all()):
+                break
+            previous = fixed
+            rows = gram[free]
+            portions[free] = np.clip(np.linalg.solve(rows[:, free], linear[free] - rows[:, fixed] @ portions[fixed]),
+                                     self.lower[free], self.upper[free])
+        return portions
+
+    def objective(self, system: np.ndarray, portions: np.ndarray) -> float:
+        residual = system @ portions - self.rhs
+        return float(residual @ residual)
+
+    def screen(self, slot: int, system: np.ndarray, portions: np.ndarray) -> np.ndarray:
+        """Error aproximado de cambiar el alimento del hueco por cada candidato, reajustando solo su
+        porción (forma cerrada, vectorizado sobre el pool)"""
+        residual = system @ portions - self.rhs - system[:, slot] * portions[slot]
+        columns = self.columns[slot]
+        norms = np.maximum((columns * columns).sum(axis=0), 1e-12)
+        best = np.clip(-(residual @ columns) / norms, self.lower[slot], self.upper[slot])
+        return ((residual[:, None] + columns * best) ** 2).sum(axis=0)
+
+    def rounded(self, system: np.ndarray, portions: np.ndarray) -> np.ndarray:
+        """Redondea a PORTION_STEP y ajusta un paso arriba/abajo por hueco mientras mejore"""
+        steps = np.round(portions / PORTION_STEP)
+        low = np.ceil(self.lower / PORTION_STEP - 1e-9)
+        high = np.floor(self.upper / PORTION_STEP + 1e-9)
+        steps = np.clip(steps, low, high)
+        best = self.objective(system, steps * PORTION_STEP)
+        improved = True
+        while improved:
+            improved = False
+            for slot in range(len(steps)):
+                for delta in (-1, 1):
+                    if not low[slot] <= steps[slot] + delta <= high[slot]:
+                        continue
+                    steps[slot] += delta
+                    score = self.objective(system, steps * PORTION_STEP)
+                    if score < best - 1e-12:
+                        best = score
+                        improved = True
+                    else:
+                        steps[slot] -= delta
+        return steps * PORTION_STEP
+
+
+def solve(matrix: NutrientMatrix, categories: CategorySets, targets: PlanTargets,
+          calorie_tolerance: Optional[float] = None, macro_tolerance: Optional[float] = None,
+          budget_ms: Optional[float] = None, candidates: Optional[int] = None,
+          slots: Sequence[Slot] = DAILY_SLOTS, excluded: Collection[int] = (),
+          seed=None, max_evaluations: Optional[int] = None) -> Optional[PlanSolution]:
+    """Mejor plan encontrado dentro del tiempo; None si el catálogo está vacío. excluded: alimentos a
+    evitar (p. ej. los de días anteriores) mientras el hueco tenga alternativas. seed: entero (o
+    secuencia de enteros) para obtener una variante reproducible del plan; con seed se ignora budget_ms
+    y la búsqueda solo se acota por max_evaluations"""
+    started = time.perf_counter()
+    calorie_tolerance = calorie_tolerance if calorie_tolerance is not None else config.PLAN_CALORIE_TOLERANCE_PCT / 100
+    macro_tolerance = macro_tolerance if macro_tolerance is not None else config.PLAN_MACRO_TOLERANCE_PCT / 100
+    budget_ms = budget_ms if budget_ms is not None else config.PLAN_SOLVER_BUDGET_MS
+    limit = candidates or config.PLAN_SOLVER_CANDIDATES
+    if max_evaluations is None:
+        max_evaluations = config.PLAN_SOLVER_MAX_EVALUATIONS
+    if max_evaluations < 1:
+        raise ValueError(f"max_evaluations debe ser al menos 1: {max_evaluations}")
+    deadline = float("inf") if seed is not None else started + budget_ms / 1000
+
+    if not len(matrix):
+        return None
+    goal_split = targets.vector()[1:] * KCAL_PER_GRAM / max(targets.calories, 1e-9)
+    excluded = np.fromiter(excluded, dtype=np.int64)
+    rng = np.random.default_rng(seed) if seed is not None else None
+
+    # Huecos con alimentos; una comida sin ninguno recurre a todo el catálogo
+    active: List[Slot] = []
+    pools: List[List[int]] = []
+    for slot in slots:
+        members = _slot_members(slot, categories)
+        if members:
+            active.append(slot)
+            pools.append(_candidates(matrix, members, goal_split, limit, excluded, rng))
+    for meal_type in dict.fromkeys(slot.meal_type for slot in slots):
+        if not any(slot.meal_type == meal_type for slot in active):
+            active.append(Slot(meal_type, []))
+            pools.append(_candidates(matrix, matrix.food_ids, goal_split, limit, excluded, rng))
+
+    problem = _Problem(matrix, active, pools, targets, calorie_tolerance, macro_tolerance)
+
+    # Solución inicial: el mejor candidato de cada hueco sin repetir alimentos
+    picks: List[int] = []
+    for pool in pools:
+        used = {pools[slot][pick] for slot, pick in enumerate(picks)}
+        picks.append(next((position for position, food_id in enumerate(pool) if food_id not in used), 0))
+    system = problem.system(picks)
+    portions = problem.portions(system)
+    best_score = problem.objective(system, portions)
+    evaluations = 1
+    truncated = False
+
+    # Búsqueda local: por hueco, se criban todos los candidatos y solo los SCREENED mejores se
+    # resuelven completos; se acepta el primero que mejora el error
+    improved = True
+    while improved and evaluations < max_evaluations:
+        if time.perf_counter() >= deadline:
+            truncated = True
+            break
+        improved = False
+        for slot, pool in enumerate(pools):
+            used = {pools[other][pick] for other, pick in enumerate(picks) if other != slot}
+            scores = problem.screen(slot, system, portions)
+            tried = 0
+            for position in np.argsort(scores, kind="stable").tolist():
+                if tried == SCREENED or evaluations >= max_evaluations:
+                    break
+                if position == picks[slot] or pool[position] in used:
+                    continue
+                tried += 1
+                trial = picks.copy()
+                trial[slot] = position
+                trial_system = problem.system(trial)
+                trial_portions = problem.portions(trial_system)
+                score = problem.objective(trial_system, trial_portions)
+                evaluations += 1
+                if score < best_score - 1e-12:
+                    picks, system, portions, best_score = trial, trial_system, trial_portions, score
+                    improved = True
+                    break
+            if evaluations >= max_evaluations:
+                break
+            if time.perf_counter() >= deadline:
+                truncated = True
+                break
+
+    portions = problem.rounded(system, portions)
+    chosen = [pool[pick] for pool, pick in zip(pools, picks)]
+    totals = matrix.totals(chosen, portions.tolist())
+    achieved = np.array([totals[nutrient] for nutrient in NUTRIENTS])
+    relative = (achieved - problem.goal) / np.maximum(problem.goal, 1e-9)
+    errors = dict(zip(NUTRIENTS, relative.round(4).tolist()))
+    feasible = bool(np.all(np.abs(relative) <= problem.tolerance + 1e-9))
+
+    elapsed = time.perf_counter() - started
+    SOLVE_SECONDS.observe(elapsed)
+    meals = [(food_id, slot.meal_type, round(float(portion), 1))
+             for food_id, slot, portion in zip(chosen, active, portions)]
+    return PlanSolution(meals, totals, errors, feasible, evaluations, round(elapsed * 1000, 2), truncated)
+
+
+def solve_days(matrix: NutrientMatrix, categories: CategorySets, targets: PlanTargets, days: int,
+               variety_days: Optional[int] = None, progress: Optional[Callable[[int, int], None]] = None,
+               seed: Optional[int] = None, **options) -> List[PlanSolution]:
+    """Planes de days días en orden: cada uno evita los alimentos de los variety_days planes anteriores.
+    Lista vacía si el catálogo está vacío. progress(resueltos, days) se llama tras cada día. Con seed,
+    cada día usa la semilla (seed, día)."""
+    variety_days = config.PLAN_VARIETY_DAYS if variety_days is None else variety_days
+    solutions: List[PlanSolution] = []
+    for day in range(days):
+        recent = {food_id for solution in solutions[max(0, day - variety_days):day]
+                  for food_id, _, _ in solution.meals}
+        solution = solve(matrix, categories, targets, excluded=recent,
+                         seed=None if seed is None else (seed, day), **options)
+        if solution is None:
+            return []
+        solutions.append(solution)
+        if progress:
+            progress(day + 1, days)
+    return solutions
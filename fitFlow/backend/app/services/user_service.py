@@ -1,5 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case
+from sqlalchemy.orm import Session, Query
 from fitFlow.backend.app.models.user import User
+from fitFlow.backend.app.models.client import Client
+from fitFlow.backend.app.models.nutritionist import Nutritionist
+from fitFlow.backend.app.models.admin import Admin
 from fitFlow.backend.app.core.security import get_password_hash
 from fitFlow.backend.app.schemas.user import UserCreate, Goal
 from fastapi import HTTPException
@@ -28,3 +32,29 @@ def register_user(user: UserCreate, db: Session):
     db.commit()
     db.refresh(new_user)
     return new_user
+
+
+# Rol del usuario en una sola consulta: outer join con las tres tablas de rol
+ROLE = case(
+    (Client.client_id.isnot(None), "Cliente"),
+    (Nutritionist.nutritionist_id.isnot(None), "Nutricionista"),
+    (Admin.admin_id.isnot(None), "Administrador"),
+    else_="Sin rol"
+).label("role")
+
+
+# Filtro equivalente a ROLE == rol, en el mismo orden de precedencia que el CASE
+ROLE_FILTERS = {
+    "Cliente": Client.client_id.isnot(None),
+    "Nutricionista": and_(Client.client_id.is_(None), Nutritionist.nutritionist_id.isnot(None)),
+    "Administrador": and_(Client.client_id.is_(None), Nutritionist.nutritionist_id.is_(None),
+                          Admin.admin_id.isnot(None)),
+    "Sin rol": and_(Client.client_id.is_(None), Nutritionist.nutritionist_id.is_(None), Admin.admin_id.is_(None)),
+}
+
+
+def with_role(query: Query) -> Query:
+    """Añade a una consulta sobre User los outer joins que necesita la columna ROLE"""
+    return query.outerjoin(Client, Client.client_id == User.user_id) \
+        .outerjoin(Nutritionist, Nutritionist.nutritionist_id == User.user_id) \
+        .outerjoin(Admin, Admin.admin_id == User.user_id)
@@ -0,0 +1,112 @@
+"""
+Benchmark: latencia y throughput de los endpoints de lectura async frente a sus equivalentes
+síncronos (threadpool + SessionLocal) con 50–500 clientes concurrentes.
+
+Requiere httpx (pip install httpx). Usa una base SQLite temporal con datos sintéticos.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_async_endpoints.py --requests 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("DB_SQLITE_PROFILE", "true")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+import httpx
+from fastapi import Depends
+from sqlalchemy.orm import Session, joinedload
+
+from fitFlow.main import app
+from fitFlow.backend.app.api.auth import get_current_user, User
+from fitFlow.backend.app.core.security import create_access_token
+from fitFlow.backend.app.database.session import Base, engine, async_engine, get_db, SessionLocal
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.nutrition_plan import NutritionPlan
+from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal, MealType
+from fitFlow.backend.app.models.user import Sex
+
+
+# ===== Handlers síncronos de referencia (implementación anterior) =====
+@app.get("/sync/foods/")
+def sync_list_foods(db: Session = Depends(get_db)):
+    return [{"food_id": f.food_id, "name": f.name} for f in db.query(Food).all()]
+
+
+@app.get("/sync/nutrition-plans/my-plans")
+def sync_my_plans(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    plans = db.query(NutritionPlan).options(
+        joinedload(NutritionPlan.meals).joinedload(NutritionPlanMeal.food)
+    ).filter(NutritionPlan.user_id == current_user.user_id).order_by(NutritionPlan.created_at.desc()).all()
+    return [{"plan_id": p.plan_id, "meals": [m.food.name for m in p.meals]} for p in plans]
+
+
+def seed(foods: int, plans: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(first_name="Bench", last_name="User", cedula="1710034065", email="bench@fitflow.ec",
+                password="x", birth_date=date(1990, 1, 1), sex=Sex.Femenino)
+    db.add(user)
+    db.add_all([Food(name=f"Alimento {i}", calories_per_portion=100 + i % 300, protein_per_portion=5,
+                     fat_per_portion=3, carbs_per_portion=12, portion_unit="g") for i in range(foods)])
+    db.flush()
+    for d in range(plans):
+        plan = NutritionPlan(user_id=user.user_id, nutritionist_id=user.user_id, name=f"Plan {d}",
+                             plan_date=date.today() + timedelta(days=d))
+        plan.meals = [NutritionPlanMeal(food_id=1 + (d * 4 + m) % foods, meal_type=list(MealType)[m % 4],
+                                        portion_size=1.0) for m in range(8)]
+        db.add(plan)
+    db.commit()
+    db.close()
+    return create_access_token({"sub": "1710034065"})
+
+
+async def hammer(client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, total: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 250, 500])
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {seed(foods=200, plans=30)}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/foods/", "/nutrition-plans/my-plans"):
+            for concurrency in args.concurrency:
+                sync_stats = await hammer(client, "/sync" + path, headers, concurrency, args.requests)
+                async_stats = await hammer(client, path, headers, concurrency, args.requests)
+                print(f"{path:28} c={concurrency:<4} sync={sync_stats} async={async_stats}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
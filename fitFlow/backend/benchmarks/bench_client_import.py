@@ -0,0 +1,100 @@
+"""
+Benchmark: alta masiva de clientes (services/client_import.py) sobre una base SQLite temporal.
+
+Genera N clientes sintéticos con cédulas ecuatorianas válidas en un CSV o NDJSON, los importa con
+el pool de procesos y mide filas por segundo. Para comparar, --baseline hashea una muestra con el
+coste de BCRYPT_ROUNDS en un solo hilo (lo que costaba registrar uno a uno) y extrapola a N.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_client_import.py --rows 10000 --processes 4 --rounds 8 --baseline
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.security import get_password_hash
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.services import client_import
+
+PASSWORD = "Secreta1!"
+FIELDS = ["first_name", "last_name", "cedula", "email", "password", "birth_date", "sex",
+          "height_cm", "weight_current_kg", "weight_goal_kg", "activity_level", "goal"]
+
+
+def cedula(i: int) -> str:
+    """Cédula válida: provincia 01-24, tercer dígito < 6 y dígito verificador calculado"""
+    base = f"{i % 24 + 1:02d}{(i // 24) % 6}{(i // 144) % 1000000:06d}"
+    total = 0
+    for position, digit in enumerate(base):
+        n = int(digit) * (2 if position % 2 == 0 else 1)
+        total += n - 9 if n > 9 else n
+    return base + str((10 - total % 10) % 10)
+
+
+def record(i: int) -> dict:
+    return {
+        "first_name": "Cliente", "last_name": str(i), "cedula": cedula(i), "email": f"cliente{i}@fitflow.ec",
+        "password": PASSWORD, "birth_date": "1990-01-01", "sex": "Femenino" if i % 2 else "Masculino",
+        "height_cm": 165, "weight_current_kg": 70, "weight_goal_kg": 65,
+        "activity_level": "Moderado", "goal": "Bajar_Peso",
+    }
+
+
+def write_file(rows: int, fmt: str) -> str:
+    path = os.path.join(_tmp, f"clientes.{fmt}")
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        if fmt == "csv":
+            out.write(",".join(FIELDS) + "\n")
+            for i in range(rows):
+                out.write(",".join(str(record(i)[field]) for field in FIELDS) + "\n")
+        else:
+            for i in range(rows):
+                out.write(json.dumps(record(i)) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--format", choices=client_import.FORMATS, default="csv")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=client_import.IMPORT_BATCH_SIZE)
+    parser.add_argument("--baseline", action="store_true", help="estima el alta secuencial con BCRYPT_ROUNDS")
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    path = write_file(args.rows, args.format)
+    processes = args.processes or config.IMPORT_HASH_PROCESSES
+    rounds = args.rounds or config.IMPORT_BCRYPT_ROUNDS
+    print(f"📊 {args.rows} filas {args.format}, {processes} procesos, coste bcrypt {rounds}, CPUs={os.cpu_count()}")
+
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", newline="") as stream:
+        report = client_import.import_file(stream, args.format, batch_size=args.batch_size,
+                                           rounds=rounds, processes=processes)
+    elapsed = time.perf_counter() - start
+    print(f"🚀 importación: {report['created']} creados, {report['failed']} con error en {elapsed:.1f} s "
+          f"({report['created'] / elapsed:.0f} filas/s)")
+
+    if args.baseline:
+        sample = 10
+        start = time.perf_counter()
+        for _ in range(sample):
+            get_password_hash(PASSWORD)
+        per_row = (time.perf_counter() - start) / sample
+        print(f"📊 secuencial con BCRYPT_ROUNDS={config.BCRYPT_ROUNDS}: {per_row * 1000:.0f} ms por fila, "
+              f"~{per_row * args.rows:.0f} s para {args.rows} filas (solo hashes)")
+    return 0 if report["created"] == args.rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark: GET /foods/ con la instantánea versionada (services/food_catalog.py) frente a la
+implementación anterior (consulta completa y serialización en cada petición) y frente a 304 con If-None-Match.
+
+Requiere httpx. Usa una base SQLite temporal.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_food_catalog.py --foods 2000 --requests 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("DB_SQLITE_PROFILE", "true")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fitFlow.main import app
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import async_engine, get_async_db, SessionLocal
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.schemas.food import FoodOut
+
+
+# ===== Listado de referencia: consulta y serialización en cada petición (implementación anterior) =====
+@app.get("/bench/foods", response_model=List[FoodOut])
+async def list_foods_uncached(db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Food))
+    return result.scalars().all()
+
+
+def seed(foods: int):
+    migrations.upgrade()
+    db = SessionLocal()
+    db.add_all([Food(name=f"Alimento {i}", description="Porción estándar", calories_per_portion=100 + i % 50,
+                     protein_per_portion=5, fat_per_portion=3, carbs_per_portion=12, portion_unit="g")
+                 for i in range(foods)])
+    db.commit()
+    db.close()
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int, headers=None) -> dict:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code in (200, 304), response.status_code
+    latencies.sort()
+    return {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2),
+        "req_per_s": round(requests / sum(latencies), 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    seed(args.foods)
+    print(f"📊 {args.foods} alimentos, {args.requests} peticiones por variante")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        etag = (await client.get("/foods/")).headers["etag"]
+        for label, path, headers in (("anterior", "/bench/foods", None),
+                                     ("snapshot", "/foods/", None),
+                                     ("304", "/foods/", {"If-None-Match": etag})):
+            print(f"{label:9} {await measure(client, path, args.requests, headers)}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
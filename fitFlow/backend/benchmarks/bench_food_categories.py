@@ -0,0 +1,101 @@
+"""
+Benchmark: selección de candidatos del generador de planes con las categorías precalculadas
+(services/food_categories.py) frente a cargar todos los Food y clasificarlos por subcadenas en cada
+petición, como hacía /nutrition-optimizer/generate.
+
+Usa una base SQLite temporal.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_food_categories.py --foods 50000 --requests 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from sqlalchemy import insert
+
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import SessionLocal, engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.food_category import Category
+from fitFlow.backend.app.services import food_categories
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+
+WORDS = ["pollo", "huevo", "atún", "salmón", "queso", "arroz", "avena", "pan", "pasta", "quinoa", "manzana",
+         "plátano", "naranja", "fresa", "brócoli", "espinaca", "zanahoria", "lechuga", "yogur", "leche",
+         "almendra", "lenteja", "tofu", "mango"]
+
+
+def seed(foods: int):
+    migrations.upgrade()
+    rng = random.Random(7)
+    rows = [{"name": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {i}",
+             "calories_per_portion": rng.uniform(20, 600), "protein_per_portion": rng.uniform(0, 40),
+             "fat_per_portion": rng.uniform(0, 30), "carbs_per_portion": rng.uniform(0, 80), "portion_unit": "100 g"}
+            for i in range(foods)]
+    with engine.begin() as conn:
+        conn.execute(insert(Food), rows)
+        bump_version(conn)
+        start = time.perf_counter()
+        food_categories.rebuild(conn)
+    return time.perf_counter() - start
+
+
+def substring_scan(db):
+    """Clasificación previa: una consulta de todo el catálogo y cinco recorridos por petición"""
+    foods = db.query(Food).all()
+    proteins = [f for f in foods if any(
+        word in f.name.lower() for word in ['pollo', 'huevo', 'atún', 'salmón', 'queso']) or f.protein_per_portion > 15]
+    carbs = [f for f in foods if any(
+        word in f.name.lower() for word in ['arroz', 'avena', 'pan', 'pasta', 'quinoa']) or f.carbs_per_portion > 15]
+    fruits = [f for f in foods if any(word in f.name.lower() for word in ['manzana', 'plátano', 'naranja', 'fresa'])]
+    vegetables = [f for f in foods if
+                  any(word in f.name.lower() for word in ['brócoli', 'espinaca', 'zanahoria', 'lechuga'])]
+    dairy = [f for f in foods if any(word in f.name.lower() for word in ['yogur', 'leche'])]
+    return proteins, carbs, fruits, vegetables, dairy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    rebuild_s = seed(args.foods)
+    db = SessionLocal()
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        expected = substring_scan(db)
+        db.expunge_all()
+    scan_ms = (time.perf_counter() - start) * 1000 / args.requests
+
+    food_catalog.invalidate()
+    start = time.perf_counter()
+    sets = food_categories.category_sets.get(db)
+    load_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        sets = food_categories.category_sets.get(db)
+        picks = [sets[category] for category in (Category.Proteina, Category.Carbohidrato, Category.Fruta,
+                                                 Category.Verdura, Category.Lacteo)]
+    cached_ms = (time.perf_counter() - start) * 1000 / args.requests
+
+    for foods, ids in zip(expected, picks):
+        assert sorted(f.food_id for f in foods) == list(ids)
+    print(f"📊 {args.foods} alimentos, reclasificación completa {rebuild_s:.1f} s")
+    print(f"subcadenas por petición  {scan_ms:.1f} ms")
+    print(f"categorías  carga {load_ms:.1f} ms (tras cada cambio de catálogo), por petición {cached_ms * 1000:.1f} µs")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Benchmark: importación masiva de alimentos (services/food_import.py) desde un CSV gzip sintético,
+primera carga e importación repetida (todo actualizaciones), frente al alta uno a uno de create_food
+(consulta de unicidad, insert, commit y refresh por alimento) medida sobre una muestra.
+
+Usa una base SQLite temporal. La memoria es el pico de RSS del proceso; con DB_SQLITE_PROFILE=true
+incluye además la caché de páginas y el mmap de SQLite (DB_SQLITE_CACHE_SIZE_KB, DB_SQLITE_MMAP_SIZE).
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_food_import.py --rows 500000
+"""
+import argparse
+import gzip
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("DB_SQLITE_PROFILE", "true")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import SessionLocal
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services import food_import
+
+UNITS = [("100", "g"), ("1", "cup"), ("250", "ml"), ("1", "unidad"), ("0.1", "kg"), ("2", "tbsp")]
+
+
+def write_dataset(rows: int) -> str:
+    path = os.path.join(_tmp, "alimentos.csv.gz")
+    rng = random.Random(3)
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as out:
+        out.write("food_name,description,energy_kcal,protein_g,fat_g,carbs_g,serving_size,serving_unit\n")
+        for i in range(rows):
+            amount, unit = UNITS[i % len(UNITS)]
+            out.write(f"Alimento {i},Producto de prueba {i % 97},{rng.uniform(20, 600):.1f},{rng.uniform(0, 40):.1f},"
+                      f"{rng.uniform(0, 30):.1f},{rng.uniform(0, 80):.1f},{amount},{unit}\n")
+    return path
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def per_item_baseline(sample: int) -> float:
+    """Segundos por alimento con el patrón de create_food"""
+    db = SessionLocal()
+    start = time.perf_counter()
+    for i in range(sample):
+        name = f"Uno a uno {i}"
+        if db.query(Food).filter(Food.name == name).first():
+            continue
+        food = Food(name=name, calories_per_portion=100, protein_per_portion=5, fat_per_portion=3,
+                    carbs_per_portion=12, portion_unit="100 g")
+        db.add(food)
+        db.commit()
+        db.refresh(food)
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed / sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=food_import.IMPORT_BATCH_SIZE)
+    parser.add_argument("--baseline-sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    path = write_dataset(args.rows)
+    print(f"📊 {args.rows} filas, {os.path.getsize(path) / 1e6:.1f} MB comprimidos, RSS inicial {peak_rss_mb():.0f} MB")
+
+    for label in ("primera carga", "reimportación"):
+        report = food_import.import_file(path, batch_size=args.batch_size)
+        print(f"🚀 {label}: {report['upserted']} alimentos, {report['failed']} errores, {report['elapsed_s']} s "
+              f"({report['rows_per_s']:.0f} filas/s), pico RSS {peak_rss_mb():.0f} MB")
+
+    per_item = per_item_baseline(args.baseline_sample)
+    print(f"📊 create_food uno a uno: {1 / per_item:.0f} filas/s "
+          f"(~{per_item * args.rows:.0f} s para {args.rows} filas)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
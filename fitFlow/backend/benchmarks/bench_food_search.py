@@ -0,0 +1,95 @@
+"""
+Benchmark: latencia de la búsqueda de alimentos (services/food_search.py, FTS5 trigram) sobre un
+catálogo sintético grande, frente a un LIKE '%texto%' sobre foods.name (sin índice ni acentos).
+
+Usa una base SQLite temporal.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_food_search.py --foods 200000 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("DB_SQLITE_PROFILE", "true")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services import food_search
+
+BASES = ["Atún", "Arroz", "Pollo", "Plátano", "Lentejas", "Avena", "Queso", "Yogur", "Manzana", "Brócoli",
+         "Camarón", "Maíz", "Pan", "Huevo", "Fréjol", "Quinua", "Té", "Café", "Limón", "Piña", "Jamón", "Ñame"]
+STYLES = ["cocido", "al horno", "a la plancha", "en agua", "en aceite", "integral", "light", "orgánico",
+          "deshidratado", "frito", "con sal", "sin azúcar", "andino", "de la costa", "en almíbar"]
+BRANDS = ["Pronaca", "La Favorita", "Facundo", "Supermaxi", "Real", "Toni", "Nestlé", "Casera", "Sumesa", "Oriental"]
+
+QUERIES = {
+    "palabra": ["atun", "pollo", "platano", "brocoli", "quinua"],
+    "acentos": ["Atún", "CAMARÓN", "jamón", "fréjol", "piña"],
+    "prefijo": ["atu", "len", "ave", "cam", "yog"],
+    "corta": ["a", "pa", "te", "ca", "qu"],
+    "varias": ["atun en agua", "pollo plancha", "arroz integral", "cafe organico", "pan de"],
+    "sin resultados": ["xyzw", "hamburguesa"],
+}
+
+
+def seed(foods: int):
+    migrations.upgrade()
+    rng = random.Random(7)
+    rows = [{"name": f"{BASES[i % len(BASES)]} {STYLES[(i // len(BASES)) % len(STYLES)]} {BRANDS[rng.randrange(len(BRANDS))]} {i}",
+             "description": f"{rng.choice(STYLES)} - porción de referencia", "calories_per_portion": 100,
+             "protein_per_portion": 5, "fat_per_portion": 3, "carbs_per_portion": 12, "portion_unit": "g"}
+            for i in range(foods)]
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, len(rows), 10000):
+            conn.execute(insert(Food), rows[offset:offset + 10000])
+        food_search.reindex(conn)
+    return time.perf_counter() - start
+
+
+def timed(fn, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = fn()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2), "results": len(results)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=food_search.SEARCH_DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    elapsed = seed(args.foods)
+    print(f"📊 {args.foods} alimentos insertados e indexados en {elapsed:.1f} s")
+
+    with Session(engine) as db:
+        for kind, queries in QUERIES.items():
+            fts = [timed(lambda: food_search.search(db, q, args.limit), args.repeat) for q in queries]
+            like = [timed(lambda: db.execute(select(Food).where(Food.name.like(f"%{q}%")).limit(args.limit))
+                          .scalars().all(), max(1, args.repeat // 5)) for q in queries]
+            print(f"🔍 {kind:15} fts p50={max(r['p50_ms'] for r in fts):7.2f} ms p99={max(r['p99_ms'] for r in fts):7.2f} ms "
+                  f"resultados={[r['results'] for r in fts]} | like p50={max(r['p50_ms'] for r in like):7.2f} ms "
+                  f"resultados={[r['results'] for r in like]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Benchmark: generación de planes como trabajo en segundo plano (services/jobs.py) frente a la
+generación dentro de la petición. Mide el tiempo de respuesta del envío (202) y el tiempo hasta el
+resultado consultando GET /jobs/{job_id}, y comprueba la cola llena (503), la cancelación, la
+detección de trabajos huérfanos y el trabajo de cartera (POST /nutrition-optimizer/generate-caseload).
+
+Usa una base SQLite temporal con un catálogo sintético.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_jobs.py --days 30 --foods 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("JOB_MAX_DEPTH", "4")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from fitFlow.main import app
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.job import Job, JobStatus
+from fitFlow.backend.app.services import food_categories
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+from fitFlow.backend.app.services.jobs import job_queue
+
+PASSWORD = "Secreta1!"
+WORDS = ["pollo", "atún", "huevo", "queso", "arroz", "pasta", "avena", "pan", "manzana", "plátano", "fresa",
+         "brócoli", "espinaca", "lechuga", "yogur", "leche", "almendra", "lenteja"]
+CEDULAS = ["1710034065", "1712345675", "1700000001", "1700000019", "1700000027", "1700000035"]
+
+
+def login(client: TestClient, cedula: str) -> dict:
+    response = client.post("/auth/login", data={"username": cedula, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(client: TestClient, foods: int):
+    rng = random.Random(17)
+    rows = []
+    for i in range(foods):
+        protein, fat, carbs = rng.uniform(0, 30), rng.uniform(0, 15), rng.uniform(0, 60)
+        rows.append({"name": f"{rng.choice(WORDS).capitalize()} {i}", "protein_per_portion": protein,
+                     "fat_per_portion": fat, "carbs_per_portion": carbs, "portion_unit": "100 g",
+                     "calories_per_portion": 4 * protein + 9 * fat + 4 * carbs})
+    with engine.begin() as conn:
+        conn.execute(insert(Food), rows)
+        food_categories.rebuild(conn)
+        bump_version(conn)
+    food_catalog.invalidate()
+
+    client.post("/register/nutritionist", json=dict(
+        first_name="Nu", last_name="Tri", cedula="1700034067", email="nutri@fitflow.ec", password=PASSWORD,
+        birth_date="1980-01-01", sex="Masculino", certification_number="C1",
+        specialty="Nutrición Deportiva")).raise_for_status()
+    headers = login(client, "1700034067")
+    user_ids = []
+    for index, cedula in enumerate(CEDULAS):
+        client.post("/register/client", json=dict(
+            first_name="Ana", last_name="Paz", cedula=cedula, email=f"cliente{index}@fitflow.ec", password=PASSWORD,
+            birth_date="1990-01-01", sex="Femenino", height_cm=160 + index * 5, weight_current_kg=60 + index * 6,
+            weight_goal_kg=55, activity_level="Moderado", goal="Bajar_Peso")).raise_for_status()
+        user_ids.append(client.get("/auth/me", headers=login(client, cedula)).json()["user_id"])
+    return headers, user_ids
+
+
+def wait(client: TestClient, headers: dict, job_id: str, timeout: float = 120) -> dict:
+    """Consulta el trabajo hasta que termina; devuelve el registro y los avances vistos"""
+    deadline = time.monotonic() + timeout
+    seen = []
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["progress"] not in seen:
+            seen.append(job["progress"])
+        if job["status"] not in ("queued", "running"):
+            return {**job, "seen_progress": seen}
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--foods", type=int, default=5000)
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    start = date.today()
+    end = start + timedelta(days=args.days - 1)
+    with TestClient(app) as client:
+        headers, user_ids = seed(client, args.foods)
+        body = lambda user_id: {"user_id": user_id, "start_date": start.isoformat(), "end_date": end.isoformat()}
+
+        began = time.perf_counter()
+        inline = client.post("/nutrition-optimizer/generate-range", headers=headers, json=body(user_ids[0]))
+        inline.raise_for_status()
+        inline_s = time.perf_counter() - began
+
+        began = time.perf_counter()
+        submitted = client.post("/nutrition-optimizer/generate-range", params={"background": True},
+                                headers=headers, json=body(user_ids[0]))
+        submit_ms = (time.perf_counter() - began) * 1000
+        assert submitted.status_code == 202, submitted.text
+        job = wait(client, headers, submitted.json()["job_id"])
+        job_s = time.perf_counter() - began
+        assert job["status"] == "succeeded", job
+        # Mismos planes que en la petición (solver_ms es tiempo medido y varía)
+        assert [plan["plan_data"] for plan in job["result"]["plans"]] == \
+               [plan["plan_data"] for plan in inline.json()["plans"]], "resultado distinto al de la petición"
+
+        # Cola llena: JOB_MAX_DEPTH trabajos pendientes y uno más
+        codes = [client.post("/nutrition-optimizer/generate-range", params={"background": True}, headers=headers,
+                             json=body(user_id)).status_code for user_id in user_ids[1:]]
+        assert codes.count(503) == len(codes) - job_queue.max_depth, codes
+        accepted = [job["job_id"] for job in client.get("/jobs/", headers=headers).json()
+                    if job["status"] in ("queued", "running")]
+
+        # Cancelación: el último en cola se descarta, el resto termina
+        cancelled = client.delete(f"/jobs/{accepted[0]}", headers=headers).json()
+        finished = [wait(client, headers, job_id) for job_id in accepted]
+
+        # Huérfano: un trabajo activo de otra instancia sin latido reciente
+        stale = datetime.utcnow() - timedelta(hours=1)
+        owner_id = client.get("/auth/me", headers=headers).json()["user_id"]
+        with engine.begin() as conn:
+            conn.execute(insert(Job).values(job_id="0" * 32, kind="generate-range", status=JobStatus.running,
+                                            owner_id=owner_id, progress=0.4, cancel_requested=False,
+                                            instance="pod-caido:1", created_at=stale, heartbeat_at=stale))
+        orphan = client.get(f"/jobs/{'0' * 32}", headers=headers).json()
+        assert orphan["status"] == "orphaned", orphan
+
+        # Cartera en segundo plano (procesos spawn desde el hilo del trabajo)
+        caseload = client.post("/nutrition-optimizer/generate-caseload", headers=headers, json={
+            "client_ids": user_ids, "start_date": (end + timedelta(days=1)).isoformat(), "days": 7})
+        assert caseload.status_code == 202, caseload.text
+        batch = wait(client, headers, caseload.json()["job_id"], timeout=300)
+        assert batch["status"] == "succeeded", batch
+
+    print(f"📊 {args.days} días, {args.foods} alimentos, JOB_WORKERS={job_queue.workers}, "
+          f"JOB_MAX_DEPTH={job_queue.max_depth}")
+    print(f"en la petición   {inline_s:.2f} s hasta la respuesta")
+    print(f"en segundo plano {submit_ms:.0f} ms hasta el 202, {job_s:.2f} s hasta el resultado; "
+          f"avances vistos {job['seen_progress']}")
+    print(f"cola llena       {codes.count(503)} de {len(codes)} envíos rechazados con 503")
+    print(f"cancelación      {cancelled['status']} (cancel_requested={cancelled['cancel_requested']}); "
+          f"estados finales {sorted(job['status'] for job in finished)}")
+    print(f"huérfano         {orphan['status']}: {orphan['message']}")
+    print(f"cartera          {batch['result']['created']} clientes, {batch['result']['plans_created']} planes "
+          f"en {batch['result']['elapsed_s']} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Benchmark: throughput de logins durante una avalancha frente a la latencia (p50/p99) de otra ruta
+(/foods/) consultada a la vez. Compara la verificación bcrypt en línea (implementación anterior,
+en el threadpool de Starlette) con el pool dedicado de core/password_hashing.py.
+
+Requiere httpx. Usa una base SQLite temporal; BCRYPT_ROUNDS y PASSWORD_HASH_WORKERS se toman del entorno.
+
+Uso:
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=1 python fitFlow/backend/benchmarks/bench_login_burst.py --logins 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+os.environ.setdefault("DB_SQLITE_PROFILE", "true")
+os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", "100000")
+os.environ.setdefault("LOGIN_RATE_PER_IP", "0")  # se mide bcrypt, no el limitador
+os.environ.setdefault("LOGIN_RATE_PER_CEDULA", "0")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+import httpx
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from fitFlow.main import app
+from fitFlow.backend.app.api.auth import User
+from fitFlow.backend.app.core import config
+from fitFlow.backend.app.core.security import get_password_hash, verify_password, create_access_token
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import async_engine, get_db, SessionLocal
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.user import Sex
+
+PASSWORD = "Secreta1!"
+
+
+# ===== Login de referencia: bcrypt en línea en el threadpool (implementación anterior) =====
+@app.post("/sync/auth/login")
+def sync_login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.cedula == form.username).first()
+    if not user or not verify_password(form.password, user.password):
+        raise HTTPException(400, "Invalid credentials")
+    return {"access_token": create_access_token({"sub": user.cedula}), "token_type": "bearer"}
+
+
+def seed(users: int, foods: int):
+    migrations.upgrade()
+    hashed = get_password_hash(PASSWORD)  # mismo hash para todos: la siembra no es lo que se mide
+    db = SessionLocal()
+    db.add_all([User(first_name="Bench", last_name=str(i), cedula=f"{i:010d}", email=f"u{i}@fitflow.ec",
+                     password=hashed, birth_date=date(1990, 1, 1), sex=Sex.Femenino) for i in range(users)])
+    db.add_all([Food(name=f"Alimento {i}", calories_per_portion=100, protein_per_portion=5, fat_per_portion=3,
+                     carbs_per_portion=12, portion_unit="g") for i in range(foods)])
+    db.commit()
+    db.close()
+
+
+async def burst(client: httpx.AsyncClient, path: str, logins: int, users: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login(i: int):
+        async with semaphore:
+            response = await client.post(path, data={"username": f"{i % users:010d}", "password": PASSWORD})
+            response.raise_for_status()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            (await client.get("/foods/")).raise_for_status()
+            probe_latencies.append(time.perf_counter() - start)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    probe_latencies.sort()
+    return {
+        "logins_per_s": round(logins / elapsed, 1),
+        "probe_requests": len(probe_latencies),
+        "probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 1),
+        "probe_p99_ms": round(probe_latencies[max(0, int(len(probe_latencies) * 0.99) - 1)] * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    seed(args.users, foods=200)
+    print(f"📊 BCRYPT_ROUNDS={config.BCRYPT_ROUNDS} PASSWORD_HASH_WORKERS={config.PASSWORD_HASH_WORKERS} "
+          f"THREADPOOL_SIZE={config.THREADPOOL_SIZE} CPUs={os.cpu_count()}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for label, path in (("inline", "/sync/auth/login"), ("pool", "/auth/login")):
+            stats = await burst(client, path, args.logins, args.users, args.concurrency)
+            print(f"{label:7} {stats}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
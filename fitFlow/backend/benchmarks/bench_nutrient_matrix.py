@@ -0,0 +1,98 @@
+"""
+Benchmark: totales nutricionales de lotes (food_ids, porciones) con la matriz columnar
+(services/nutrient_matrix.py) frente al recorrido de objetos Food atributo por atributo.
+
+Usa una base SQLite temporal.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_nutrient_matrix.py --foods 50000 --plans 5000 --meals 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from sqlalchemy import insert
+
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import SessionLocal, engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+from fitFlow.backend.app.services.nutrient_matrix import nutrient_matrix
+
+MEAL_TYPES = ["Desayuno", "Almuerzo", "Cena", "Snack"]
+
+
+def seed(foods: int):
+    migrations.upgrade()
+    rng = random.Random(5)
+    with engine.begin() as conn:
+        conn.execute(insert(Food), [{"name": f"Alimento {i}", "calories_per_portion": rng.uniform(20, 600),
+                                     "protein_per_portion": rng.uniform(0, 40), "fat_per_portion": rng.uniform(0, 30),
+                                     "carbs_per_portion": rng.uniform(0, 80), "portion_unit": "100 g"}
+                                    for i in range(foods)])
+        bump_version(conn)
+
+
+def per_object(foods_by_id, plan):
+    totals = {"calories": 0.0, "protein": 0.0, "fat": 0.0, "carbs": 0.0}
+    for food_id, portion, _ in plan:
+        food = foods_by_id[food_id]
+        totals["calories"] += food.calories_per_portion * portion
+        totals["protein"] += food.protein_per_portion * portion
+        totals["fat"] += food.fat_per_portion * portion
+        totals["carbs"] += food.carbs_per_portion * portion
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=50000)
+    parser.add_argument("--plans", type=int, default=5000)
+    parser.add_argument("--meals", type=int, default=10)
+    args = parser.parse_args()
+
+    seed(args.foods)
+    rng = random.Random(9)
+    plans = [[(rng.randint(1, args.foods), rng.uniform(0.5, 2.0), rng.choice(MEAL_TYPES)) for _ in range(args.meals)]
+             for _ in range(args.plans)]
+    db = SessionLocal()
+
+    start = time.perf_counter()
+    foods_by_id = {food.food_id: food for food in db.query(Food).all()}
+    load_objects = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [per_object(foods_by_id, plan) for plan in plans]
+    objects_s = time.perf_counter() - start
+
+    food_catalog.invalidate()
+    start = time.perf_counter()
+    matrix = nutrient_matrix.get(db)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [matrix.totals([m[0] for m in plan], [m[1] for m in plan]) for plan in plans]
+    matrix_s = time.perf_counter() - start
+
+    flat = [meal for plan in plans for meal in plan]
+    start = time.perf_counter()
+    by_meal = matrix.totals_by([m[0] for m in flat], [m[1] for m in flat], [m[2] for m in flat])
+    grouped_s = time.perf_counter() - start
+
+    assert all(abs(a["calories"] - b["calories"]) < 1e-6 for a, b in zip(expected, results))
+    assert abs(sum(t["calories"] for t in by_meal.values()) - sum(t["calories"] for t in expected)) < 1e-3
+    print(f"📊 {args.foods} alimentos, {args.plans} planes x {args.meals} comidas")
+    print(f"objetos  carga {load_objects * 1000:.0f} ms, totales {objects_s * 1000:.1f} ms")
+    print(f"matriz   carga {build_s * 1000:.0f} ms, totales {matrix_s * 1000:.1f} ms, "
+          f"todas las comidas agrupadas por tipo en una pasada {grouped_s * 1000:.1f} ms")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
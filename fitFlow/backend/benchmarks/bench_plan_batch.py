@@ -0,0 +1,115 @@
+"""
+Benchmark: planes de una semana para la cartera de un nutricionista con services/plan_batch.py
+(pool de procesos, catálogo en memoria compartida, transacciones por grupos de clientes) frente a
+resolver cliente por cliente en el proceso, sin guardar.
+
+Usa una base SQLite temporal con clientes y catálogo sintéticos.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_plan_batch.py --clients 300 --foods 10000 --processes 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.client import Client
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.models.nutrition_plan_meal import NutritionPlanMeal
+from fitFlow.backend.app.models.nutritionist import Nutritionist
+from fitFlow.backend.app.models.user import User
+from fitFlow.backend.app.services import food_categories, plan_batch, plan_optimizer
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+from fitFlow.backend.app.services.nutrient_matrix import nutrient_matrix
+
+WORDS = ["pollo", "atún", "huevo", "queso", "arroz", "pasta", "avena", "pan", "manzana", "plátano", "fresa",
+         "brócoli", "espinaca", "lechuga", "yogur", "leche", "almendra", "lenteja"]
+ACTIVITY = ["Sedentario", "Ligero", "Moderado", "Intenso", "Extremo"]
+GOALS = ["Bajar_Peso", "Mantener_Peso", "Subir_Peso"]
+
+
+def seed(clients: int, foods: int) -> int:
+    migrations.upgrade()
+    rng = random.Random(13)
+    foods_rows = []
+    for i in range(foods):
+        protein, fat, carbs = rng.uniform(0, 30), rng.uniform(0, 15), rng.uniform(0, 60)
+        foods_rows.append({"name": f"{rng.choice(WORDS).capitalize()} {i}", "protein_per_portion": protein,
+                           "fat_per_portion": fat, "carbs_per_portion": carbs, "portion_unit": "100 g",
+                           "calories_per_portion": 4 * protein + 9 * fat + 4 * carbs})
+    with engine.begin() as conn:
+        conn.execute(insert(Food), foods_rows)
+        food_categories.rebuild(conn)
+        bump_version(conn)
+        users = [{"first_name": "Cliente", "last_name": str(i), "cedula": f"{i:010d}", "email": f"c{i}@fitflow.ec",
+                  "password": "x", "birth_date": date(1960 + i % 40, 1 + i % 12, 1 + i % 28),
+                  "sex": rng.choice(["Masculino", "Femenino"])} for i in range(clients + 1)]
+        conn.execute(insert(User), users)
+        ids = conn.execute(select(User.user_id).order_by(User.user_id)).scalars().all()
+        conn.execute(insert(Nutritionist), [{"nutritionist_id": ids[0], "certification_number": "C1",
+                                             "specialty": "Nutrición Deportiva"}])
+        conn.execute(insert(Client), [{"client_id": user_id, "height_cm": rng.uniform(150, 195),
+                                       "weight_current_kg": rng.uniform(50, 110), "weight_goal_kg": rng.uniform(50, 90),
+                                       "activity_level": rng.choice(ACTIVITY), "goal": rng.choice(GOALS)}
+                                      for user_id in ids[1:]])
+    food_catalog.invalidate()
+    return ids[0]
+
+
+def sequential(client_ids, days: int) -> float:
+    """Línea base: un cliente tras otro en este proceso, solo el optimizador"""
+    started = time.perf_counter()
+    with Session(engine) as db:
+        matrix, categories = nutrient_matrix.get(db), food_categories.category_sets.get(db)
+        clients = db.execute(select(Client).options(joinedload(Client.user))
+                             .where(Client.client_id.in_(client_ids))).scalars().all()
+        for client in clients:
+            plan_optimizer.solve_days(matrix, categories, plan_optimizer.PlanTargets.for_client(client), days)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--foods", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--baseline-sample", type=int, default=30, help="clientes medidos en la línea base")
+    args = parser.parse_args()
+
+    nutritionist_id = seed(args.clients, args.foods)
+    with engine.connect() as conn:
+        client_ids = conn.execute(select(Client.client_id).order_by(Client.client_id)).scalars().all()
+
+    sample = client_ids[:args.baseline_sample]
+    per_client = sequential(sample, args.days) / len(sample)
+
+    batch = plan_batch.PlanBatch(nutritionist_id, plan_batch.next_monday(), args.days, processes=args.processes)
+    report = batch.run(client_ids)
+    with engine.connect() as conn:
+        meals = conn.execute(select(func.count()).select_from(NutritionPlanMeal)).scalar()
+
+    assert report["created"] == args.clients and report["plans_created"] == args.clients * args.days, report
+    feasible = sum(result["within_tolerance"] for result in report["results"])
+    print(f"📊 {args.clients} clientes x {args.days} días, {args.foods} alimentos, {batch.processes} procesos")
+    print(f"secuencial  {1 / per_client:.1f} clientes/s (~{per_client * args.clients:.0f} s para la cartera)")
+    print(f"lote        {report['clients_per_s']} clientes/s, {report['plans_per_s']} planes/s, "
+          f"{report['elapsed_s']} s; {report['plans_created']} planes y {meals} comidas guardados, "
+          f"{feasible} dentro de tolerancia")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark: "regenerar" con POST /nutrition-optimizer/generate y una semilla. La primera llamada con
+una semilla resuelve el plan; las repeticiones salen de la caché (services/plan_cache.py). Comprueba
+que la misma semilla reproduce el plan, que semillas distintas dan variantes y que un cambio del
+perfil o del catálogo deja de acertar.
+
+Usa una base SQLite temporal con un catálogo sintético.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_plan_cache.py --foods 10000 --seeds 10 --repeats 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+
+from fitFlow.main import app
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.client import Client
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services import food_categories
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+
+PASSWORD = "Secreta1!"
+WORDS = ["pollo", "atún", "huevo", "queso", "arroz", "pasta", "avena", "pan", "manzana", "plátano", "fresa",
+         "brócoli", "espinaca", "lechuga", "yogur", "leche", "almendra", "lenteja"]
+
+
+def login(client: TestClient, cedula: str) -> dict:
+    response = client.post("/auth/login", data={"username": cedula, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed_database(client: TestClient, foods: int):
+    rng = random.Random(23)
+    rows = []
+    for i in range(foods):
+        protein, fat, carbs = rng.uniform(0, 30), rng.uniform(0, 15), rng.uniform(0, 60)
+        rows.append({"name": f"{rng.choice(WORDS).capitalize()} {i}", "protein_per_portion": protein,
+                     "fat_per_portion": fat, "carbs_per_portion": carbs, "portion_unit": "100 g",
+                     "calories_per_portion": 4 * protein + 9 * fat + 4 * carbs})
+    with engine.begin() as conn:
+        conn.execute(insert(Food), rows)
+        food_categories.rebuild(conn)
+        bump_version(conn)
+    food_catalog.invalidate()
+
+    client.post("/register/client", json=dict(
+        first_name="Ana", last_name="Paz", cedula="1710034065", email="cliente@fitflow.ec", password=PASSWORD,
+        birth_date="1990-01-01", sex="Femenino", height_cm=165, weight_current_kg=60, weight_goal_kg=55,
+        activity_level="Moderado", goal="Bajar_Peso")).raise_for_status()
+    headers = login(client, "1710034065")
+    return headers, client.get("/auth/me", headers=headers).json()["user_id"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=10000)
+    parser.add_argument("--seeds", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20, help="repeticiones de cada semilla")
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    with TestClient(app) as client:
+        headers, user_id = seed_database(client, args.foods)
+
+        def generate(seed):
+            began = time.perf_counter()
+            response = client.post("/nutrition-optimizer/generate", headers=headers,
+                                   json={"user_id": user_id, "plan_date": date.today().isoformat(), "seed": seed})
+            response.raise_for_status()
+            body = response.json()
+            return (time.perf_counter() - began) * 1000, body["plan_data"]["meals"], body["statistics"]
+
+        first_ms, repeat_ms, variants, feasible = [], [], set(), 0
+        for seed in range(args.seeds):
+            elapsed, meals, stats = generate(seed)
+            assert not stats["cached"], stats
+            first_ms.append(elapsed)
+            variants.add(tuple(meal["food_id"] for meal in meals))
+            feasible += stats["within_tolerance"]
+            for _ in range(args.repeats):
+                elapsed, again, stats = generate(seed)
+                assert stats["cached"] and again == meals, "la misma semilla debe devolver el mismo plan"
+                assert stats["solver_ms"] == 0, "un acierto de la caché no resuelve nada"
+                repeat_ms.append(elapsed)
+
+        # Perfil editado y catálogo nuevo: la clave cambia y el plan se vuelve a resolver
+        with engine.begin() as conn:
+            conn.execute(update(Client).where(Client.client_id == user_id).values(weight_current_kg=61))
+        profile_miss = not generate(0)[2]["cached"]
+        with engine.begin() as conn:
+            bump_version(conn)
+        food_catalog.invalidate()
+        catalog_miss = not generate(0)[2]["cached"]
+
+    print(f"📊 {args.foods} alimentos, {args.seeds} semillas x {args.repeats} repeticiones")
+    print(f"primera llamada  p50 {statistics.median(first_ms):.1f} ms ({feasible}/{args.seeds} dentro de tolerancia)")
+    print(f"repetición       p50 {statistics.median(repeat_ms):.1f} ms (desde la caché, mismo plan)")
+    print(f"variantes        {len(variants)} planes distintos para {args.seeds} semillas")
+    print(f"invalidación     perfil editado: {'✅' if profile_miss else '❌'}, "
+          f"catálogo nuevo: {'✅' if catalog_miss else '❌'}")
+    return 0 if profile_miss and catalog_miss else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: tiempo de resolución y error frente a los objetivos del optimizador de planes
+(services/plan_optimizer.py) para catálogos sintéticos de 100 a 50 000 alimentos, comparado con la
+heurística anterior (random.choice por categoría y porciones topadas).
+
+Construye la matriz de nutrientes y las categorías en memoria, sin base de datos. Los objetivos
+recorren perfiles de 1400 a 3500 kcal con los dos repartos de get_macronutrient_targets.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_plan_optimizer.py --sizes 100 1000 10000 50000 --profiles 40
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fitFlow.backend.app.models.food_category import Category
+from fitFlow.backend.app.services import plan_optimizer
+from fitFlow.backend.app.services.food_categories import CategorySets, classify
+from fitFlow.backend.app.services.nutrient_matrix import NutrientMatrix
+
+# Palabra del nombre -> rangos de (proteína, carbohidratos, grasa) en gramos por porción
+PROFILES = {
+    "pollo": ((20, 31), (0, 2), (2, 12)), "atún": ((22, 30), (0, 1), (1, 8)),
+    "salmón": ((18, 25), (0, 1), (8, 15)), "huevo": ((11, 14), (0, 2), (8, 12)),
+    "queso": ((18, 28), (1, 4), (15, 30)), "arroz": ((2, 8), (25, 75), (0, 3)),
+    "pasta": ((5, 13), (25, 75), (1, 3)), "avena": ((10, 17), (55, 68), (5, 8)),
+    "pan": ((7, 13), (40, 55), (2, 6)), "quinoa": ((4, 14), (20, 64), (2, 6)),
+    "manzana": ((0, 1), (10, 15), (0, 1)), "plátano": ((1, 2), (20, 24), (0, 1)),
+    "naranja": ((1, 2), (8, 12), (0, 1)), "fresa": ((0, 1), (6, 9), (0, 1)),
+    "brócoli": ((2, 4), (4, 7), (0, 1)), "espinaca": ((2, 3), (3, 4), (0, 1)),
+    "zanahoria": ((1, 2), (8, 10), (0, 1)), "lechuga": ((1, 2), (2, 3), (0, 1)),
+    "yogur": ((3, 10), (4, 16), (0, 5)), "leche": ((3, 4), (4, 6), (0, 4)),
+    "almendra": ((18, 22), (18, 22), (45, 53)), "lenteja": ((8, 10), (18, 22), (0, 1)),
+    "aceite": ((0, 0), (0, 0), (90, 100)), "galleta": ((5, 8), (60, 75), (10, 25)),
+}
+
+LEGACY_SLOTS = (  # (comida, categoría, reparto de calorías de la comida, porción máxima)
+    ("Desayuno", Category.Lacteo, 0.25 * 0.4, 2.0), ("Desayuno", Category.Fruta, 0.25 * 0.3, 2.0),
+    ("Desayuno", Category.Carbohidrato, 0.25 * 0.3, 1.5), ("Almuerzo", Category.Proteina, 0.35 * 0.5, 2.0),
+    ("Almuerzo", Category.Carbohidrato, 0.35 * 0.35, 2.0), ("Almuerzo", Category.Verdura, 0.35 * 0.15, 3.0),
+    ("Cena", Category.Proteina, 0.30 * 0.7, 2.0), ("Cena", Category.Verdura, 0.30 * 0.3, 3.0),
+    ("Snack", Category.Fruta, 0.10, 1.5),
+)
+
+
+def catalog(size: int, seed: int):
+    rng = random.Random(seed)
+    words = list(PROFILES)
+    rows, tags = [], []
+    for food_id in range(1, size + 1):
+        word = words[food_id % len(words)] if food_id <= len(words) else rng.choice(words)
+        protein, carbs, fat = (rng.uniform(*bounds) for bounds in PROFILES[word])
+        rows.append((food_id, 4 * protein + 4 * carbs + 9 * fat, protein, fat, carbs))
+        tags.extend((category.name, food_id) for category in classify(f"{word} {food_id}", protein, carbs))
+    return NutrientMatrix(1, rows), CategorySets(1, sorted(tags))
+
+
+def targets_for(index: int, count: int) -> plan_optimizer.PlanTargets:
+    calories = 1400 + (3500 - 1400) * index / max(count - 1, 1)
+    protein_ratio, carbs_ratio = (0.25, 0.45) if index % 2 else (0.20, 0.50)
+    return plan_optimizer.PlanTargets(calories, calories * protein_ratio / 4, calories * carbs_ratio / 4,
+                                      calories * 0.30 / 9)
+
+
+def legacy_error(matrix, categories, targets, rng) -> float:
+    total = 0.0
+    for _, category, share, cap in LEGACY_SLOTS:
+        if categories[category]:
+            food_id = rng.choice(categories[category])
+            calories = matrix.calories[matrix.index[food_id]]
+            total += calories * round(min(cap, targets.calories * share / max(calories, 10)), 1)
+    return (total - targets.calories) / targets.calories
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--profiles", type=int, default=40)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    print(f"📊 {args.profiles} perfiles por catálogo; tolerancias {plan_optimizer.config.PLAN_CALORIE_TOLERANCE_PCT}% "
+          f"kcal / {plan_optimizer.config.PLAN_MACRO_TOLERANCE_PCT}% macros")
+    print(f"{'alimentos':>9} {'p50 ms':>7} {'p95 ms':>7} {'factibles':>9} {'|kcal| medio':>12} {'|macro| máx':>11} "
+          f"{'heurística |kcal| medio / máx':>30}")
+    for size in args.sizes:
+        matrix, categories = catalog(size, seed=size)
+        rng = random.Random(size)
+        times, calorie_errors, macro_errors, legacy, feasible = [], [], [], [], 0
+        for index in range(args.profiles):
+            targets = targets_for(index, args.profiles)
+            solution = plan_optimizer.solve(matrix, categories, targets, budget_ms=args.budget_ms)
+            again = plan_optimizer.solve(matrix, categories, targets, budget_ms=args.budget_ms)
+            assert solution.meals == again.meals or again.elapsed_ms >= (args.budget_ms or 250), "no determinista"
+            times.append(solution.elapsed_ms)
+            calorie_errors.append(abs(solution.errors["calories"]))
+            macro_errors.append(max(abs(solution.errors[macro]) for macro in plan_optimizer.MACROS))
+            feasible += solution.feasible
+            legacy.append(abs(legacy_error(matrix, categories, targets, rng)))
+        print(f"{size:>9} {statistics.median(times):>7.1f} {percentile(times, 0.95):>7.1f} "
+              f"{feasible:>5}/{args.profiles:<3} {statistics.mean(calorie_errors) * 100:>11.1f}% "
+              f"{max(macro_errors) * 100:>10.1f}% {statistics.mean(legacy) * 100:>21.1f}% / {max(legacy) * 100:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark: un mes de planes para un cliente con POST /nutrition-optimizer/generate-range (persist)
+frente al flujo anterior de una llamada a /generate más un POST /nutrition-plans/ por día.
+Cuenta peticiones, consultas SQL (X-DB-Query-Count) y tiempo total.
+
+Usa una base SQLite temporal con un catálogo sintético.
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_plan_range.py --days 30 --foods 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'bench.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from fitFlow.main import app
+from fitFlow.backend.app.core.query_metrics import QUERY_COUNT_HEADER
+from fitFlow.backend.app.database import migrations
+from fitFlow.backend.app.database.session import engine
+from fitFlow.backend.app.models.food import Food
+from fitFlow.backend.app.services import food_categories
+from fitFlow.backend.app.services.food_catalog import bump_version, food_catalog
+
+PASSWORD = "Secreta1!"
+WORDS = ["pollo", "atún", "huevo", "queso", "arroz", "pasta", "avena", "pan", "manzana", "plátano", "fresa",
+         "brócoli", "espinaca", "lechuga", "yogur", "leche", "almendra", "lenteja"]
+
+
+def login(client: TestClient, cedula: str) -> dict:
+    response = client.post("/auth/login", data={"username": cedula, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(client: TestClient, foods: int, clients: int):
+    rng = random.Random(11)
+    rows = []
+    for i in range(foods):
+        protein, fat, carbs = rng.uniform(0, 30), rng.uniform(0, 15), rng.uniform(0, 60)
+        rows.append({"name": f"{rng.choice(WORDS).capitalize()} {i}", "protein_per_portion": protein,
+                     "fat_per_portion": fat, "carbs_per_portion": carbs, "portion_unit": "100 g",
+                     "calories_per_portion": 4 * protein + 9 * fat + 4 * carbs})
+    with engine.begin() as conn:
+        conn.execute(insert(Food), rows)
+        food_categories.rebuild(conn)
+        bump_version(conn)
+    food_catalog.invalidate()
+
+    client.post("/register/nutritionist", json=dict(
+        first_name="Nu", last_name="Tri", cedula="1700034067", email="nutri@fitflow.ec", password=PASSWORD,
+        birth_date="1980-01-01", sex="Masculino", certification_number="C1",
+        specialty="Nutrición Deportiva")).raise_for_status()
+    headers = login(client, "1700034067")
+    nutritionist_id = client.get("/auth/me", headers=headers).json()["user_id"]
+    user_ids = []
+    for index, cedula in enumerate(["1710034065", "1712345675"][:clients]):
+        client.post("/register/client", json=dict(
+            first_name="Ana", last_name="Paz", cedula=cedula, email=f"cliente{index}@fitflow.ec", password=PASSWORD,
+            birth_date="1990-01-01", sex="Femenino", height_cm=165, weight_current_kg=60, weight_goal_kg=55,
+            activity_level="Moderado", goal="Bajar_Peso")).raise_for_status()
+        user_ids.append(client.get("/auth/me", headers=login(client, cedula)).json()["user_id"])
+    return headers, nutritionist_id, user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--foods", type=int, default=5000)
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    start = date.today()
+    with TestClient(app) as client:
+        headers, nutritionist_id, (per_day_user, range_user) = seed(client, args.foods, 2)
+
+        requests = queries = 0
+        began = time.perf_counter()
+        for offset in range(args.days):
+            plan_date = (start + timedelta(days=offset)).isoformat()
+            generated = client.post("/nutrition-optimizer/generate", headers=headers,
+                                    json={"user_id": per_day_user, "plan_date": plan_date})
+            generated.raise_for_status()
+            created = client.post("/nutrition-plans/", headers=headers, json={
+                "user_id": per_day_user, "nutritionist_id": nutritionist_id, "plan_date": plan_date,
+                **generated.json()["plan_data"]})
+            created.raise_for_status()
+            requests += 2
+            queries += int(generated.headers[QUERY_COUNT_HEADER.decode()])
+            queries += int(created.headers[QUERY_COUNT_HEADER.decode()])
+        per_day_s = time.perf_counter() - began
+
+        began = time.perf_counter()
+        response = client.post("/nutrition-optimizer/generate-range", headers=headers, json={
+            "user_id": range_user, "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=args.days - 1)).isoformat(), "persist": True})
+        response.raise_for_status()
+        range_s = time.perf_counter() - began
+        summary = response.json()["summary"]
+
+    print(f"📊 {args.days} días, {args.foods} alimentos")
+    print(f"por día   {requests} peticiones, {queries} consultas, {per_day_s:.2f} s")
+    print(f"rango     1 petición, {response.headers[QUERY_COUNT_HEADER.decode()]} consultas, {range_s:.2f} s "
+          f"(optimizador {summary['solver_ms'] / 1000:.2f} s, {summary['within_tolerance']}/{summary['days']} "
+          f"dentro de tolerancia, {summary['distinct_foods']} alimentos distintos)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
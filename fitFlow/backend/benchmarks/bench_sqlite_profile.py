@@ -0,0 +1,89 @@
+"""
+Benchmark: throughput de inserción concurrente de food_logs con y sin el perfil SQLite
+(WAL + pragmas + reintento de commit).
+
+Uso:
+    python fitFlow/backend/benchmarks/bench_sqlite_profile.py --threads 16 --batches 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from fitFlow.backend.app.database.session import Base, build_engine, commit_with_retry
+from fitFlow.backend.app.models import user, client, nutritionist, admin, food  # noqa: F401 (registra los modelos)
+from fitFlow.backend.app.models import nutrition_plan, nutrition_plan_meal  # noqa: F401
+from fitFlow.backend.app.models.food_log import FoodLog
+from fitFlow.backend.app.models.nutrition_plan_meal import MealType
+
+
+def run(profile: bool, threads: int, batches: int, batch_size: int, retry: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = build_engine(url, sqlite_profile=profile, pool_size=threads, max_overflow=0)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        errors = []
+        barrier = threading.Barrier(threads)
+
+        def worker(user_id: int):
+            barrier.wait()
+            for _ in range(batches):
+                db = Session()
+                try:
+                    def insert_batch():
+                        for i in range(batch_size):
+                            db.add(FoodLog(user_id=user_id, food_id=1 + i % 10, date=date.today(),
+                                           meal_type=MealType.Almuerzo, portion_size=1.0))
+                    if retry:
+                        commit_with_retry(db, insert_batch)
+                    else:
+                        insert_batch()
+                        db.commit()
+                except OperationalError as e:
+                    db.rollback()
+                    errors.append(str(e.orig))
+                finally:
+                    db.close()
+
+        pool = [threading.Thread(target=worker, args=(n + 1,)) for n in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+        inserted = (threads * batches - len(errors)) * batch_size
+        return {
+            "profile": "on" if profile else "off",
+            "seconds": round(elapsed, 3),
+            "rows": inserted,
+            "rows_per_sec": round(inserted / elapsed, 1),
+            "failed_commits": len(errors),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+
+    for profile in (False, True):
+        print(run(profile, args.threads, args.batches, args.batch_size, retry=profile))
+
+
+if __name__ == "__main__":
+    main()
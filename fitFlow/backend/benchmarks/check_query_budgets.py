@@ -0,0 +1,111 @@
+"""
+Verificación: recorre los endpoints calientes con DB_QUERY_BUDGET_STRICT=true y muestra cuántas
+consultas ejecuta cada uno. Falla (código 1) si alguno supera su presupuesto de
+core/query_metrics.py o repite una sentencia (N+1).
+
+Usa una base SQLite temporal con datos sintéticos.
+
+Uso:
+    python fitFlow/backend/benchmarks/check_query_budgets.py --foods 40
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'budgets.db')}")
+os.environ["DB_QUERY_BUDGET_STRICT"] = "true"
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from fastapi.testclient import TestClient
+
+from fitFlow.main import app
+from fitFlow.backend.app.core.query_metrics import QueryBudgetExceeded, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from fitFlow.backend.app.database import migrations
+
+PASSWORD = "Secreta1!"
+
+
+def login(client: TestClient, cedula: str) -> dict:
+    response = client.post("/auth/login", data={"username": cedula, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def seed(client: TestClient, foods: int):
+    """Cliente, nutricionista, alimentos y un plan de hoy con una comida por alimento"""
+    client.post("/register/client", json=dict(
+        first_name="Ana", last_name="Paz", cedula="1710034065", email="cliente@fitflow.ec", password=PASSWORD,
+        birth_date="1990-01-01", sex="Femenino", height_cm=165, weight_current_kg=60, weight_goal_kg=55,
+        activity_level="Moderado", goal="Bajar_Peso")).raise_for_status()
+    client.post("/register/nutritionist", json=dict(
+        first_name="Nu", last_name="Tri", cedula="1700034067", email="nutri@fitflow.ec", password=PASSWORD,
+        birth_date="1980-01-01", sex="Masculino", certification_number="C1",
+        specialty="Nutrición Deportiva")).raise_for_status()
+
+    client_headers = login(client, "1710034065")
+    nutritionist_headers = login(client, "1700034067")
+    for i in range(foods):
+        client.post("/foods/", headers=nutritionist_headers, json=dict(
+            name=f"Alimento {i}", calories_per_portion=100 + i, protein_per_portion=5, fat_per_portion=3,
+            carbs_per_portion=12, portion_unit="100g")).raise_for_status()
+
+    user_id = client.get("/auth/me", headers=client_headers).json()["user_id"]
+    nutritionist_id = client.get("/auth/me", headers=nutritionist_headers).json()["user_id"]
+    meal_types = ["Desayuno", "Almuerzo", "Cena", "Snack"]
+    meals = [{"food_id": i + 1, "meal_type": meal_types[i % 4], "portion_size": 2.0} for i in range(foods)]
+    return client_headers, nutritionist_headers, user_id, nutritionist_id, meals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=40, help="alimentos del plan y entradas del lote de food-logs")
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    today = date.today().isoformat()
+    month_end = (date.today() + timedelta(days=29)).isoformat()
+    failures = 0
+    with TestClient(app) as client:
+        client_headers, nutritionist_headers, user_id, nutritionist_id, meals = seed(client, args.foods)
+        plan_id = client.post("/nutrition-plans/", headers=nutritionist_headers, json={
+            "user_id": user_id, "nutritionist_id": nutritionist_id, "name": "Plan", "plan_date": today,
+            "meals": meals}).json()["plan_id"]
+        entries = [{**meal, "date": today, "portion_size": 1.0} for meal in meals]
+        job_id = client.post("/nutrition-optimizer/generate", params={"background": True}, headers=client_headers,
+                             json={"user_id": user_id, "plan_date": today}).json()["job_id"]
+
+        checks = [
+            ("POST", "/food-logs/", client_headers, entries),
+            ("GET", "/auth/me", client_headers, None),
+            ("GET", "/auth/clients", client_headers, None),
+            ("GET", "/auth/nutritionists", client_headers, None),
+            ("GET", "/auth/admins", client_headers, None),
+            ("GET", "/nutrition-plans/my-plans", client_headers, None),
+            ("GET", "/nutrition-plans/week-overview", client_headers, None),
+            ("GET", f"/nutrition-plans/status/{today}", client_headers, None),
+            ("GET", f"/nutrition-plans/{plan_id}/status", client_headers, None),
+            ("GET", "/dashboard/nutrition-metrics", client_headers, None),
+            ("POST", "/nutrition-optimizer/generate-range", nutritionist_headers, {
+                "user_id": user_id, "start_date": today, "end_date": month_end, "persist": True,
+                "skip_existing": True}),
+            ("GET", "/jobs/", client_headers, None),
+            ("GET", f"/jobs/{job_id}", client_headers, None),
+        ]
+        for method, path, headers, body in checks:
+            try:
+                response = client.request(method, path, headers=headers, json=body)
+            except QueryBudgetExceeded as exc:
+                print(f"❌ {exc}")
+                failures += 1
+                continue
+            print(f"✅ {method} {path}: {response.status_code} "
+                  f"queries={response.headers[QUERY_COUNT_HEADER.decode()]} "
+                  f"db_ms={response.headers[QUERY_TIME_HEADER.decode()]}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
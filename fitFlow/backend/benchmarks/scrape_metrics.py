@@ -0,0 +1,102 @@
+"""
+Scraper local que hace las veces de Prometheus: lee /metrics, valida el formato de texto
+(histogramas acumulativos, _count == +Inf) y comprueba que las rutas se etiquetan por plantilla.
+
+Sin --url levanta la app en proceso sobre una base SQLite temporal y genera tráfico antes de leer.
+
+Uso:
+    python fitFlow/backend/benchmarks/scrape_metrics.py
+    python fitFlow/backend/benchmarks/scrape_metrics.py --url http://localhost:8000/metrics
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import urllib.request
+from collections import defaultdict
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'metrics.db')}")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+LABEL = re.compile(r'(?P<key>[a-zA-Z_][a-zA-Z0-9_]*)="(?P<value>(?:[^"\\]|\\.)*)"')
+
+
+def parse(text: str) -> dict:
+    """{nombre: [(etiquetas, valor)]} de las muestras; falla ante líneas mal formadas"""
+    samples = defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = SAMPLE.match(line)
+        if not match:
+            raise ValueError(f"Línea inválida: {line}")
+        labels = {m["key"]: m["value"] for m in LABEL.finditer(match["labels"] or "")}
+        samples[match["name"]].append((labels, float(match["value"])))
+    return samples
+
+
+def validate(samples: dict) -> list:
+    problems = []
+    buckets = defaultdict(list)
+    for labels, value in samples.get("fitflow_http_request_duration_seconds_bucket", []):
+        series = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        buckets[series].append((float(labels["le"].replace("+Inf", "inf")), value))
+    counts = {tuple(sorted(labels.items())): value
+              for labels, value in samples.get("fitflow_http_request_duration_seconds_count", [])}
+
+    for series, points in buckets.items():
+        values = [value for _, value in sorted(points)]
+        if values != sorted(values):
+            problems.append(f"buckets no acumulativos en {dict(series)}")
+        if counts.get(series) != values[-1]:
+            problems.append(f"_count distinto del bucket +Inf en {dict(series)}")
+
+    for labels, _ in samples.get("fitflow_http_requests_total", []):
+        if re.search(r"/\d+(/|$)", labels["route"]):
+            problems.append(f"ruta sin plantilla: {labels['route']}")
+    return problems
+
+
+def generate_traffic():
+    """Tráfico en proceso: rutas con parámetros, 404 y 401, y devuelve el texto de /metrics"""
+    from fastapi.testclient import TestClient
+    from fitFlow.main import app
+    from fitFlow.backend.app.database import migrations
+
+    migrations.upgrade()
+    with TestClient(app) as client:
+        for i in range(20):
+            client.get("/foods/")
+            client.get(f"/nutrition-plans/{i}/status")  # 401 sin token, etiquetada con la plantilla
+            client.get(f"/no-existe/{i}")
+        return client.get("/metrics").text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="endpoint /metrics de una instancia en marcha")
+    args = parser.parse_args()
+
+    if args.url:
+        with urllib.request.urlopen(args.url) as response:
+            text = response.read().decode()
+    else:
+        text = generate_traffic()
+
+    samples = parse(text)
+    for labels, value in samples.get("fitflow_http_requests_total", []):
+        print(f"📊 {labels['method']} {labels['route']} {labels['status']}: {int(value)}")
+
+    problems = validate(samples)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print(f"✅ {sum(len(v) for v in samples.values())} muestras válidas")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
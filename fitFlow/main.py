@@ -1,26 +1,78 @@
 import sys
 import os
+import logging
+import anyio
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fitFlow.backend.app.api.auth import router as auth_router
 from fitFlow.backend.app.api.register import router as register_router
-from fitFlow.backend.app.database.session import engine, Base
+from fitFlow.backend.app.core import config, password_hashing
+from fitFlow.backend.app.core.metrics import MetricsMiddleware
+from fitFlow.backend.app.core.query_metrics import QueryMetricsMiddleware
+from fitFlow.backend.app.database.session import engine, async_engine, describe_pool
 from fitFlow.backend.app.api.foods import router as foods_router
 from fitFlow.backend.app.api.food_logs import router as food_logs_router
 from fitFlow.backend.app.api.nutrition_plans import router as nutrition_plans_router
 from fitFlow.backend.app.api import dashboard
 from fitFlow.backend.app.api import optimizador_planes
 from fitFlow.backend.app.api.nutrition_optimizer_enhanced import router as enhanced_router
+from fitFlow.backend.app.api.metrics import router as metrics_router
+from fitFlow.backend.app.api.jobs import router as jobs_router
+from fitFlow.backend.app.services.jobs import JobQueueFull, job_queue
 
 
 app = FastAPI(title="Fit Flow API")
+logger = logging.getLogger("uvicorn.error")
+
+# El esquema se gestiona fuera de banda con las migraciones versionadas:
+#   python -m fitFlow.backend.app.database.migrations upgrade
+
+
+@app.on_event("startup")
+async def report_database_pool():
+    # El threadpool de los endpoints síncronos no debe superar la capacidad del pool de conexiones
+    anyio.to_thread.current_default_thread_limiter().total_tokens = config.THREADPOOL_SIZE
+    # Reporte de la configuración efectiva del pool de conexiones
+    logger.info("Database pool: %s (threadpool=%s)", describe_pool(engine), config.THREADPOOL_SIZE)
+
+
+@app.on_event("startup")
+async def report_orphaned_jobs():
+    # Trabajos que quedaron activos sin latido (pod reiniciado o caído)
+    try:
+        orphaned = await anyio.to_thread.run_sync(job_queue.mark_orphans)
+    except Exception:
+        logger.warning("No se pudieron revisar los trabajos huérfanos (¿migraciones pendientes?)", exc_info=True)
+        return
+    if orphaned:
+        logger.warning("%s trabajos marcados como orphaned", orphaned)
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
+    password_hashing.shutdown()
+    job_queue.shutdown()
+
+
+@app.exception_handler(password_hashing.PasswordHashingBusy)
+async def password_hashing_busy(request: Request, exc: password_hashing.PasswordHashingBusy):
+    # Cola de bcrypt llena (avalancha de logins/registros): el cliente reintenta en un momento
+    return JSONResponse(status_code=503, headers={"Retry-After": "1"},
+                        content={"detail": "Demasiadas solicitudes de autenticación simultáneas, intente de nuevo"})
+
+
+@app.exception_handler(JobQueueFull)
+async def job_queue_full(request: Request, exc: JobQueueFull):
+    # Cola de trabajos en segundo plano llena: el cliente reintenta más tarde
+    return JSONResponse(status_code=503, headers={"Retry-After": "30"},
+                        content={"detail": "Hay demasiados trabajos en cola, intente de nuevo más tarde"})
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
 
 # Routers
 app.include_router(auth_router)
@@ -34,6 +86,17 @@ app.include_router(optimizador_planes.router)
 
 app.include_router(enhanced_router)
 
+app.include_router(metrics_router)
+
+app.include_router(jobs_router)
+
+
+# Métricas de Prometheus (/metrics). Se registra antes que QueryMetricsMiddleware para quedar
+# dentro de él y ver el tiempo en base de datos de cada petición.
+app.add_middleware(MetricsMiddleware)
+
+# Consultas SQL por petición (cabeceras X-DB-Query-Count / X-DB-Time-ms)
+app.add_middleware(QueryMetricsMiddleware)
 
 # CORS
 app.add_middleware(